@@ -1,5 +1,7 @@
 LOAD CSV WITH HEADERS FROM "https://raw.githubusercontent.com/ThijmenA/Knowledge-Engineering-Google-Trends-Data/refs/heads/main/combined_data_without_index.csv" AS row
-WITH row, split(row.Periods, '-') AS parts
+WITH row, split(row.Periods, '-') AS parts,
+    // The searches of the month that are present, as loader.rows_from_frame uses them
+    [value IN [toFloat(row["Search data clothes and fashion items"]), toFloat(row["Search data consumer electronics"]), toFloat(row["Search data food and drugstore items"]), toFloat(row["Search data other non-food"])] WHERE value IS NOT NULL] AS searches
 
 // Create nodes for dates
 MERGE (d:Date {id: row.id, value: date({year: toInteger(parts[0]), month: toInteger(parts[1]), day: 1})})
@@ -27,10 +29,13 @@ MERGE (rfo:Food {value: toFloat(row["Retail sale of food and drugstore items"]),
 MERGE (rnf:NonFood {value: toFloat(row["Retail sale of other non-food"]), name: "Retail sale of other non-food"})
 
 // Create nodes for google trends data
-MERGE(g:GoogleTrends {id: row.id,
-    average: (toFloat(row["Search data clothes and fashion items"]) + toFloat(row["Search data consumer electronics"]) + toFloat(row["Search data food and drugstore items"]) + toFloat(row["Search data food and drugstore items"]) + toFloat(row["Search data other non-food"])) / 4,
-    total: toFloat(row["Search data clothes and fashion items"]) + toFloat(row["Search data consumer electronics"]) + toFloat(row["Search data food and drugstore items"]) + toFloat(row["Search data food and drugstore items"]) + toFloat(row["Search data other non-food"])
-}) // TODO: value: average of all trends
+// A month without searches gets no average or total, as in the loader; MERGE
+// cannot match on a null property, so they are set after merging on the id
+MERGE(g:GoogleTrends {id: row.id}) // TODO: value: average of all trends
+SET g.average = CASE size(searches) WHEN 0 THEN null
+        ELSE reduce(acc = 0.0, value IN searches | acc + value) / size(searches) END,
+    g.total = CASE size(searches) WHEN 0 THEN null
+        ELSE reduce(acc = 0.0, value IN searches | acc + value) END
 MERGE(fss:FashionSearch {value: toFloat(row["Search data clothes and fashion items"]), name: "Search data clothes and fashion items"})
 MERGE(ess:ElectronicsSearch {value: toFloat(row["Search data consumer electronics"]), name: "Search data consumer electronics"})
 MERGE(fos:FoodSearch {value: toFloat(row["Search data food and drugstore items"]), name: "Search data food and drugstore items"})
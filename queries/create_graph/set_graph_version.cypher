@@ -0,0 +1,3 @@
+// Run after (re)loading the graph so the dashboard drops its cached snapshot
+MERGE (v:GraphVersion)
+SET v.value = datetime()
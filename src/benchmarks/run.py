@@ -0,0 +1,601 @@
+"""
+Benchmarks of the preprocessing stages, the graph load, the queries and the
+dashboard figure callbacks on synthetic inputs of a chosen size.
+
+Synthetic raw files (see synthetic.py) are written to a temporary folder and
+every step is timed `--repeat` times through the same functions the pipeline,
+the loader and the dashboard call:
+
+    preprocessing   knmi_<variable>, cbs_pivot, trends, comfort_score, combine,
+                    loader_rows, knmi_daily, daily_rollups, knmi_stations,
+                    regional_weather, product_rows
+    materialize     result frames of Record objects built by pandas and by
+                    materialize.py, typed and downcast
+    downsample      Scatter and downsampled Scattergl traces of the daily
+                    temperature (see web/downsample.py)
+    graph           graph_load, schema_migration,  (--neo4j only)
+                    daily_graph_load, station_graph_load,
+                    product_graph_load
+    queries         every query in queries.py      (--neo4j only)
+    duckdb          parquet_export and the reads of (--duckdb only)
+                    the DuckDB backend
+    callbacks       snapshot_load, the uncached figure builders of main.py for
+                    all dates and for a window of the later years, and the
+                    typed dataset payload
+
+Without --neo4j the callbacks read from FrameDriver, which answers the
+dashboard's queries from the loader rows in memory, so the numbers are the
+dashboard's own work (set WEBGL=1 to time the WebGL figures, see
+web/downsample.py); with --duckdb they read from the DuckDB backend (see
+web/backends.py) over a Parquet export of the rows. --neo4j REPLACES THE GRAPH
+at NEO4J_URI with the synthetic one; only point it at a scratch database.
+
+Each run appends one JSON line with the git commit, the scale and the min,
+median, mean and max seconds of every benchmark to the history file, and
+compares the medians with the last run at the same scale. Medians that grew by
+more than --threshold are reported as regressions (and fail the run with
+--check).
+
+Usage: python -m src.benchmarks.run [--stations N] [--years N] [--keywords N]
+    [--repeat N] [--neo4j] [--duckdb] [--history PATH] [--threshold R] [--check]
+"""
+
+import argparse
+import datetime
+import inspect
+import json
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from ..preprocessing import daily, stations, trends
+from ..preprocessing.combine import combine, read_monthly, weather_scores
+from ..preprocessing.knmi import VARIABLES, monthly_weather
+from ..preprocessing.pipeline import sales_table
+from ..web.loader import (
+    daily_rows,
+    product_rows,
+    rollup_rows,
+    rows_from_frame,
+    table_rows,
+)
+from .synthetic import LAST_YEAR, Scale, write_inputs
+
+PATH = Path(__file__).parent.parent.parent
+HISTORY_PATH = PATH / "processed_data" / "benchmark_history.jsonl"
+
+# Median ratio to the previous run above which a benchmark counts as slower
+REGRESSION_THRESHOLD = 1.25
+
+
+def measure(func: Callable, repeat: int) -> tuple[dict, object]:
+    """
+    Run `func` `repeat` times.
+
+    Returns:
+        tuple: ({min, median, mean, max: seconds, runs: repeat}, last result).
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    timing = {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "max": max(times),
+        "runs": repeat,
+    }
+    return timing, result
+
+
+class Suite:
+    """Collects the timings of one run, keyed by benchmark name."""
+
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results = {}
+
+    def bench(self, name: str, func: Callable):
+        """Time `func`, print its median and return its last result."""
+        timing, result = measure(func, self.repeat)
+        self.results[name] = timing
+        print(f"{name:<48} {timing['median'] * 1000:>10.2f} ms")
+        return result
+
+
+class FrameDriver:
+    """
+    Stand-in for a Neo4j driver that answers get_graph_version and
+    get_sales_data from loader rows, so the callbacks can be timed without a
+    database. Other queries raise NotImplementedError.
+    """
+
+    # get_sales_data column -> loader row key, where they differ
+    COLUMNS = {
+        "rain": "rainfall",
+        "temp": "temperature",
+        "retail_sale_of_clothes_and_fashion_items": "fashion",
+        "retail_sale_of_consumer_electronics": "electronics",
+        "retail_sale_of_food_and_drugstore_items": "food",
+        "retail_sale_of_other_non_food": "non_food",
+    }
+
+    def __init__(self, rows: list[dict]):
+        self.rows = sorted(rows, key=lambda row: row["date"])
+
+    def execute_query(self, query, parameters_=None, **kwargs):
+        parameters = {**(parameters_ or {}), **kwargs}
+        if "GraphVersion" in query:
+            keys = ["version", "dates", "last_date"]
+            last = self.rows[-1]["date"] if self.rows else None
+            return [dict(zip(keys, ("synthetic", len(self.rows), last)))], None, keys
+        keys = re.findall(r"\bAS (\w+)", query)
+        if keys[:3] != ["year", "month", "date"]:
+            raise NotImplementedError("FrameDriver only answers get_sales_data.")
+        start = parameters.get("start_date") or ""
+        end = parameters.get("end_date") or "9999"
+        records = [
+            {key: row.get(self.COLUMNS.get(key, key)) for key in keys}
+            for row in self.rows
+            if start <= row["date"] <= end
+        ]
+        return records, None, keys
+
+
+def preprocessing_benchmarks(suite: Suite, root: Path, inputs: dict, scale: Scale):
+    """
+    Time the pipeline stages on the synthetic raw files.
+
+    Returns:
+        tuple: Loader rows of the combined table, and the loader rows of the
+        daily weather (see loader.read_daily), of the stations (see
+        loader.read_stations) and of the products (see loader.read_products).
+    """
+    processed = root / "processed_data"
+    processed.mkdir(exist_ok=True)
+    start, end = scale.start_month, scale.end_month
+
+    def monthly(path: Path, date_col: str = "year_month") -> pd.DataFrame:
+        return read_monthly(path, date_col, start=start, end=end)
+
+    knmi_paths = {
+        variable: inputs["knmi"][folder] for variable, (folder, *_) in VARIABLES.items()
+    }
+    weather_paths = {}
+    for variable, (_, _, csv_name, _) in VARIABLES.items():
+        table = suite.bench(
+            f"knmi_{variable}",
+            lambda: monthly_weather(variable, paths=knmi_paths[variable]),
+        )
+        weather_paths[variable] = processed / csv_name
+        table.to_csv(weather_paths[variable], index=False)
+
+    sales_path = processed / "sales_data_transformed.csv"
+    suite.bench("cbs_pivot", lambda: sales_table(inputs["cbs"])).to_csv(
+        sales_path, index=False
+    )
+
+    def run_trends():
+        matrix = trends.read_exports(inputs["trends"])
+        averages = trends.category_averages(matrix)
+        tables = [
+            trends.category_table(matrix, category, averages)
+            for category in matrix.columns.unique("category")
+        ]
+        return tables, trends.average_table(averages), trends.product_table(matrix)
+
+    search_path = processed / "average_search_data_per_category.csv"
+    _, search, products = suite.bench("trends", run_trends)
+    search.to_csv(search_path, index=False)
+    product_table = suite.bench("product_rows", lambda: product_rows(products))
+
+    scores = suite.bench(
+        "comfort_score",
+        lambda: weather_scores(
+            monthly(weather_paths["temperature"]),
+            monthly(weather_paths["rainfall"]),
+            monthly(weather_paths["wind_speed"]),
+        ),
+    )
+    combined = suite.bench(
+        "combine",
+        lambda: combine(
+            monthly(sales_path, "Periods"),
+            monthly(weather_paths["rainfall"]),
+            monthly(weather_paths["wind_speed"]),
+            monthly(weather_paths["temperature"]),
+            monthly(search_path, "Date"),
+            weather_score=scores,
+        ),
+    )
+    rows = suite.bench("loader_rows", lambda: rows_from_frame(combined))
+
+    days = suite.bench("knmi_daily", lambda: daily.daily_weather(knmi_paths))
+    rollups = suite.bench(
+        "daily_rollups",
+        lambda: [daily.rollup(days, period) for period in daily.ROLLUPS],
+    )
+    station_list, monthly = suite.bench(
+        "knmi_stations", lambda: stations.station_weather(knmi_paths)
+    )
+    regions = stations.regions(station_list)
+    regional = suite.bench(
+        "regional_weather",
+        lambda: stations.regional_weather(monthly, station_list, regions),
+    )
+    daily_tables = (daily_rows(days), *map(rollup_rows, rollups))
+    station_tables = (
+        table_rows(station_list, ["station", "name"]),
+        table_rows(monthly, ["station"]),
+        table_rows(regions, ["region", "scheme", "name"]),
+        table_rows(regional, ["region"]),
+    )
+    return rows, daily_tables, station_tables, product_table
+
+
+def materialize_benchmarks(suite: Suite, rows: list[dict], product_table: list[dict]):
+    """
+    Time turning driver records into result frames: pd.DataFrame over Records
+    as the queries did, and materialize.records_frame with and without
+    downcast. Records are built as the driver returns them (neo4j.time.Date
+    dates, year and month strings) for the monthly table and for the per-product
+    series, and the memory of each frame is printed after its timing.
+    """
+    from neo4j import Record
+    from neo4j.time import Date
+
+    from ..web.materialize import records_frame
+    from ..web.queries import INTEREST_DTYPES, SALES_DATA_COLUMNS, SALES_DATA_DTYPES
+
+    def date(value: str) -> Date:
+        return Date(*map(int, value[:10].split("-")))
+
+    columns = list(SALES_DATA_COLUMNS)
+    sales_keys = ["year", "month", "date", *columns]
+    sales = [
+        Record(
+            zip(
+                sales_keys,
+                [
+                    row["year"],
+                    row["month"],
+                    date(row["date"]),
+                    *[row.get(FrameDriver.COLUMNS.get(col, col)) for col in columns],
+                ],
+            )
+        )
+        for row in rows
+    ]
+    series_keys = ["category", "date", "value"]
+    series = [
+        Record(zip(series_keys, [row["category"], date(item["month"]), item["value"]]))
+        for row in product_table
+        for item in row["series"]
+    ]
+    cases = {
+        "sales_data": (sales, sales_keys, SALES_DATA_DTYPES),
+        "product_series": (series, series_keys, INTEREST_DTYPES),
+    }
+    for label, (records, keys, dtypes) in cases.items():
+        builders = {
+            "pandas": lambda: pd.DataFrame(records, columns=keys),
+            "typed": lambda: records_frame(records, keys, dtypes),
+            "downcast": lambda: records_frame(records, keys, dtypes, downcast=True),
+        }
+        for name, build in builders.items():
+            frame = suite.bench(f"materialize_{label}_{name}", build)
+            memory = frame.memory_usage(deep=True).sum()
+            print(f"{'':<4}{len(frame)} rows, {memory / 1024:.0f} KiB")
+
+
+def downsample_benchmarks(suite: Suite, days: list[dict]):
+    """
+    Time building and serializing a line trace of the daily temperature as a
+    full-resolution Scatter and as Scattergl downsampled by each method, and
+    print the JSON size of each after its timing.
+    """
+    import json
+
+    from plotly.utils import PlotlyJSONEncoder
+
+    from ..web.downsample import DOWNSAMPLE_METHODS, line_trace
+
+    dates = [day["date"] for day in days]
+    values = [day["temperature"] for day in days]
+    traces = {"scatter": lambda: line_trace(dates, values, mode="lines")}
+    for method in DOWNSAMPLE_METHODS:
+        traces[f"scattergl_{method}"] = lambda method=method: line_trace(
+            dates, values, webgl=True, method=method, mode="lines"
+        )
+    for name, build in traces.items():
+        size = len(
+            suite.bench(
+                f"downsample_{name}",
+                lambda: json.dumps(build(), cls=PlotlyJSONEncoder),
+            )
+        )
+        print(f"{'':<4}{len(days)} days, {size / 1024:.0f} KiB")
+
+
+def graph_benchmarks(
+    suite: Suite,
+    driver,
+    rows: list[dict],
+    daily_tables: tuple,
+    station_tables: tuple,
+    product_table: list[dict],
+):
+    from ..web.loader import load_daily, load_products, load_rows, load_stations
+    from ..web.migrate import migrate
+
+    suite.bench(
+        "graph_load", lambda: load_rows(driver, rows, reset=True, schema="nodes")
+    )
+    suite.bench("schema_migration", lambda: migrate(driver))
+    suite.bench("daily_graph_load", lambda: load_daily(driver, *daily_tables))
+    suite.bench("station_graph_load", lambda: load_stations(driver, *station_tables))
+    suite.bench("product_graph_load", lambda: load_products(driver, product_table))
+
+
+def window(scale: Scale) -> tuple[str, str]:
+    """First and last date of the later half of the synthetic years."""
+    return f"{LAST_YEAR - max(scale.years // 2, 1) + 1}-01-01", f"{LAST_YEAR}-12-01"
+
+
+def query_benchmarks(suite: Suite, driver, scale: Scale):
+    from ..web import queries
+
+    start, end = window(scale)
+    for name, args in [
+        ("get_graph_version", ()),
+        ("get_sales_data", ()),
+        ("get_sales_weather_data", ()),
+        ("get_sales_weather_data_by_date", (end,)),
+        ("get_sales_weather_data_by_date_range", (start, end)),
+        ("get_sales_google_trends_data", ()),
+        ("get_sales_google_trends_data_by_date", (end,)),
+        ("get_sales_google_trends_data_by_date_range", (start, end)),
+    ]:
+        query = getattr(queries, name)
+        suite.bench(f"query_{name}", lambda: query(driver, *args))
+    suite.bench(
+        "query_get_sales_data_window",
+        lambda: queries.get_sales_data(driver, start, end),
+    )
+    # The same data from the Observation nodes written by schema_migration
+    suite.bench(
+        "query_get_sales_data_compact",
+        lambda: queries.get_sales_data(driver, schema="compact"),
+    )
+    suite.bench(
+        "query_get_sales_data_window_compact",
+        lambda: queries.get_sales_data(driver, start, end, schema="compact"),
+    )
+    for resolution in queries.DAILY_WEATHER_LEVELS:
+        suite.bench(
+            f"query_get_daily_weather_{resolution}",
+            lambda: queries.get_daily_weather(driver, start, end, resolution),
+        )
+    for scheme in ("province", "grid"):
+        suite.bench(
+            f"query_get_regional_weather_{scheme}",
+            lambda: queries.get_regional_weather(driver, scheme, start, end),
+        )
+    suite.bench(
+        "query_get_regional_sales_weather",
+        lambda: queries.get_regional_sales_weather(
+            driver, "province:Utrecht", start, end
+        ),
+    )
+    products = queries.get_products(driver)
+    suite.bench("query_get_products", lambda: queries.get_products(driver))
+    # Half of the products across all categories, as an ad-hoc category would be
+    subset = list(zip(products["category"], products["product"]))[::2]
+    suite.bench(
+        "query_get_product_interest",
+        lambda: queries.get_product_interest(driver, subset, start, end),
+    )
+    suite.bench(
+        "query_get_category_interest",
+        lambda: queries.get_category_interest(driver, None, start, end),
+    )
+
+
+def duckdb_benchmarks(suite: Suite, rows: list[dict], folder: Path, scale: Scale):
+    """
+    Time the Parquet export and the reads of the DuckDB backend.
+
+    Returns:
+        DuckDBBackend: The backend over the export.
+    """
+    from ..web.backends import DuckDBBackend, write_parquet
+
+    path = folder / "combined_data.parquet"
+    suite.bench("parquet_export", lambda: write_parquet(rows, path))
+    backend = DuckDBBackend(path)
+    start, end = window(scale)
+    suite.bench("duckdb_get_graph_version", backend.get_graph_version)
+    suite.bench("duckdb_get_sales_data", backend.get_sales_data)
+    suite.bench(
+        "duckdb_get_sales_data_window", lambda: backend.get_sales_data(start, end)
+    )
+    suite.bench(
+        "duckdb_get_sales_weather_data_by_date",
+        lambda: backend.get_sales_weather_data_by_date(end),
+    )
+    return backend
+
+
+def callback_benchmarks(suite: Suite, driver, scale: Scale):
+    """
+    Time the dashboard's figure builders against a snapshot of `driver`.
+
+    The builders are called without their FigureCache (inspect.unwrap), so
+    every repeat draws the figures again; snapshot-level caches (correlation
+    cubes, lag tables) stay warm after the first repeat, as in the dashboard.
+    """
+    from ..web import main
+    from ..web.snapshot import SnapshotStore
+
+    main.snapshot = SnapshotStore(driver)
+
+    def load():
+        main.snapshot.invalidate()
+        return main.snapshot.version
+
+    suite.bench("snapshot_load", load)
+    boxplots = inspect.unwrap(main.update_monthly_sales_boxplots)
+    suite.bench("callback_monthly_sales_boxplots", lambda: boxplots(None))
+    builders = {
+        "weather_figures": inspect.unwrap(main.weather_figures),
+        "search_figures": inspect.unwrap(main.search_figures),
+        "search_sales_lag_figure": inspect.unwrap(main.search_sales_lag_figure),
+    }
+    for label, dates in [("all", (None, None)), ("window", window(scale))]:
+        for name, builder in builders.items():
+            suite.bench(f"callback_{name}_{label}", lambda: builder(*dates))
+    suite.bench(
+        "callback_dataset_payload",
+        lambda: main.snapshot.typed_payload(main.DATASET_COLUMNS),
+    )
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PATH,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_run(path: Path, entry: dict) -> dict | None:
+    """
+    The last run in the history file with the same scale, backend and
+    rendering mode.
+    """
+    if not path.exists():
+        return None
+    last = None
+    with open(path) as f:
+        for line in f:
+            run = json.loads(line)
+            if (
+                run["scale"] == entry["scale"]
+                and run["neo4j"] == entry["neo4j"]
+                and run.get("duckdb", False) == entry["duckdb"]
+                and run.get("webgl", False) == entry["webgl"]
+            ):
+                last = run
+    return last
+
+
+def regressions(entry: dict, previous: dict, threshold: float) -> list[str]:
+    """Print the median of every benchmark next to the previous run's."""
+    print(f"\nCompared with {previous['commit']} ({previous['time']}):")
+    slower = []
+    for name, timing in entry["results"].items():
+        before = previous["results"].get(name)
+        if before is None or not before["median"]:
+            continue
+        ratio = timing["median"] / before["median"]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(
+            f"{name:<48} {before['median'] * 1000:>10.2f} ms -> "
+            f"{timing['median'] * 1000:>10.2f} ms  x{ratio:.2f}{flag}"
+        )
+        if flag:
+            slower.append(name)
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data path.")
+    parser.add_argument("--stations", type=int, default=Scale.stations)
+    parser.add_argument("--years", type=int, default=Scale.years)
+    parser.add_argument(
+        "--keywords", type=int, default=Scale.keywords, help="exports per category"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--neo4j",
+        action="store_true",
+        help="also time the graph load and the queries against NEO4J_URI; "
+        "this replaces the graph there",
+    )
+    parser.add_argument(
+        "--duckdb",
+        action="store_true",
+        help="also time the DuckDB backend, which the callbacks then read from "
+        "unless --neo4j is given",
+    )
+    parser.add_argument("--history", type=Path, default=HISTORY_PATH)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument(
+        "--check", action="store_true", help="exit with 1 when a benchmark regressed"
+    )
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    scale = Scale(args.stations, args.years, args.keywords)
+    suite = Suite(args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        print(f"Writing synthetic inputs for {scale.as_dict()}")
+        inputs = write_inputs(root, scale)
+        rows, *tables = preprocessing_benchmarks(suite, root, inputs, scale)
+    materialize_benchmarks(suite, rows, tables[-1])
+    downsample_benchmarks(suite, tables[0][0])
+
+    driver = FrameDriver(rows)
+    with tempfile.TemporaryDirectory() as export:
+        if args.duckdb:
+            driver = duckdb_benchmarks(suite, rows, Path(export), scale)
+        if args.neo4j:
+            from ..web.database import get_driver
+
+            driver = get_driver()
+            graph_benchmarks(suite, driver, rows, *tables)
+            query_benchmarks(suite, driver, scale)
+        callback_benchmarks(suite, driver, scale)
+
+    from ..web.main import WEBGL
+
+    entry = {
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "scale": scale.as_dict(),
+        "neo4j": args.neo4j,
+        "duckdb": args.duckdb,
+        "webgl": WEBGL,
+        "repeat": args.repeat,
+        "results": suite.results,
+    }
+    previous = previous_run(args.history, entry)
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.history, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    print(f"\nAppended the results to {args.history}")
+
+    slower = regressions(entry, previous, args.threshold) if previous else []
+    if args.check and slower:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
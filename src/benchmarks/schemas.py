@@ -0,0 +1,114 @@
+"""
+Compare the nodes and compact graph layouts as the history grows.
+
+For every --years size the graph at NEO4J_URI is REPLACED by that many years of
+monthly rows (the combined table repeated backwards from its last month), loaded
+in the nodes layout and migrated to the compact layout with migrate.py. Then
+get_sales_data is profiled on both layouts, for all dates and for the last year.
+Per layout the table shows the nodes and relationships stored, the relationships
+the query walked (hops), its db hits, its peak memory and the time until Neo4j
+had consumed the result. Only point it at a scratch database.
+
+Usage: python -m src.benchmarks.schemas [--years N [N ...]] [--csv PATH]
+"""
+
+import argparse
+import functools
+from pathlib import Path
+
+import pandas as pd
+from neo4j import Driver
+
+from ..web.loader import CSV_PATH, SEASONS, load_rows, read_rows
+from ..web.migrate import NODE_LAYOUT_LABELS, migrate
+from ..web.profile_queries import profile
+from ..web.queries import get_sales_data
+
+LAYOUT_LABELS = {"nodes": NODE_LAYOUT_LABELS, "compact": ["Observation"]}
+
+LAYOUT_SIZE = """
+MATCH (n) WHERE any(label IN labels(n) WHERE label IN $labels)
+RETURN count(n) AS nodes, sum(COUNT { (n)-->() }) AS relationships
+"""
+
+
+def history_rows(rows: list[dict], years: int) -> list[dict]:
+    """
+    `years` years of loader rows ending in the month of the last row, cycling
+    through `rows` backwards.
+    """
+    rows = sorted(rows, key=lambda row: row["date"])
+    last = pd.Period(rows[-1]["date"][:7], freq="M")
+    months = pd.period_range(end=last, periods=years * 12, freq="M")
+    grown = []
+    for i, period in enumerate(months):
+        row = dict(rows[(i - len(months)) % len(rows)])
+        year, month = f"{period.year}", f"{period.month:02d}"
+        row.update(
+            id=str(i),
+            date=f"{year}-{month}-01",
+            year=year,
+            month=month,
+            season=SEASONS[month],
+        )
+        grown.append(row)
+    return grown
+
+
+def layout_size(driver: Driver, schema: str) -> tuple[int, int]:
+    """Nodes of a layout and the relationships going out of them."""
+    records, _, _ = driver.execute_query(LAYOUT_SIZE, labels=LAYOUT_LABELS[schema])
+    return records[0]["nodes"], records[0]["relationships"]
+
+
+def compare(driver: Driver, rows: list[dict]) -> list[dict]:
+    """Load `rows` in both layouts and profile get_sales_data on each."""
+    load_rows(driver, rows, reset=True, schema="nodes")
+    migrate(driver)
+    last_year = rows[-1]["year"]
+    cases = {"all": (), "last year": (f"{last_year}-01-01", f"{last_year}-12-01")}
+    results = []
+    for schema in LAYOUT_LABELS:
+        nodes, relationships = layout_size(driver, schema)
+        query = functools.partial(get_sales_data, schema=schema)
+        for case, window in cases.items():
+            result = profile(driver, (query, window))
+            results.append(
+                {
+                    "months": len(rows),
+                    "schema": schema,
+                    "case": case,
+                    "nodes": nodes,
+                    "relationships": relationships,
+                    **result,
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the graph layouts.")
+    parser.add_argument("--years", type=int, nargs="+", default=[6, 25, 100])
+    parser.add_argument("--csv", type=Path, default=CSV_PATH)
+    args = parser.parse_args()
+
+    from ..web.database import driver
+
+    rows = read_rows(args.csv)
+    print(
+        f"{'months':>7} {'schema':<8} {'case':<10}{'nodes':>9}{'rels':>9}"
+        f"{'hops':>9}{'db hits':>10}{'mem KiB':>9}{'cons ms':>9}"
+    )
+    for years in args.years:
+        for result in compare(driver, history_rows(rows, years)):
+            print(
+                f"{result['months']:>7} {result['schema']:<8} {result['case']:<10}"
+                f"{result['nodes']:>9}{result['relationships']:>9}"
+                f"{result['hops']:>9}{result['db_hits']:>10}"
+                f"{result['memory_bytes'] / 1024:>9.0f}"
+                f"{result['consumed_after_ms']:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
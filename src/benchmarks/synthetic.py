@@ -0,0 +1,216 @@
+"""
+Synthetic raw inputs in the layout of the real KNMI, CBS and Google Trends files.
+
+The benchmarks need inputs of a chosen size: `stations` weather stations,
+`years` whole years of daily measurements ending in LAST_YEAR and `keywords`
+Google Trends exports per search category. The files are written the way the
+sources deliver them (KNMI "#" headers with the station list and blank missing
+values, the semicolon-separated CBS export with "2019MM01" periods, Trends
+exports with three header lines and "<1" values), so the preprocessing code
+reads them through its normal paths. Values follow a seasonal curve plus noise from a
+seeded generator, so two runs at the same scale produce the same files.
+
+Usage: python -m src.benchmarks.synthetic DIR [--stations N] [--years N] [--keywords N]
+"""
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..preprocessing.incremental import SALES_SECTORS
+
+LAST_YEAR = 2024
+FIRST_STATION = 201
+# Stations are spread over this (min lon, min lat, max lon, max lat) box
+STATION_BOUNDS = (3.4, 50.8, 7.2, 53.5)
+
+TRENDS_CATEGORIES = [
+    "Search data clothes and fashion items",
+    "Search data consumer electronics",
+    "Search data food and drugstore items",
+    "Search data other non-food",
+]
+
+# KNMI column -> (raw folder, yearly mean, seasonal amplitude, noise), raw units
+KNMI_SERIES = {
+    "RH": ("precipitation", 23.0, 8.0, 40.0),
+    "TG": ("temperature", 105.0, 70.0, 30.0),
+    "FG": ("wind_speed", 48.0, 10.0, 15.0),
+}
+
+# Share of KNMI measurements left blank, like stations that skip a day
+MISSING_SHARE = 0.02
+
+
+@dataclass
+class Scale:
+    """Size of a synthetic input tree."""
+
+    stations: int = 30
+    years: int = 6
+    keywords: int = 10
+
+    @property
+    def first_year(self) -> int:
+        return LAST_YEAR - self.years + 1
+
+    @property
+    def start_month(self) -> str:
+        return f"{self.first_year}-01"
+
+    @property
+    def end_month(self) -> str:
+        return f"{LAST_YEAR}-12"
+
+    def as_dict(self) -> dict:
+        return {
+            "stations": self.stations,
+            "years": self.years,
+            "keywords": self.keywords,
+        }
+
+
+def _seasonal(rng, months: np.ndarray, mean: float, amplitude: float, noise: float):
+    """mean + a yearly cycle peaking in July + Gaussian noise, per month 1-12."""
+    cycle = -np.cos((months - 1) / 12 * 2 * np.pi)
+    return mean + amplitude * cycle + rng.normal(0, noise, len(months))
+
+
+def write_knmi(root: Path, scale: Scale, rng: np.random.Generator) -> dict[str, list]:
+    """
+    Write one KNMI file per variable and year under root/raw_weather_data.
+
+    Returns:
+        dict: {raw folder: [written paths]}.
+    """
+    days = pd.date_range(f"{scale.first_year}-01-01", f"{LAST_YEAR}-12-31", freq="D")
+    stations = np.arange(FIRST_STATION, FIRST_STATION + scale.stations)
+    lon_min, lat_min, lon_max, lat_max = STATION_BOUNDS
+    header = ["# STN         LON(east)   LAT(north)  ALT(m)      NAME"] + [
+        f"# {station:<11} {lon:<11.3f} {lat:<11.3f} {alt:<11.2f} Station {station}"
+        for station, lon, lat, alt in zip(
+            stations,
+            rng.uniform(lon_min, lon_max, scale.stations),
+            rng.uniform(lat_min, lat_max, scale.stations),
+            rng.uniform(-5, 50, scale.stations),
+        )
+    ]
+    written = {}
+    for column, (folder, mean, amplitude, noise) in KNMI_SERIES.items():
+        folder_path = root / "raw_weather_data" / folder
+        folder_path.mkdir(parents=True, exist_ok=True)
+        values = np.stack(
+            [_seasonal(rng, days.month.to_numpy(), mean, amplitude, noise)]
+            * scale.stations
+        ) + rng.normal(0, noise / 4, (scale.stations, 1))
+        if column != "TG":
+            values = np.clip(values, 0, None)
+        values = np.round(values).astype(np.int64).astype(str)
+        values[rng.random(values.shape) < MISSING_SHARE] = ""
+        paths = []
+        for year in range(scale.first_year, LAST_YEAR + 1):
+            in_year = days.year == year
+            if folder == "wind_speed":
+                name = f"wind_speed_result_{year}0101_{year}1231.txt"
+            elif folder == "precipitation":
+                name = f"rainfall_{year}.txt"
+            else:
+                name = f"temperature_{year}.txt"
+            dates = days[in_year].strftime("%Y%m%d").to_numpy()
+            lines = [
+                f"  {station},{date},{value:>5}"
+                for station, station_values in zip(stations, values[:, in_year])
+                for date, value in zip(dates, station_values)
+            ]
+            path = folder_path / name
+            with open(path, "w", encoding="latin-1") as f:
+                f.write("# SOURCE: SYNTHETIC DATA IN THE LAYOUT OF KNMI DAILY FILES\n")
+                f.write("# \n")
+                f.write("\n".join(header) + "\n")
+                f.write(f"# STN,YYYYMMDD,   {column}\n")
+                f.write("\n".join(lines) + "\n")
+            paths.append(path)
+        written[folder] = paths
+    return written
+
+
+def write_cbs(root: Path, scale: Scale, rng: np.random.Generator) -> Path:
+    """Write the CBS online sales turnover export for every sector and month."""
+    months = pd.period_range(scale.start_month, scale.end_month, freq="M")
+    path = root / "raw_sales_data" / "sales_data_2.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = ['"ID";"SectorBranchesSIC2008";"Periods";"TurnoverIndicesOnlineSales_1"']
+    for sector in SALES_SECTORS:
+        values = _seasonal(rng, months.month.to_numpy(), 150.0, 30.0, 10.0)
+        trend = np.linspace(0, 60, len(months))
+        for month, value in zip(months, values + trend):
+            period = f"{month.year}MM{month.month:02d}"
+            lines.append(
+                f'"{len(lines) - 1}";"{sector} ";"{period}";"{value:>8.1f}"'
+            )
+    with open(path, "w", encoding="utf-8-sig") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def write_trends(root: Path, scale: Scale, rng: np.random.Generator) -> list[Path]:
+    """Write `keywords` Google Trends exports per category."""
+    months = pd.period_range(scale.start_month, scale.end_month, freq="M")
+    paths = []
+    for category in TRENDS_CATEGORIES:
+        folder = root / "raw_google_trends_data" / category
+        folder.mkdir(parents=True, exist_ok=True)
+        for k in range(scale.keywords):
+            keyword = f"Keyword {k:03d}"
+            values = _seasonal(rng, months.month.to_numpy(), 45.0, 15.0, 8.0)
+            values = np.clip(np.round(values), 0, 100).astype(int)
+            lines = [
+                "Categorie: Alle categorieën",
+                "",
+                f"Maand,{keyword}: (Nederland)",
+            ]
+            lines += [
+                f"{month},{value if value else '<1'}"
+                for month, value in zip(months.strftime("%Y-%m"), values)
+            ]
+            path = folder / f"{keyword}.csv"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            paths.append(path)
+    return paths
+
+
+def write_inputs(root: Path, scale: Scale, seed: int = 0) -> dict:
+    """
+    Write a complete synthetic raw tree under `root`.
+
+    Returns:
+        dict: {"knmi": {raw folder: paths}, "cbs": path, "trends": paths}.
+    """
+    rng = np.random.default_rng(seed)
+    return {
+        "knmi": write_knmi(root, scale, rng),
+        "cbs": write_cbs(root, scale, rng),
+        "trends": write_trends(root, scale, rng),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic raw inputs.")
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--stations", type=int, default=Scale.stations)
+    parser.add_argument("--years", type=int, default=Scale.years)
+    parser.add_argument("--keywords", type=int, default=Scale.keywords)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    scale = Scale(args.stations, args.years, args.keywords)
+    write_inputs(args.root, scale, args.seed)
+    print(f"Wrote synthetic inputs for {scale.as_dict()} to {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Typed columnar copies of the processed_data tables.
+
+Every processed CSV can be mirrored as an uncompressed Arrow IPC file (.arrow)
+next to it. Month columns ("YYYY-MM" or "YYYY-MM-01") are stored as int32 YYYYMM
+keys, ids as int32 and measures as float32, so readers memory-map the file and
+get typed columns without parsing text. The CSV files stay the reference format;
+the .arrow files are optional and need pyarrow.
+
+Usage: python -m src.preprocessing.columnar   (converts every processed_data CSV)
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PATH = Path(__file__).parent.parent.parent
+PROCESSED = PATH / "processed_data"
+
+MONTH_COLUMNS = {"year_month", "Periods", "Date"}
+SUFFIX = ".arrow"
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for the columnar processed_data format."
+        ) from e
+    return pa
+
+
+def columnar_path(csv_path) -> Path:
+    return Path(csv_path).with_suffix(SUFFIX)
+
+
+def month_keys(values) -> np.ndarray:
+    """Convert "YYYY-MM", "YYYY-MM-DD" strings or datetimes to int32 YYYYMM keys."""
+    dates = pd.to_datetime(pd.Series(values).astype(str).str[:7], format="%Y-%m")
+    return (dates.dt.year * 100 + dates.dt.month).to_numpy(np.int32)
+
+
+def month_strings(keys) -> np.ndarray:
+    """Convert int YYYYMM keys back to "YYYY-MM" strings."""
+    keys = np.asarray(keys)
+    return np.char.add(
+        np.char.add(np.char.zfill((keys // 100).astype(str), 4), "-"),
+        np.char.zfill((keys % 100).astype(str), 2),
+    ).astype(object)
+
+
+def month_dates(keys) -> pd.Series:
+    """Convert int YYYYMM keys to datetimes at the first of the month."""
+    keys = np.asarray(keys)
+    return pd.to_datetime(
+        pd.DataFrame({"year": keys // 100, "month": keys % 100, "day": 1})
+    )
+
+
+def to_typed(df: pd.DataFrame, measure_dtype="float32") -> pd.DataFrame:
+    """
+    Give a processed table its columnar types.
+
+    Parameters:
+        df (pd.DataFrame): Table as read from a processed CSV.
+        measure_dtype: dtype of the numeric measure columns.
+
+    Returns:
+        pd.DataFrame: Month columns as int32 YYYYMM, id as int32, other numeric
+        columns as `measure_dtype`, everything else unchanged.
+    """
+    typed = {}
+    for col in df.columns:
+        if col in MONTH_COLUMNS:
+            typed[col] = month_keys(df[col])
+        elif col == "id":
+            typed[col] = df[col].to_numpy(np.int32)
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            typed[col] = df[col].to_numpy(measure_dtype)
+        else:
+            typed[col] = df[col].to_numpy()
+    return pd.DataFrame(typed)
+
+
+def write_columnar(df: pd.DataFrame, path, measure_dtype="float32"):
+    """Write a processed table as an uncompressed, memory-mappable Arrow IPC file."""
+    pa = _pyarrow()
+    table = pa.Table.from_pandas(to_typed(df, measure_dtype), preserve_index=False)
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_columnar(path, month_format: str = "key") -> pd.DataFrame:
+    """
+    Memory-map an Arrow IPC file written by write_columnar.
+
+    Parameters:
+        path (str): .arrow file.
+        month_format (str): "key" keeps int32 YYYYMM month columns, "str" turns
+            them into "YYYY-MM" strings as in the CSV files.
+
+    Returns:
+        pd.DataFrame: The table; numeric columns are backed by the mapped file.
+    """
+    pa = _pyarrow()
+    # The mapping stays open for as long as the returned columns reference it
+    source = pa.memory_map(str(path), "r")
+    table = pa.ipc.open_file(source).read_all()
+    data = table.to_pandas(split_blocks=True)
+    if month_format == "str":
+        for col in MONTH_COLUMNS & set(data.columns):
+            data[col] = month_strings(data[col])
+    return data
+
+
+def write_processed(df: pd.DataFrame, csv_path, columnar: bool = False, **to_csv):
+    """
+    Write a processed CSV and, when asked or already present, its .arrow copy.
+
+    An existing copy is rewritten so it never goes stale; reading it instead of
+    the CSV stays an explicit choice (see read_processed).
+    """
+    df.to_csv(csv_path, index=False, **to_csv)
+    if columnar or columnar_path(csv_path).exists():
+        write_columnar(df, columnar_path(csv_path))
+
+
+def read_processed(csv_path, columnar: bool = False) -> pd.DataFrame:
+    """
+    Read a processed table from its CSV, or with columnar=True from its .arrow
+    copy when one is present.
+
+    The copy holds float32 measures, so it is opt-in: a stage that computes on
+    the values must not switch precision because an ignored file exists. Month
+    columns of the .arrow copy are turned into "YYYY-MM" strings, so callers
+    that key on Periods or Date work with either format.
+    """
+    path = columnar_path(csv_path)
+    if columnar and path.exists():
+        return read_columnar(path, month_format="str")
+    return pd.read_csv(csv_path, float_precision="round_trip")
+
+
+def main():
+    for csv_path in sorted(PROCESSED.glob("*.csv")):
+        data = pd.read_csv(csv_path, float_precision="round_trip")
+        write_columnar(data, columnar_path(csv_path))
+        print(f"Saved {columnar_path(csv_path).name}")
+
+
+if __name__ == "__main__":
+    main()
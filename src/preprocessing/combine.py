@@ -1,90 +1,193 @@
 # %%
-import pandas as pd
+import argparse
+from pathlib import Path
+
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
+import pandas as pd
 
-# %%
-sales_data = pd.read_csv("./sales_data_transformed.csv")
-sales_data["year_month"] = pd.to_datetime(sales_data["Periods"], format="%Y-%m")
-sales_data = sales_data[sales_data["year_month"] >= "2019-01"]
-sales_data = sales_data[sales_data["year_month"] <= "2025-03"]
+START_MONTH = "2019-01"
+END_MONTH = "2025-03"
 
-# %%
-precipitation_data = pd.read_csv("./monthly_national_avg_rainfall.csv")
-precipitation_data["year_month"] = pd.to_datetime(precipitation_data["year_month"], format="%Y-%m")
-precipitation_data = precipitation_data[precipitation_data["year_month"] >= "2019-01"]
-precipitation_data = precipitation_data[precipitation_data["year_month"] <= "2025-03"]
+# Normalize temperature to create a "comfort" score (higher = more comfortable)
+# Define the parameters
+IDEAL_TEMP = 23  # degrees Celsius
+SPREAD = 5  # standard deviation
+
+# Weights of the temperature, precipitation and wind comfort scores
+SCORE_WEIGHTS = {
+    "temp_comfort_score": 0.5,
+    "precip_comfort_score": 0.3,
+    "wind_comfort_score": 0.2,
+}
 
-# %%
-wind_data = pd.read_csv("./monthly_national_avg_wind_speed.csv")
-wind_data["year_month"] = pd.to_datetime(wind_data["year_month"], format="%Y-%m")
-wind_data = wind_data[wind_data["year_month"] >= "2019-01"]
-wind_data = wind_data[wind_data["year_month"] <= "2025-03"]
 
 # %%
-temperature_data = pd.read_csv("./monthly_national_avg_temperature_formatted.csv")
-temperature_data["year_month"] = pd.to_datetime(temperature_data["year_month"], format="%Y-%m")
-temperature_data = temperature_data[temperature_data["year_month"] >= "2019-01"]
-temperature_data = temperature_data[temperature_data["year_month"] <= "2025-03"]
+def _columnar():
+    try:
+        from . import columnar
+    except ImportError:  # run as a script from the processed_data folder
+        import columnar
+    return columnar
 
 
-# %%
-search_data = pd.read_csv("./average_search_data_per_category.csv")
-search_data["year_month"] = pd.to_datetime(search_data["Date"], format="%Y-%m")
-search_data = search_data[search_data["year_month"] >= "2019-01"]
-search_data = search_data[search_data["year_month"] <= "2025-03"]
+def read_monthly(path, date_col="year_month", start=START_MONTH, end=END_MONTH):
+    """
+    Read a monthly CSV (or its .arrow copy) and keep the months between start and end.
+
+    Parameters:
+        path (str): CSV file with a YYYY-MM column, or an .arrow file with an
+            int32 YYYYMM column.
+        date_col (str): Name of the YYYY-MM column.
+
+    Returns:
+        pd.DataFrame: The rows in range, with a datetime "year_month" column.
+    """
+    if Path(path).suffix == ".arrow":
+        columnar = _columnar()
+        data = columnar.read_columnar(path)
+        keys = data[date_col].to_numpy()
+        data[date_col] = columnar.month_strings(keys)
+        data["year_month"] = columnar.month_dates(keys).to_numpy()
+    else:
+        data = pd.read_csv(path)
+        data["year_month"] = pd.to_datetime(data[date_col], format="%Y-%m")
+    data = data[data["year_month"] >= start]
+    data = data[data["year_month"] <= end]
+    return data
+
 
 # %%
-# Normalize temperature to create a "comfort" score (higher = more comfortable)
-# Define the parameters
-ideal_temp = 23  # degrees Celsius
-spread = 5       # standard deviation
-
-# Apply Gaussian comfort curve
-temperature_scores = temperature_data[["year_month", "temperature"]].copy()
-temperature_scores["temp_comfort_score"] = (
-    np.exp(-((temperature_scores["temperature"] - ideal_temp) ** 2) / (2 * spread ** 2))) * 10
-
-comfort_temp_data = temperature_scores[["year_month", "temp_comfort_score"]]
-
-# Normalize precipitation inversely to create a "comfort" score (higher = more comfortable)
-precip_scores = precipitation_data[["year_month", precipitation_data.columns[1]]].copy()
-precip_col = "rainfall"
-# Inverse normalization: higher precipitation = lower comfort
-precip_scaler = MinMaxScaler()
-precip_scores["precip_comfort_score"] = (1 - precip_scaler.fit_transform(precip_scores[[precip_col]])) * 10
-comfort_precip_data = precip_scores[["year_month", "precip_comfort_score"]]
-
-# Normalize wind speed inversely to create a "comfort" score (higher = more comfortable)
-wind_scores = wind_data[["year_month", wind_data.columns[1]]].copy()
-wind_col = "wind_speed"
-# Inverse normalization: higher wind speed = lower comfort
-wind_scaler = MinMaxScaler()
-wind_scores["wind_comfort_score"] = (1 - wind_scaler.fit_transform(wind_scores[[wind_col]])) * 10
-comfort_wind_data = wind_scores[["year_month", "wind_comfort_score"]]
-
-# Combine comfort scores into a single DataFrame. Give weights to each score.
-weather_score = comfort_temp_data.merge(comfort_precip_data, on="year_month").merge(comfort_wind_data, on="year_month")
-weather_score["overall_weather_score"] = (
-    0.5 * weather_score["temp_comfort_score"] +
-    0.3 * weather_score["precip_comfort_score"] +
-    0.2 * weather_score["wind_comfort_score"]
-)
+def inverse_min_max_score(values):
+    """
+    Inverse min-max normalization to 0-10: the lowest value scores 10.
+
+    Same arithmetic as sklearn's MinMaxScaler, so scores match earlier runs.
+    """
+    values = np.asarray(values, dtype=float)
+    data_range = np.nanmax(values) - np.nanmin(values)
+    scale = 1.0 / data_range if data_range != 0 else 1.0
+    return (1 - (values * scale - np.nanmin(values) * scale)) * 10
+
+
+def weather_scores(temperature_data, precipitation_data, wind_data):
+    """
+    Combine temperature, precipitation and wind into comfort scores.
+
+    Parameters:
+        temperature_data (pd.DataFrame): year_month and temperature columns.
+        precipitation_data (pd.DataFrame): year_month and rainfall columns.
+        wind_data (pd.DataFrame): year_month and wind_speed columns.
+
+    Returns:
+        pd.DataFrame: year_month, the three comfort scores and overall_weather_score.
+    """
+    # Apply Gaussian comfort curve
+    temperature_scores = temperature_data[["year_month", "temperature"]].copy()
+    temperature_scores["temp_comfort_score"] = (
+        np.exp(
+            -((temperature_scores["temperature"] - IDEAL_TEMP) ** 2)
+            / (2 * SPREAD**2)
+        )
+    ) * 10
+    comfort_temp_data = temperature_scores[["year_month", "temp_comfort_score"]]
+
+    # Inverse normalization: higher precipitation = lower comfort
+    precip_scores = precipitation_data[["year_month", "rainfall"]].copy()
+    precip_scores["precip_comfort_score"] = inverse_min_max_score(
+        precip_scores["rainfall"]
+    )
+    comfort_precip_data = precip_scores[["year_month", "precip_comfort_score"]]
+
+    # Inverse normalization: higher wind speed = lower comfort
+    wind_scores = wind_data[["year_month", "wind_speed"]].copy()
+    wind_scores["wind_comfort_score"] = inverse_min_max_score(
+        wind_scores["wind_speed"]
+    )
+    comfort_wind_data = wind_scores[["year_month", "wind_comfort_score"]]
+
+    # Combine comfort scores into a single DataFrame. Give weights to each score.
+    weather_score = comfort_temp_data.merge(
+        comfort_precip_data, on="year_month"
+    ).merge(comfort_wind_data, on="year_month")
+    weather_score["overall_weather_score"] = sum(
+        weight * weather_score[col] for col, weight in SCORE_WEIGHTS.items()
+    )
+    return weather_score
 
 
 # %%
-combined_data = sales_data.merge(precipitation_data, on="year_month", how="left")
-combined_data = combined_data.merge(wind_data, on="year_month", how="left")
-combined_data = combined_data.merge(temperature_data, on="year_month", how="left")
-combined_data = combined_data.merge(search_data, on="year_month", how="left")
-combined_data = combined_data.rename(columns={
-    "avg_precipitation": "precipitation",
-    "avg_wind_speed": "wind_speed",
-    "avg_temperature": "temperature"
-})
-combined_data.reset_index(drop=False, inplace=True)
-combined_data = combined_data.rename(columns={"index": "id"})
-combined_data = combined_data.merge(weather_score[["year_month", "overall_weather_score"]], on="year_month", how="left")
+def combine(
+    sales_data,
+    precipitation_data,
+    wind_data,
+    temperature_data,
+    search_data,
+    weather_score=None,
+):
+    """
+    Merge the monthly sales, weather and search tables into one row per month.
+
+    Parameters:
+        weather_score (pd.DataFrame): Output of weather_scores, computed from the
+            weather tables when None.
+
+    Returns:
+        pd.DataFrame: The layout of combined_data_without_index.csv.
+    """
+    if weather_score is None:
+        weather_score = weather_scores(temperature_data, precipitation_data, wind_data)
+
+    combined_data = sales_data.merge(precipitation_data, on="year_month", how="left")
+    combined_data = combined_data.merge(wind_data, on="year_month", how="left")
+    combined_data = combined_data.merge(temperature_data, on="year_month", how="left")
+    combined_data = combined_data.merge(search_data, on="year_month", how="left")
+    combined_data = combined_data.rename(
+        columns={
+            "avg_precipitation": "precipitation",
+            "avg_wind_speed": "wind_speed",
+            "avg_temperature": "temperature",
+        }
+    )
+    combined_data.reset_index(drop=False, inplace=True)
+    combined_data = combined_data.rename(columns={"index": "id"})
+    combined_data = combined_data.merge(
+        weather_score[["year_month", "overall_weather_score"]],
+        on="year_month",
+        how="left",
+    )
+    return combined_data
+
 
 # %%
-combined_data.to_csv("./combined_data_without_index.csv", index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Combine the processed tables.")
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="read the .arrow copies of the inputs where present and also write "
+        "combined_data_without_index.arrow",
+    )
+    args = parser.parse_args()
+
+    def source(name):
+        path = Path(name)
+        if args.columnar and path.with_suffix(".arrow").exists():
+            return path.with_suffix(".arrow")
+        return path
+
+    sales_data = read_monthly(source("./sales_data_transformed.csv"), "Periods")
+    precipitation_data = read_monthly(source("./monthly_national_avg_rainfall.csv"))
+    wind_data = read_monthly(source("./monthly_national_avg_wind_speed.csv"))
+    temperature_data = read_monthly(
+        source("./monthly_national_avg_temperature_formatted.csv")
+    )
+    search_data = read_monthly(
+        source("./average_search_data_per_category.csv"), "Date"
+    )
+
+    combined_data = combine(
+        sales_data, precipitation_data, wind_data, temperature_data, search_data
+    )
+    _columnar().write_processed(
+        combined_data, "./combined_data_without_index.csv", columnar=args.columnar
+    )
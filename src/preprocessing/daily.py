@@ -0,0 +1,135 @@
+"""
+Daily national weather with weekly and monthly rollups.
+
+The KNMI files are daily per station, but knmi.py folds them into monthly means
+for combine.py. This module keeps the days: the national value of a variable on
+a day is the mean over the stations that reported it, in physical units (mm of
+rain, m/s and °C, the raw files hold tenths). Weeks (Monday to Sunday) and
+calendar months are rolled up from those days ahead of time, so the graph can
+answer week and month queries without aggregating every Day node in a window.
+
+The monthly rollup is in physical units and therefore differs in scale from
+the monthly_national_avg_* tables, which reproduce the notebooks.
+
+Usage: python -m src.preprocessing.daily [--workers N]
+"""
+
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    from .columnar import write_processed
+    from .knmi import (
+        LOWER_BOUNDS,
+        VARIABLES,
+        KnmiTotals,
+        aggregate_files,
+        raw_files,
+    )
+except ImportError:  # imported as a plain module from the notebooks
+    from columnar import write_processed
+    from knmi import LOWER_BOUNDS, VARIABLES, KnmiTotals, aggregate_files, raw_files
+
+PATH = Path(__file__).parent.parent.parent
+PROCESSED = PATH / "processed_data"
+DAILY_PATH = PROCESSED / "daily_national_weather.csv"
+WEEKLY_PATH = PROCESSED / "daily_national_weather_weekly.csv"
+MONTHLY_PATH = PROCESSED / "daily_national_weather_monthly.csv"
+ROLLUP_PATHS = {"weekly": WEEKLY_PATH, "monthly": MONTHLY_PATH}
+
+# Raw KNMI values are tenths of mm, m/s and °C
+DAILY_FACTOR = 0.1
+
+# Rollup name -> resample arguments; periods are labelled by their first day
+ROLLUPS = {
+    "weekly": {"rule": "W-MON", "label": "left", "closed": "left"},
+    "monthly": {"rule": "MS"},
+}
+
+
+def daily_values(totals: KnmiTotals, variable: str) -> pd.Series:
+    """Mean over the reporting stations per day, indexed by date."""
+    day = totals.day
+    values = day["sum"] * DAILY_FACTOR / day["count"]
+    values.index = pd.to_datetime(day.index.astype(int).astype(str), format="%Y%m%d")
+    return values.rename(variable)
+
+
+def daily_weather(paths: dict | None = None, workers: int | None = 1) -> pd.DataFrame:
+    """
+    National weather per day from the raw KNMI files.
+
+    Parameters:
+        paths (dict): {variable: files to read}, all files of every variable if None.
+        workers (int): Processes to parse the files of a variable in.
+
+    Returns:
+        pd.DataFrame: date ("YYYY-MM-DD") and one column per variable, NaN on days
+        without any valid measurement of that variable.
+    """
+    if paths is None:
+        paths = {variable: raw_files(variable) for variable in VARIABLES}
+    table = pd.concat(
+        [
+            daily_values(
+                aggregate_files(
+                    files, workers=workers, lower=LOWER_BOUNDS.get(variable)
+                ),
+                variable,
+            )
+            for variable, files in paths.items()
+        ],
+        axis=1,
+    ).sort_index()
+    return _with_date_column(table)
+
+
+def _with_date_column(table: pd.DataFrame) -> pd.DataFrame:
+    table.index = pd.Index(table.index.strftime("%Y-%m-%d"), name="date")
+    return table.reset_index()
+
+
+def rollup(daily: pd.DataFrame, period: str) -> pd.DataFrame:
+    """
+    Roll daily national weather up into weeks or months.
+
+    Parameters:
+        daily (pd.DataFrame): Output of daily_weather.
+        period (str): Key of ROLLUPS.
+
+    Returns:
+        pd.DataFrame: date (first day of the period), days (days in the daily
+        table), the mean per day of every variable and rainfall_total, the sum
+        of the daily rainfall.
+    """
+    values = daily.set_index(pd.to_datetime(daily["date"])).drop(columns="date")
+    periods = values.resample(**ROLLUPS[period])
+    table = periods.mean()
+    table.insert(0, "days", periods.size())
+    if "rainfall" in values:
+        table["rainfall_total"] = periods["rainfall"].sum(min_count=1)
+    return _with_date_column(table[table["days"] > 0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Daily national KNMI weather.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="processes to parse files in (default: every core, 1 = serial)",
+    )
+    args = parser.parse_args()
+
+    daily = daily_weather(workers=args.workers)
+    write_processed(daily, DAILY_PATH)
+    print(f"Saved {len(daily)} days to: {DAILY_PATH}")
+    for period, path in ROLLUP_PATHS.items():
+        write_processed(rollup(daily, period), path)
+        print(f"Saved rollup to: {path}")
+
+
+if __name__ == "__main__":
+    main()
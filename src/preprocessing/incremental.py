@@ -0,0 +1,436 @@
+"""
+Incremental month-append ingestion.
+
+Instead of rerunning every preprocessing notebook, combine.py and the full graph
+load, this compares the raw KNMI, CBS and Google Trends inputs with the state of
+the previous run (processed_data/ingest_state.json) and only redoes the months
+whose raw rows changed:
+
+1. Files whose SHA-256 is unchanged are not parsed at all; their per-month
+   content hashes and partial aggregates are reused from the state file.
+2. Changed files are split per YYYY-MM and each month's rows are hashed, so a
+   new or corrected month is detected even inside a multi-year file.
+3. The monthly aggregates of the changed months are rebuilt from the stored
+   partial sums and upserted into the processed_data CSVs.
+4. Comfort scores are recomputed (precipitation and wind are min-max scaled over
+   the whole history, so a new extreme can move older scores too) and every
+   month whose row or score changed is upserted into the graph.
+
+The first run has no state and therefore processes every month once.
+
+Usage: python -m src.preprocessing.incremental [--dry-run] [--no-graph]
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .columnar import write_processed
+from .combine import START_MONTH, weather_scores
+from .knmi import VARIABLES, KnmiTotals, iter_chunks, raw_files, summarize
+
+PATH = Path(__file__).parent.parent.parent
+PROCESSED = PATH / "processed_data"
+STATE_PATH = PROCESSED / "ingest_state.json"
+COMBINED_PATH = PROCESSED / "combined_data_without_index.csv"
+
+SALES_PATH = PATH / "raw_sales_data" / "sales_data_2.csv"
+SALES_SECTORS = {
+    "900049": "Retail trade",
+    "900058": "Multi-channel",
+    "382600": "Retail sale via internet",
+    "B000625": "Retail sale of food and drugstore items",
+    "B000626": "Retail sale of consumer electronics",
+    "B000627": "Retail sale of clothes and fashion items",
+    "B000628": "Retail sale of other non-food",
+}
+
+TRENDS_PATH = PATH / "raw_google_trends_data"
+AVERAGE_SEARCH_PATH = PROCESSED / "average_search_data_per_category.csv"
+
+
+def _file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _month_hashes(months: dict) -> dict:
+    """Replace each month's list of raw lines with a digest of those lines."""
+    return {
+        month: {
+            "hash": hashlib.sha1("\n".join(lines).encode()).hexdigest(),
+            "data": data,
+        }
+        for month, (lines, data) in months.items()
+    }
+
+
+def parse_knmi_months(path: Path) -> dict:
+    """
+    Split a KNMI station file per month.
+
+    Returns:
+        dict: {"YYYY-MM": {"hash": digest of the month's rows, "data":
+        {"YYYYMMDD": [sum, count]}}} with the raw (unscaled) values summed over
+        all stations per day.
+    """
+    digests = {}
+    days = {}
+    for chunk in iter_chunks(path):
+        for year_month, rows in chunk.groupby("year_month", sort=False):
+            month = f"{year_month // 100:04d}-{year_month % 100:02d}"
+            digest = digests.setdefault(month, hashlib.sha1())
+            digest.update(rows[["station", "date"]].to_numpy().tobytes())
+            digest.update(rows["value"].to_numpy().tobytes())
+            month_days = days.setdefault(month, {})
+            daily = rows.groupby("date")["value"].agg(["sum", "count"])
+            for day, total, count in daily.itertuples():
+                day_total = month_days.setdefault(str(day), [0, 0])
+                day_total[0] += int(total)
+                day_total[1] += int(count)
+    return {
+        month: {"hash": digest.hexdigest(), "data": days[month]}
+        for month, digest in digests.items()
+    }
+
+
+def parse_sales_months(path: Path) -> dict:
+    """
+    Split the CBS turnover file per month.
+
+    Returns:
+        dict: {"YYYY-MM": (raw lines, {sector name: value or None})}.
+    """
+    months = {}
+    with open(path, encoding="utf-8-sig") as f:
+        next(f)
+        for line in f:
+            fields = [field.strip().strip('"').strip() for field in line.split(";")]
+            if len(fields) < 4 or "MM" not in fields[2]:
+                continue
+            sector, period, value = fields[1], fields[2], fields[3]
+            month = period.replace("MM", "-")
+            lines, values = months.setdefault(month, ([], {}))
+            lines.append(line.strip())
+            values[SALES_SECTORS.get(sector, sector)] = (
+                None if value in ("", ".") else float(value)
+            )
+    return _month_hashes(months)
+
+
+def parse_trends_months(path: Path) -> dict:
+    """
+    Split a Google Trends export (two header lines, then "YYYY-MM,value") per month.
+
+    Returns:
+        dict: {"YYYY-MM": ([raw line], value)}.
+    """
+    months = {}
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()[3:]
+    for line in lines:
+        if not line.strip():
+            continue
+        date, value = line.rsplit(",", 1)
+        value = value.strip()
+        # Google Trends reports interest below 1 as "<1"
+        if value == "<1":
+            value = "0"
+        value = float(value) if "." in value else int(value)
+        months[date[:7]] = ([line.strip()], value)
+    return _month_hashes(months)
+
+
+def raw_sources() -> dict:
+    """Map every raw input file (relative to the repository) to its month parser."""
+    sources = {}
+    for variable in VARIABLES:
+        for path in raw_files(variable):
+            sources[path.relative_to(PATH).as_posix()] = parse_knmi_months
+    sources[SALES_PATH.relative_to(PATH).as_posix()] = parse_sales_months
+    for path in sorted(TRENDS_PATH.glob("*/*.csv")):
+        sources[path.relative_to(PATH).as_posix()] = parse_trends_months
+    return sources
+
+
+def load_state(path: Path = STATE_PATH) -> dict:
+    if not path.exists():
+        return {"files": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state: dict, path: Path = STATE_PATH):
+    with open(path, "w") as f:
+        json.dump(state, f)
+
+
+def scan(state: dict) -> tuple[dict, set]:
+    """
+    Hash the raw inputs and find the months that differ from the previous run.
+
+    Returns:
+        tuple: The new file state and the set of changed "YYYY-MM" months.
+    """
+    old_files = state.get("files", {})
+    files = {}
+    changed = set()
+    for name, parser in raw_sources().items():
+        sha = _file_hash(PATH / name)
+        old = old_files.get(name)
+        if old is not None and old["sha256"] == sha:
+            files[name] = old
+            continue
+        months = parser(PATH / name)
+        old_months = old["months"] if old is not None else {}
+        for month in set(months) | set(old_months):
+            if month not in months or month not in old_months:
+                changed.add(month)
+            elif months[month]["hash"] != old_months[month]["hash"]:
+                changed.add(month)
+        files[name] = {"sha256": sha, "months": months}
+    for name in set(old_files) - set(files):
+        changed.update(old_files[name]["months"])
+    return {"files": files}, changed
+
+
+def _files_under(files: dict, prefix: str) -> dict:
+    return {name: f for name, f in files.items() if name.startswith(prefix)}
+
+
+def weather_aggregates(files: dict, variable: str, months: set) -> dict:
+    """Monthly national average of one weather variable for the given months."""
+    folder = VARIABLES[variable][0]
+    totals = KnmiTotals()
+    for f in _files_under(files, f"raw_weather_data/{folder}/").values():
+        partial = KnmiTotals()
+        partial.day = pd.DataFrame(
+            [
+                (int(day), total, count)
+                for month in months & f["months"].keys()
+                for day, (total, count) in f["months"][month]["data"].items()
+            ],
+            columns=["date", "sum", "count"],
+            dtype="float64",
+        ).set_index("date")
+        totals.merge(partial)
+    if totals.day.empty:
+        return {}
+    monthly = summarize(totals, variable)
+    return dict(zip(monthly["year_month"], monthly[variable]))
+
+
+def trends_aggregates(files: dict, months: set) -> dict:
+    """
+    Per-product values and category averages of the Google Trends exports.
+
+    Returns:
+        dict: {category: {month: {product: value, ..., "Average": value}}} for the
+        given months in which every product of the category has a value.
+    """
+    categories = {}
+    for name, f in _files_under(files, "raw_google_trends_data/").items():
+        path = Path(name)
+        categories.setdefault(path.parent.name, {})[path.stem] = f["months"]
+    result = {}
+    for category, products in categories.items():
+        rows = {}
+        for month in sorted(months):
+            if all(month in product for product in products.values()):
+                row = {
+                    product: product_months[month]["data"]
+                    for product, product_months in sorted(products.items())
+                }
+                row["Average"] = sum(row.values()) / len(row)
+                rows[month] = row
+        result[category] = rows
+    return result
+
+
+def sales_aggregates(files: dict, months: set) -> dict:
+    f = files[SALES_PATH.relative_to(PATH).as_posix()]
+    return {
+        month: f["months"][month]["data"] for month in months & f["months"].keys()
+    }
+
+
+def upsert_csv(path: Path, key: str, rows: dict) -> tuple[pd.DataFrame, set]:
+    """
+    Replace or append rows of a processed CSV by key and keep it sorted.
+
+    Rows whose numbers only differ from the stored ones by float rounding are
+    left as they are, so rebuilding an unchanged month is a no-op.
+
+    Parameters:
+        path (Path): CSV to update; created when it does not exist yet.
+        key (str): Column holding the YYYY-MM month.
+        rows (dict): {month: {column: value}} of the rows to write.
+
+    Returns:
+        tuple: The updated table and the set of months that actually changed.
+    """
+    if path.exists():
+        data = pd.read_csv(path, float_precision="round_trip")
+    else:
+        data = pd.DataFrame(columns=[key])
+    existing = data.set_index(key)
+    changed = set()
+    for month, row in rows.items():
+        if month in existing.index:
+            old = existing.loc[month]
+            if all(
+                col in old.index and _same(old[col], value)
+                for col, value in row.items()
+            ):
+                continue
+        changed.add(month)
+    if changed:
+        update = pd.DataFrame.from_dict(
+            {month: rows[month] for month in changed}, orient="index"
+        )
+        update.index.name = key
+        update = update.reset_index()
+        data = pd.concat(
+            [data[~data[key].isin(update[key])], update], ignore_index=True
+        )
+        data = data.sort_values(key, ignore_index=True)
+    return data, changed
+
+
+def _same(old, new) -> bool:
+    if pd.isna(old) or new is None or pd.isna(new):
+        return pd.isna(old) and (new is None or pd.isna(new))
+    if isinstance(new, str):
+        return str(old) == new
+    return abs(float(old) - float(new)) <= 1e-12 * max(1.0, abs(float(new)))
+
+
+def write_csv(path: Path, data: pd.DataFrame):
+    """
+    Write a processed CSV, keeping the line endings of the existing file.
+
+    An existing .arrow copy of the table is refreshed as well.
+    """
+    crlf = path.exists() and b"\r\n" in path.read_bytes()
+    write_processed(data, path, lineterminator="\r\n" if crlf else "\n")
+
+
+def run(dry_run: bool = False, load_graph: bool = True) -> set:
+    """
+    Run one incremental refresh.
+
+    Returns:
+        set: The months that were upserted into the graph.
+    """
+    state = load_state()
+    new_state, changed = scan(state)
+    if not changed:
+        print("Raw inputs unchanged, nothing to do.")
+        return set()
+    print(f"Changed months: {', '.join(sorted(changed))}")
+    if dry_run:
+        return changed
+
+    files = new_state["files"]
+    writes = {}
+
+    weather = {}
+    for variable, (_, _, csv_name, _) in VARIABLES.items():
+        values = weather_aggregates(files, variable, changed)
+        weather[variable] = values
+        data, upserted = upsert_csv(
+            PROCESSED / csv_name,
+            "year_month",
+            {month: {variable: value} for month, value in values.items()},
+        )
+        if upserted:
+            writes[PROCESSED / csv_name] = data
+
+    categories = trends_aggregates(files, changed)
+    averages = {}
+    for category, rows in categories.items():
+        path = PROCESSED / f"combined_{category}.csv"
+        data, upserted = upsert_csv(path, "Date", rows)
+        if upserted:
+            writes[path] = data
+        for month, row in rows.items():
+            averages.setdefault(month, {})[category] = row["Average"]
+    data, upserted = upsert_csv(AVERAGE_SEARCH_PATH, "Date", averages)
+    if upserted:
+        writes[AVERAGE_SEARCH_PATH] = data
+
+    sales = sales_aggregates(files, changed)
+    combined = pd.read_csv(COMBINED_PATH, float_precision="round_trip")
+    old_scores = combined.set_index("Periods")["overall_weather_score"]
+    ids = dict(zip(combined["Periods"], combined["id"]))
+    next_id = int(combined["id"].max()) + 1 if len(combined) else 0
+    combined_rows = {}
+    for month in sorted(m for m in sales if m >= START_MONTH):
+        if month not in ids:
+            ids[month] = next_id
+            next_id += 1
+        row = {"id": ids[month]}
+        row.update(sorted(sales[month].items()))
+        row["year_month"] = f"{month}-01"
+        for variable in VARIABLES:
+            row[variable] = weather[variable].get(month)
+        row["Date"] = month
+        row.update(averages.get(month, {}))
+        combined_rows[month] = row
+    combined, upserted = upsert_csv(COMBINED_PATH, "Periods", combined_rows)
+
+    scores = weather_scores(
+        combined[["year_month", "temperature"]],
+        combined[["year_month", "rainfall"]],
+        combined[["year_month", "wind_speed"]],
+    )
+    new_scores = scores["overall_weather_score"].to_numpy()
+    moved = ~np.isclose(
+        new_scores,
+        old_scores.reindex(combined["Periods"]).to_numpy(),
+        rtol=1e-12,
+        atol=0,
+        equal_nan=True,
+    )
+    combined.loc[moved, "overall_weather_score"] = new_scores[moved]
+    affected = upserted | set(combined.loc[moved, "Periods"])
+    if affected:
+        writes[COMBINED_PATH] = combined
+
+    for path, data in writes.items():
+        write_csv(path, data)
+
+    if load_graph and affected:
+        from ..web.database import driver
+        from ..web.loader import load_rows, rows_from_frame
+
+        stats = load_rows(
+            driver, rows_from_frame(combined[combined["Periods"].isin(affected)])
+        )
+        print(
+            f"Upserted {stats['rows']} months into the graph "
+            f"({stats['rows_per_second']:.0f} rows/s)"
+        )
+    save_state(new_state)
+    return affected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only report the changed months"
+    )
+    parser.add_argument(
+        "--no-graph",
+        action="store_true",
+        help="update processed_data but do not write to Neo4j",
+    )
+    args = parser.parse_args()
+    run(dry_run=args.dry_run, load_graph=not args.no_graph)
+
+
+if __name__ == "__main__":
+    main()
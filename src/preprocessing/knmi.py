@@ -0,0 +1,289 @@
+"""
+Streaming parser for KNMI daily station files.
+
+The files look like
+
+    # STN,YYYYMMDD,   FG
+      209,20190101,  108
+
+with a long "#" comment header and blank values for missing measurements. The
+parser reads them in fixed-size chunks and folds every chunk into running sums
+and counts per day and per (month, station), so memory depends on the number of
+days and stations, not on the size of the files. Months are derived with integer
+arithmetic on the YYYYMMDD field (YYYYMM = YYYYMMDD // 100).
+
+Files are independent, so several of them can be parsed in a process pool. The
+partial totals are always merged in file order, which keeps the output identical
+to a serial run.
+
+Usage: python -m src.preprocessing.knmi [--workers N] [--chunksize N]
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .columnar import write_processed
+except ImportError:  # imported as a plain module from the notebooks
+    from columnar import write_processed
+
+PATH = Path(__file__).parent.parent.parent
+RAW_WEATHER = PATH / "raw_weather_data"
+PROCESSED = PATH / "processed_data"
+
+CHUNKSIZE = 100_000
+
+# variable -> (raw folder, file pattern, processed CSV, factor applied to raw values)
+# The factors reproduce the existing processed_data files.
+VARIABLES = {
+    "rainfall": (
+        "precipitation",
+        "rainfall*.txt",
+        "monthly_national_avg_rainfall.csv",
+        10.0,
+    ),
+    "wind_speed": (
+        "wind_speed",
+        "wind_speed_result_*.txt",
+        "monthly_national_avg_wind_speed.csv",
+        10.0,
+    ),
+    "temperature": (
+        "temperature",
+        "temperature*.txt",
+        "monthly_national_avg_temperature_formatted.csv",
+        0.1,
+    ),
+}
+
+# Lower bound per reading for the tables in physical units (daily.py,
+# stations.py): RH is -1 for less than 0.05 mm, which counts as dry rather than
+# as a negative amount in the station mean. The monthly_national_avg_* tables
+# keep the raw values, as the notebooks do.
+LOWER_BOUNDS = {"rainfall": 0}
+
+
+def iter_chunks(path, chunksize: int = CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """
+    Stream a KNMI station file as DataFrames of at most `chunksize` rows.
+
+    Parameters:
+        path (str): KNMI file with STN,YYYYMMDD,VALUE rows.
+        chunksize (int): Number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: int32 station, date (YYYYMMDD) and year_month (YYYYMM)
+        columns and a float64 value column with NaN for missing measurements.
+    """
+    reader = pd.read_csv(
+        path,
+        comment="#",
+        header=None,
+        names=["station", "date", "value"],
+        usecols=[0, 1, 2],
+        dtype={"station": np.int32, "date": np.int32},
+        skipinitialspace=True,
+        na_values=[" ", "", "NaN"],
+        encoding="latin-1",
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        chunk["value"] = pd.to_numeric(chunk["value"], errors="coerce")
+        chunk["year_month"] = (chunk["date"] // 100).astype(np.int32)
+        yield chunk
+
+
+class KnmiTotals:
+    """
+    Running sums and counts of valid measurements per day and per month/station.
+
+    Parameters:
+        lower (float): Raise every reading below this value to it before it is
+            summed (None keeps the raw values, as the notebooks do).
+    """
+
+    def __init__(self, lower: float | None = None):
+        self.lower = lower
+        self.day = pd.DataFrame(columns=["sum", "count"], dtype="float64")
+        self.station_month = pd.DataFrame(columns=["sum", "count"], dtype="float64")
+
+    @staticmethod
+    def _fold(totals: pd.DataFrame, update: pd.DataFrame) -> pd.DataFrame:
+        if totals.empty:
+            return update
+        return totals.add(update, fill_value=0)
+
+    def add(self, chunk: pd.DataFrame):
+        valid = chunk.dropna(subset=["value"])
+        if self.lower is not None:
+            valid = valid.assign(value=valid["value"].clip(lower=self.lower))
+        self.day = self._fold(
+            self.day, valid.groupby("date")["value"].agg(["sum", "count"])
+        )
+        self.station_month = self._fold(
+            self.station_month,
+            valid.groupby(["year_month", "station"])["value"].agg(["sum", "count"]),
+        )
+
+    def merge(self, other: "KnmiTotals") -> "KnmiTotals":
+        self.day = self._fold(self.day, other.day)
+        self.station_month = self._fold(self.station_month, other.station_month)
+        return self
+
+    @property
+    def month(self) -> pd.DataFrame:
+        return self.day.groupby(self.day.index.astype(int) // 100).sum()
+
+
+def aggregate_file(
+    path, chunksize: int = CHUNKSIZE, lower: float | None = None
+) -> KnmiTotals:
+    totals = KnmiTotals(lower)
+    for chunk in iter_chunks(path, chunksize):
+        totals.add(chunk)
+    return totals
+
+
+def _aggregate_each(
+    paths, chunksize: int, workers: int | None, lower: float | None = None
+) -> list[KnmiTotals]:
+    """Totals of every file, in the order of `paths`, using up to `workers` processes."""
+    paths = list(paths)
+    if workers == 1 or len(paths) < 2:
+        return [aggregate_file(path, chunksize, lower) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(
+            pool.map(aggregate_file, paths, repeat(chunksize), repeat(lower))
+        )
+
+
+def aggregate_files(
+    paths,
+    chunksize: int = CHUNKSIZE,
+    workers: int | None = 1,
+    lower: float | None = None,
+) -> KnmiTotals:
+    """
+    Fold several KNMI files into one set of running totals, in the given order.
+
+    Parameters:
+        paths (list): KNMI files to read.
+        chunksize (int): Number of rows per parsed chunk.
+        workers (int): Processes to parse files in; None uses every core.
+        lower (float): Lower bound of every reading (see KnmiTotals).
+    """
+    totals = KnmiTotals(lower)
+    for partial in _aggregate_each(paths, chunksize, workers, lower):
+        totals.merge(partial)
+    return totals
+
+
+def _format_month(year_month: pd.Index) -> pd.Index:
+    year_month = year_month.astype(int)
+    return pd.Index(
+        [f"{ym // 100:04d}-{ym % 100:02d}" for ym in year_month], name="year_month"
+    )
+
+
+def monthly_mean(totals: KnmiTotals, name: str, factor: float = 1.0) -> pd.DataFrame:
+    """
+    Average of all valid station-day values per month (rainfall and wind speed).
+
+    Returns:
+        pd.DataFrame: year_month ("YYYY-MM") and `name` columns.
+    """
+    month = totals.month
+    values = month["sum"] * factor / month["count"]
+    values.index = _format_month(values.index)
+    return values.rename(name).reset_index()
+
+
+def monthly_mean_of_daily(
+    totals: KnmiTotals, name: str, factor: float = 1.0
+) -> pd.DataFrame:
+    """
+    Average over all stations per day first, then over the days (temperature).
+
+    Returns:
+        pd.DataFrame: year_month ("YYYY-MM") and `name` columns.
+    """
+    daily = totals.day["sum"] * factor / totals.day["count"]
+    values = daily.groupby(daily.index.astype(int) // 100).mean()
+    values.index = _format_month(values.index)
+    return values.rename(name).reset_index()
+
+
+def summarize(totals: KnmiTotals, variable: str) -> pd.DataFrame:
+    """Monthly national average of a variable with the method its notebook used."""
+    factor = VARIABLES[variable][3]
+    if variable == "temperature":
+        return monthly_mean_of_daily(totals, variable, factor)
+    return monthly_mean(totals, variable, factor)
+
+
+def raw_files(variable: str) -> list[Path]:
+    folder, pattern, _, _ = VARIABLES[variable]
+    return sorted((RAW_WEATHER / folder).glob(pattern))
+
+
+def monthly_weather(
+    variable: str, paths=None, chunksize: int = CHUNKSIZE, workers: int | None = 1
+) -> pd.DataFrame:
+    """
+    Monthly national average of one weather variable from the raw KNMI files.
+
+    Parameters:
+        variable (str): Key of VARIABLES.
+        paths (list): Files to read, all files of the variable if None.
+    """
+    if paths is None:
+        paths = raw_files(variable)
+    return summarize(aggregate_files(paths, chunksize, workers), variable)
+
+
+def monthly_weather_all(
+    chunksize: int = CHUNKSIZE, workers: int | None = None
+) -> dict[str, pd.DataFrame]:
+    """
+    Monthly national averages of every variable, parsing all raw files in one pool.
+
+    Returns:
+        dict: {variable: DataFrame with year_month and variable columns}.
+    """
+    files = [(variable, path) for variable in VARIABLES for path in raw_files(variable)]
+    partials = _aggregate_each([path for _, path in files], chunksize, workers)
+    totals = {variable: KnmiTotals() for variable in VARIABLES}
+    for (variable, _), partial in zip(files, partials):
+        totals[variable].merge(partial)
+    return {variable: summarize(totals[variable], variable) for variable in VARIABLES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monthly national KNMI averages.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="processes to parse files in (default: every core, 1 = serial)",
+    )
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    parser.add_argument(
+        "--columnar", action="store_true", help="also write .arrow copies"
+    )
+    args = parser.parse_args()
+
+    results = monthly_weather_all(args.chunksize, args.workers)
+    for variable, monthly_avg in results.items():
+        output_path = PROCESSED / VARIABLES[variable][2]
+        write_processed(monthly_avg, output_path, columnar=args.columnar)
+        print(f"Saved monthly averages to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
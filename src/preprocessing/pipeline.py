@@ -0,0 +1,445 @@
+"""
+Declarative, cached preprocessing pipeline.
+
+Every step from the raw files to the graph is a Stage with declared input and
+output files:
+
+    knmi_rainfall ─┐
+    knmi_wind_speed ┼─> comfort_score ─┐
+    knmi_temperature┘                  ├─> combine ─> graph_load
+    cbs_pivot ─────────────────────────┤
+    trends ─┬──────────────────────────┘
+            └─> product_graph_load
+    knmi_daily ─> daily_graph_load
+    knmi_stations ─> station_graph_load
+
+A stage depends on the stages that write its inputs. Before a stage runs, the
+contents of its inputs are hashed; when the hash equals the one recorded after
+its last successful run (processed_data/pipeline_state.json) and its outputs
+still exist, the stage is skipped. Stages whose dependencies are done run in
+parallel in a process pool, and the time of every stage is reported.
+
+Usage: python -m src.preprocessing.pipeline [--workers N] [--force] [--no-graph]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from .combine import combine, read_monthly, weather_scores
+from .incremental import (
+    AVERAGE_SEARCH_PATH,
+    COMBINED_PATH,
+    SALES_PATH,
+    parse_sales_months,
+    upsert_csv,
+    write_csv,
+)
+from . import daily, stations, trends
+from .knmi import VARIABLES, monthly_weather, raw_files
+
+PATH = Path(__file__).parent.parent.parent
+PROCESSED = PATH / "processed_data"
+STATE_PATH = PROCESSED / "pipeline_state.json"
+
+SALES_TRANSFORMED_PATH = PROCESSED / "sales_data_transformed.csv"
+WEATHER_SCORES_PATH = PROCESSED / "weather_scores.csv"
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step.
+
+    Attributes:
+        name (str): Unique stage name.
+        run (Callable): Module-level function without arguments that reads the
+            inputs and writes the outputs (it is sent to a worker process).
+        inputs (list[Path]): Files the stage reads.
+        outputs (list[Path]): Files the stage writes.
+    """
+
+    name: str
+    run: Callable[[], None]
+    inputs: list[Path]
+    outputs: list[Path] = field(default_factory=list)
+
+
+def _weather_path(variable: str) -> Path:
+    return PROCESSED / VARIABLES[variable][2]
+
+
+def write_table(path: Path, key: str, data: pd.DataFrame):
+    """
+    Upsert a stage result into its CSV by key.
+
+    As in incremental.py, rows that only differ by float rounding are kept and the
+    file is not rewritten when nothing changed, so the stages reading it stay
+    up to date.
+    """
+    table, changed = upsert_csv(path, key, data.set_index(key).to_dict("index"))
+    if changed:
+        write_csv(path, table)
+
+
+def run_knmi_rainfall():
+    write_table(_weather_path("rainfall"), "year_month", monthly_weather("rainfall"))
+
+
+def run_knmi_wind_speed():
+    write_table(
+        _weather_path("wind_speed"), "year_month", monthly_weather("wind_speed")
+    )
+
+
+def run_knmi_temperature():
+    write_table(
+        _weather_path("temperature"), "year_month", monthly_weather("temperature")
+    )
+
+
+def sales_table(path: Path = SALES_PATH) -> pd.DataFrame:
+    """Pivot the CBS turnover file to one row per month and one column per sector."""
+    months = parse_sales_months(path)
+    sales = pd.DataFrame.from_dict(
+        {month: months[month]["data"] for month in sorted(months)}, orient="index"
+    )
+    sales = sales[sorted(sales.columns)]
+    sales.index.name = "Periods"
+    return sales.reset_index()
+
+
+def run_cbs_pivot():
+    write_table(SALES_TRANSFORMED_PATH, "Periods", sales_table())
+
+
+def run_trends():
+    """Combine the Google Trends exports per category and average the categories."""
+    matrix = trends.read_exports()
+    averages = trends.category_averages(matrix)
+    for category in trends.categories():
+        write_table(
+            trends.category_path(category),
+            "Date",
+            trends.category_table(matrix, category, averages),
+        )
+    write_table(AVERAGE_SEARCH_PATH, "Date", trends.average_table(averages))
+    write_csv(trends.PRODUCTS_PATH, trends.product_table(matrix))
+
+
+def run_comfort_score():
+    scores = weather_scores(
+        read_monthly(_weather_path("temperature")),
+        read_monthly(_weather_path("rainfall")),
+        read_monthly(_weather_path("wind_speed")),
+    )
+    scores["year_month"] = scores["year_month"].dt.strftime("%Y-%m")
+    write_table(WEATHER_SCORES_PATH, "year_month", scores)
+
+
+def run_combine():
+    scores = pd.read_csv(WEATHER_SCORES_PATH, float_precision="round_trip")
+    scores["year_month"] = pd.to_datetime(scores["year_month"], format="%Y-%m")
+    combined = combine(
+        read_monthly(SALES_TRANSFORMED_PATH, "Periods"),
+        read_monthly(_weather_path("rainfall")),
+        read_monthly(_weather_path("wind_speed")),
+        read_monthly(_weather_path("temperature")),
+        read_monthly(AVERAGE_SEARCH_PATH, "Date"),
+        weather_score=scores,
+    )
+    combined["year_month"] = combined["year_month"].dt.strftime("%Y-%m-%d")
+    write_table(COMBINED_PATH, "Periods", combined)
+
+
+def run_knmi_daily():
+    """National weather per day and its weekly and monthly rollups."""
+    days = daily.daily_weather()
+    write_table(daily.DAILY_PATH, "date", days)
+    for period, path in daily.ROLLUP_PATHS.items():
+        write_table(path, "date", daily.rollup(days, period))
+
+
+def run_knmi_stations():
+    """Stations, their monthly weather and its interpolation onto regions."""
+    station_list, monthly = stations.station_weather()
+    regions = stations.regions(station_list)
+    write_csv(stations.STATIONS_PATH, station_list)
+    write_csv(stations.STATION_MONTHLY_PATH, monthly)
+    write_csv(stations.REGIONS_PATH, regions)
+    write_csv(
+        stations.REGIONAL_MONTHLY_PATH,
+        stations.regional_weather(monthly, station_list, regions),
+    )
+
+
+def run_graph_load():
+    from ..web.database import driver
+    from ..web.loader import load_rows, read_rows
+
+    stats = load_rows(driver, read_rows(COMBINED_PATH))
+    print(
+        f"Loaded {stats['rows']} rows into the graph "
+        f"({stats['rows_per_second']:.0f} rows/s)"
+    )
+
+
+def run_daily_graph_load():
+    from ..web.database import driver
+    from ..web.loader import load_daily, read_daily
+
+    stats = load_daily(driver, *read_daily())
+    print(
+        f"Loaded {stats['rows']} days and rollups into the graph "
+        f"({stats['rows_per_second']:.0f} rows/s)"
+    )
+
+
+def run_station_graph_load():
+    from ..web.database import driver
+    from ..web.loader import load_stations, read_stations
+
+    stats = load_stations(driver, *read_stations())
+    print(
+        f"Loaded {stats['rows']} station and region rows into the graph "
+        f"({stats['rows_per_second']:.0f} rows/s)"
+    )
+
+
+def run_product_graph_load():
+    from ..web.database import driver
+    from ..web.loader import load_products, read_products
+
+    stats = load_products(driver, read_products())
+    print(
+        f"Loaded {stats['rows']} product series into the graph "
+        f"({stats['rows_per_second']:.0f} rows/s)"
+    )
+
+
+def stages(load_graph: bool = True) -> list[Stage]:
+    """The preprocessing stages, from the raw files to the graph."""
+    weather_outputs = [_weather_path(variable) for variable in VARIABLES]
+    trends_outputs = [
+        trends.category_path(category) for category in trends.categories()
+    ] + [AVERAGE_SEARCH_PATH, trends.PRODUCTS_PATH]
+    daily_outputs = [daily.DAILY_PATH, *daily.ROLLUP_PATHS.values()]
+    station_outputs = [
+        stations.STATIONS_PATH,
+        stations.STATION_MONTHLY_PATH,
+        stations.REGIONS_PATH,
+        stations.REGIONAL_MONTHLY_PATH,
+    ]
+    raw_weather = [path for variable in VARIABLES for path in raw_files(variable)]
+    result = [
+        Stage(
+            "knmi_rainfall",
+            run_knmi_rainfall,
+            raw_files("rainfall"),
+            [_weather_path("rainfall")],
+        ),
+        Stage(
+            "knmi_wind_speed",
+            run_knmi_wind_speed,
+            raw_files("wind_speed"),
+            [_weather_path("wind_speed")],
+        ),
+        Stage(
+            "knmi_temperature",
+            run_knmi_temperature,
+            raw_files("temperature"),
+            [_weather_path("temperature")],
+        ),
+        Stage("cbs_pivot", run_cbs_pivot, [SALES_PATH], [SALES_TRANSFORMED_PATH]),
+        Stage("trends", run_trends, trends.export_paths(), trends_outputs),
+        Stage(
+            "comfort_score", run_comfort_score, weather_outputs, [WEATHER_SCORES_PATH]
+        ),
+        Stage(
+            "combine",
+            run_combine,
+            [
+                SALES_TRANSFORMED_PATH,
+                *weather_outputs,
+                AVERAGE_SEARCH_PATH,
+                WEATHER_SCORES_PATH,
+            ],
+            [COMBINED_PATH],
+        ),
+        Stage("knmi_daily", run_knmi_daily, raw_weather, daily_outputs),
+        Stage("knmi_stations", run_knmi_stations, raw_weather, station_outputs),
+    ]
+    if load_graph:
+        result.append(Stage("graph_load", run_graph_load, [COMBINED_PATH]))
+        result.append(Stage("daily_graph_load", run_daily_graph_load, daily_outputs))
+        result.append(
+            Stage("station_graph_load", run_station_graph_load, station_outputs)
+        )
+        result.append(
+            Stage("product_graph_load", run_product_graph_load, [trends.PRODUCTS_PATH])
+        )
+    return result
+
+
+def dependencies(all_stages: list[Stage]) -> dict[str, set[str]]:
+    """
+    Map every stage to the stages that write one of its inputs.
+
+    Raises:
+        ValueError: When two stages write the same file or the graph has a cycle.
+    """
+    writers = {}
+    for stage in all_stages:
+        for output in stage.outputs:
+            if output in writers:
+                raise ValueError(
+                    f"{output} is written by both {writers[output]} and {stage.name}."
+                )
+            writers[output] = stage.name
+    deps = {
+        stage.name: {writers[i] for i in stage.inputs if i in writers} - {stage.name}
+        for stage in all_stages
+    }
+    done = set()
+    while len(done) < len(deps):
+        ready = {name for name, d in deps.items() if name not in done and d <= done}
+        if not ready:
+            raise ValueError(f"Cycle between stages {sorted(set(deps) - done)}.")
+        done |= ready
+    return deps
+
+
+def input_hash(stage: Stage) -> str:
+    """Hash of the stage name and the names and contents of its input files."""
+    digest = hashlib.sha256(stage.name.encode())
+    for path in sorted(stage.inputs):
+        digest.update(path.relative_to(PATH).as_posix().encode())
+        digest.update(path.read_bytes() if path.exists() else b"\0missing")
+    return digest.hexdigest()
+
+
+def load_state(path: Path = STATE_PATH) -> dict:
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state: dict, path: Path = STATE_PATH):
+    with open(path, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+
+
+def _timed(run: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def run_pipeline(
+    all_stages: list[Stage],
+    workers: int | None = None,
+    force: bool = False,
+    state_path: Path = STATE_PATH,
+) -> dict[str, float | None]:
+    """
+    Run the stages in dependency order, skipping the ones that are up to date.
+
+    A stage is up to date when its input hash matches the recorded one and all
+    its outputs exist. The state is saved after every finished stage, so a failed
+    run resumes at the stage that failed.
+
+    Parameters:
+        all_stages (list[Stage]): Stages to run.
+        workers (int): Processes to run independent stages in; None uses every
+            core, 1 runs everything in this process.
+        force (bool): Rerun every stage.
+
+    Returns:
+        dict: {stage name: seconds it ran, or None when it was skipped}.
+    """
+    deps = dependencies(all_stages)
+    by_name = {stage.name: stage for stage in all_stages}
+    state = load_state(state_path)
+    timings = {}
+    pending = set(by_name)
+    running = {}
+
+    def start_ready(pool):
+        # Loop because skipping (or, without a pool, running) a stage can make
+        # further stages ready right away
+        progress = True
+        while progress:
+            progress = False
+            for name in sorted(pending):
+                if not deps[name] <= timings.keys():
+                    continue
+                pending.discard(name)
+                progress = True
+                stage = by_name[name]
+                key = input_hash(stage)
+                outputs_exist = all(path.exists() for path in stage.outputs)
+                if not force and state.get(name) == key and outputs_exist:
+                    timings[name] = None
+                    print(f"{name:<18} up to date")
+                elif pool is None:
+                    finish(name, key, _timed(stage.run))
+                else:
+                    running[pool.submit(_timed, stage.run)] = (name, key)
+
+    def finish(name, key, seconds):
+        timings[name] = seconds
+        state[name] = key
+        save_state(state, state_path)
+        print(f"{name:<18} {seconds:8.2f}s")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        start_ready(None)
+        return timings
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        start_ready(pool)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key = running.pop(future)
+                finish(name, key, future.result())
+            start_ready(pool)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="processes to run independent stages in (default: every core)",
+    )
+    parser.add_argument("--force", action="store_true", help="rerun every stage")
+    parser.add_argument(
+        "--no-graph", action="store_true", help="do not load the result into Neo4j"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    timings = run_pipeline(stages(not args.no_graph), args.workers, args.force)
+    ran = [name for name, seconds in timings.items() if seconds is not None]
+    print(
+        f"Ran {len(ran)} of {len(timings)} stages "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Per-station monthly weather and regional aggregates.
+
+Every KNMI file starts with a header listing its stations:
+
+    # STN         LON(east)   LAT(north)  ALT(m)      NAME
+    # 209         4.518       52.465      0.00        IJmond
+
+knmi.py averages all stations into one national value per month; this module
+keeps the per-station monthly means (already tracked by KnmiTotals) and the
+station coordinates, and interpolates them onto regions with inverse distance
+weighting: a region's value is the mean of the station values weighted by
+1 / distance ** power, over the stations that reported that month.
+
+Two region schemes are built: provinces (represented by their approximate
+centroids) and cells of a regular latitude/longitude grid. The weights are one
+(regions x stations) matrix per scheme, so a whole variable is interpolated with
+two matrix products. The results are written to processed_data, where the
+pipeline keeps them until the raw files change.
+
+Values use the factors of knmi.VARIABLES, so a station's monthly mean has the
+scale of the monthly_national_avg_* tables; unlike those, a rainfall trace
+(RH = -1) counts as 0 mm (knmi.LOWER_BOUNDS).
+
+Usage: python -m src.preprocessing.stations [--workers N] [--grid DEGREES] [--power P]
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .columnar import write_processed
+    from .knmi import (
+        LOWER_BOUNDS,
+        VARIABLES,
+        KnmiTotals,
+        aggregate_files,
+        raw_files,
+    )
+except ImportError:  # imported as a plain module from the notebooks
+    from columnar import write_processed
+    from knmi import LOWER_BOUNDS, VARIABLES, KnmiTotals, aggregate_files, raw_files
+
+PATH = Path(__file__).parent.parent.parent
+PROCESSED = PATH / "processed_data"
+STATIONS_PATH = PROCESSED / "knmi_stations.csv"
+STATION_MONTHLY_PATH = PROCESSED / "station_monthly_weather.csv"
+REGIONS_PATH = PROCESSED / "weather_regions.csv"
+REGIONAL_MONTHLY_PATH = PROCESSED / "regional_monthly_weather.csv"
+
+STATION_LINE = re.compile(
+    r"^#\s+(\d+)\s+(-?[\d.]+)\s+(-?[\d.]+)\s+(-?[\d.]+)\s+(.*?)\s*$"
+)
+
+# Approximate centroids (longitude, latitude) of the provinces
+PROVINCES = {
+    "Drenthe": (6.62, 52.86),
+    "Flevoland": (5.60, 52.53),
+    "Friesland": (5.80, 53.11),
+    "Gelderland": (5.87, 52.06),
+    "Groningen": (6.74, 53.22),
+    "Limburg": (5.94, 51.21),
+    "Noord-Brabant": (5.20, 51.56),
+    "Noord-Holland": (4.87, 52.58),
+    "Overijssel": (6.45, 52.44),
+    "Utrecht": (5.20, 52.08),
+    "Zeeland": (3.84, 51.49),
+    "Zuid-Holland": (4.49, 51.94),
+}
+
+# (min longitude, min latitude, max longitude, max latitude) of the grid
+GRID_BOUNDS = (3.0, 50.5, 7.5, 53.75)
+GRID_DEGREES = 0.5
+# Grid cells whose centre is further than this from every station are left out
+GRID_REACH_KM = 40.0
+
+IDW_POWER = 2.0
+# Stations closer than this count as this far, so a station on top of a region
+# centre does not get an infinite weight
+MIN_DISTANCE_KM = 1.0
+EARTH_RADIUS_KM = 6371.0
+
+
+def read_stations(path) -> pd.DataFrame:
+    """
+    Station list from the header of one KNMI file.
+
+    Returns:
+        pd.DataFrame: station, name, lon, lat and alt columns.
+    """
+    rows = []
+    with open(path, encoding="latin-1") as f:
+        for line in f:
+            if not line.startswith("#"):
+                break
+            match = STATION_LINE.match(line)
+            if match:
+                station, lon, lat, alt, name = match.groups()
+                rows.append((int(station), name, float(lon), float(lat), float(alt)))
+    return pd.DataFrame(rows, columns=["station", "name", "lon", "lat", "alt"])
+
+
+def station_list(paths) -> pd.DataFrame:
+    """Stations of all files; a station listed in several files keeps its last entry."""
+    stations = pd.concat([read_stations(path) for path in paths], ignore_index=True)
+    stations = stations.drop_duplicates("station", keep="last")
+    return stations.sort_values("station").reset_index(drop=True)
+
+
+def station_monthly(totals: KnmiTotals, variable: str) -> pd.Series:
+    """Mean of the valid values per (year_month, station)."""
+    station_month = totals.station_month
+    values = station_month["sum"] * VARIABLES[variable][3] / station_month["count"]
+    year_month = station_month.index.get_level_values("year_month").astype(int)
+    values.index = pd.MultiIndex.from_arrays(
+        [
+            [f"{ym // 100:04d}-{ym % 100:02d}" for ym in year_month],
+            station_month.index.get_level_values("station").astype(int),
+        ],
+        names=["year_month", "station"],
+    )
+    return values.rename(variable)
+
+
+def station_weather(
+    paths: dict | None = None, workers: int | None = 1
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Stations and their monthly weather from the raw KNMI files.
+
+    Parameters:
+        paths (dict): {variable: files to read}, all files of every variable if None.
+        workers (int): Processes to parse the files of a variable in.
+
+    Returns:
+        tuple: The station list (see read_stations) and a table with year_month,
+        station and one column per variable.
+    """
+    if paths is None:
+        paths = {variable: raw_files(variable) for variable in VARIABLES}
+    stations = station_list([path for files in paths.values() for path in files])
+    monthly = pd.concat(
+        [
+            station_monthly(
+                aggregate_files(
+                    files, workers=workers, lower=LOWER_BOUNDS.get(variable)
+                ),
+                variable,
+            )
+            for variable, files in paths.items()
+        ],
+        axis=1,
+    ).sort_index()
+    return stations, monthly.reset_index()
+
+
+def distances_km(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """Great-circle distances between every point 1 (rows) and point 2 (columns)."""
+    lon1, lat1 = (np.radians(np.asarray(x, dtype=float))[:, None] for x in (lon1, lat1))
+    lon2, lat2 = (np.radians(np.asarray(x, dtype=float))[None, :] for x in (lon2, lat2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def regions(
+    stations: pd.DataFrame, grid_degrees: float = GRID_DEGREES
+) -> pd.DataFrame:
+    """
+    The provinces and the grid cells within GRID_REACH_KM of a station.
+
+    Returns:
+        pd.DataFrame: region (id such as "province:Utrecht" or "grid:52.25:5.25"),
+        scheme, name, lon and lat (the point the stations are weighted towards).
+    """
+    provinces = pd.DataFrame(
+        [
+            (f"province:{name}", "province", name, lon, lat)
+            for name, (lon, lat) in PROVINCES.items()
+        ],
+        columns=["region", "scheme", "name", "lon", "lat"],
+    )
+    lon_min, lat_min, lon_max, lat_max = GRID_BOUNDS
+    lons = np.arange(lon_min + grid_degrees / 2, lon_max, grid_degrees)
+    lats = np.arange(lat_min + grid_degrees / 2, lat_max, grid_degrees)
+    lon, lat = (values.ravel() for values in np.meshgrid(lons, lats))
+    near = distances_km(lon, lat, stations["lon"], stations["lat"]).min(axis=1)
+    lon, lat = lon[near <= GRID_REACH_KM], lat[near <= GRID_REACH_KM]
+    names = [f"{y:.2f}N {x:.2f}E" for x, y in zip(lon, lat)]
+    cells = pd.DataFrame(
+        {
+            "region": [f"grid:{y:.2f}:{x:.2f}" for x, y in zip(lon, lat)],
+            "scheme": "grid",
+            "name": names,
+            "lon": lon,
+            "lat": lat,
+        }
+    )
+    return pd.concat([provinces, cells], ignore_index=True)
+
+
+def idw_weights(
+    stations: pd.DataFrame, targets: pd.DataFrame, power: float = IDW_POWER
+) -> np.ndarray:
+    """Inverse distance weights, one row per target and one column per station."""
+    distance = distances_km(
+        targets["lon"], targets["lat"], stations["lon"], stations["lat"]
+    )
+    return np.maximum(distance, MIN_DISTANCE_KM) ** -power
+
+
+def regional_weather(
+    monthly: pd.DataFrame,
+    stations: pd.DataFrame,
+    targets: pd.DataFrame,
+    power: float = IDW_POWER,
+) -> pd.DataFrame:
+    """
+    Interpolate per-station monthly weather onto regions.
+
+    Stations without coordinates are ignored. A station that did not report a
+    variable in a month is left out of that month's weights, so every region
+    value is a weighted mean of the stations that did.
+
+    Parameters:
+        monthly (pd.DataFrame): Per-station table of station_weather.
+        stations (pd.DataFrame): Station list of station_weather.
+        targets (pd.DataFrame): Regions, as returned by regions().
+
+    Returns:
+        pd.DataFrame: year_month, region and one column per variable.
+    """
+    stations = stations[stations["station"].isin(monthly["station"])]
+    weights = idw_weights(stations, targets, power)
+    variables = [col for col in monthly.columns if col not in ("year_month", "station")]
+    wide = monthly.pivot(index="year_month", columns="station", values=variables)
+    columns = {}
+    for variable in variables:
+        values = wide[variable].reindex(columns=stations["station"]).to_numpy()
+        present = ~np.isnan(values)
+        # (months x stations) @ (stations x regions)
+        weighted = np.where(present, values, 0.0) @ weights.T
+        total = present.astype(float) @ weights.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            columns[variable] = (weighted / total).ravel()
+    return pd.DataFrame(
+        {
+            "year_month": np.repeat(wide.index.to_numpy(), len(targets)),
+            "region": np.tile(targets["region"].to_numpy(), len(wide.index)),
+            **columns,
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-station and regional KNMI weather."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="processes to parse files in (default: every core, 1 = serial)",
+    )
+    parser.add_argument("--grid", type=float, default=GRID_DEGREES, help="cell size")
+    parser.add_argument("--power", type=float, default=IDW_POWER)
+    args = parser.parse_args()
+
+    stations, monthly = station_weather(workers=args.workers)
+    targets = regions(stations, args.grid)
+    regional = regional_weather(monthly, stations, targets, args.power)
+    for table, path in [
+        (stations, STATIONS_PATH),
+        (monthly, STATION_MONTHLY_PATH),
+        (targets, REGIONS_PATH),
+        (regional, REGIONAL_MONTHLY_PATH),
+    ]:
+        write_processed(table, path)
+        print(f"Saved {len(table)} rows to: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Vectorized Google Trends combiner.
+
+Replaces the per-file loop of Search Data Combiner.ipynb. Every export under
+raw_google_trends_data/<category>/<product>.csv looks like
+
+    Categorie: Alle categorieën
+
+    Maand,AirPods: (Nederland)
+    2019-01,46
+
+All exports are read in one pass into flat arrays and scattered into a single
+float32 (month x product) matrix whose columns are indexed by (category, product).
+The per-category "Average" columns and average_search_data_per_category.csv are
+then one groupby over the category level instead of one DataFrame per file.
+search_interest_per_product.csv keeps every product's own monthly series in
+long format (Date, category, product, value) for the Product nodes of the graph.
+
+Usage: python -m src.preprocessing.trends
+"""
+
+import io
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .columnar import write_processed
+
+PATH = Path(__file__).parent.parent.parent
+TRENDS_PATH = PATH / "raw_google_trends_data"
+PROCESSED = PATH / "processed_data"
+AVERAGE_SEARCH_PATH = PROCESSED / "average_search_data_per_category.csv"
+PRODUCTS_PATH = PROCESSED / "search_interest_per_product.csv"
+
+HEADER_LINES = 3
+
+
+def export_paths(root: Path = TRENDS_PATH) -> list[Path]:
+    return sorted(root.glob("*/*.csv"))
+
+
+def categories(root: Path = TRENDS_PATH) -> list[str]:
+    return sorted(path.name for path in root.iterdir() if path.is_dir())
+
+
+def category_path(category: str, processed: Path = PROCESSED) -> Path:
+    return processed / f"combined_{category}.csv"
+
+
+def read_exports(paths=None) -> pd.DataFrame:
+    """
+    Read Google Trends exports into one month x product matrix.
+
+    Parameters:
+        paths (list[Path]): Exports to read, every file under raw_google_trends_data
+            if None. The folder name is the category, the file name the product.
+
+    Returns:
+        pd.DataFrame: float32 values indexed by "YYYY-MM" Date, with
+        (category, product) columns; NaN where a product has no value for a month.
+    """
+    if paths is None:
+        paths = export_paths()
+    keys, lines, counts = [], [], []
+    for path in paths:
+        keys.append((path.parent.name, path.stem))
+        with open(path, encoding="utf-8") as f:
+            data = f.read().splitlines()[HEADER_LINES:]
+        lines.extend(data)
+        counts.append(len(data))
+
+    # Parse the "YYYY-MM,value" lines of all files with a single read_csv call.
+    # Blank lines are kept so every row still lines up with its file's column.
+    rows = pd.read_csv(
+        io.StringIO("\n".join(lines)),
+        header=None,
+        names=["Date", "value"],
+        dtype={"Date": str},
+        skip_blank_lines=False,
+        skipinitialspace=True,
+    )
+    columns = np.repeat(np.arange(len(keys)), counts)
+    keep = rows["Date"].notna().to_numpy()
+    values = rows["value"][keep]
+    if values.dtype == object:
+        # Google Trends reports interest below 1 as "<1"
+        values = values.str.strip().replace("<1", "0")
+    # Hash the dates once, then only slice and sort the few distinct ones
+    codes, dates = pd.factorize(rows["Date"][keep])
+    index = np.array(sorted(set(date[:7] for date in dates)))
+    month_rows = np.searchsorted(index, [date[:7] for date in dates])[codes]
+    matrix = np.full((len(index), len(keys)), np.nan, dtype=np.float32)
+    matrix[month_rows, columns[keep]] = values.to_numpy(np.float32)
+    return pd.DataFrame(
+        matrix,
+        index=pd.Index(index, name="Date"),
+        columns=pd.MultiIndex.from_tuples(keys, names=["category", "product"]),
+    )
+
+
+def category_averages(matrix: pd.DataFrame) -> pd.DataFrame:
+    """
+    Average search value per category and month.
+
+    A category only gets an average for the months in which all its products have
+    a value, like the inner join of the notebook.
+
+    Returns:
+        pd.DataFrame: float64 month x category averages.
+    """
+    grouped = matrix.T.astype(np.float64).groupby(level="category")
+    complete = matrix.notna().T.groupby(level="category").all()
+    return grouped.mean().where(complete).T
+
+
+def category_table(
+    matrix: pd.DataFrame, category: str, averages: pd.DataFrame | None = None
+) -> pd.DataFrame:
+    """
+    The combined_<category>.csv layout: Date, one column per product and Average.
+
+    Only months in which every product of the category has a value are kept.
+    Products whose values are all whole numbers are written as integers.
+    """
+    if averages is None:
+        averages = category_averages(matrix)
+    table = matrix[category].dropna(how="any")
+    table = table[sorted(table.columns)]
+    whole = (table == np.round(table)).all()
+    table = table.astype(
+        {product: np.int64 if w else np.float64 for product, w in whole.items()}
+    )
+    table["Average"] = averages.loc[table.index, category]
+    table.columns.name = None
+    return table.reset_index()
+
+
+def average_table(averages: pd.DataFrame) -> pd.DataFrame:
+    """The average_search_data_per_category.csv layout, months of all categories."""
+    table = averages[sorted(averages.columns)].dropna(how="any")
+    table.columns.name = None
+    return table.reset_index()
+
+
+def product_table(matrix: pd.DataFrame) -> pd.DataFrame:
+    """
+    The search_interest_per_product.csv layout: one row per product and month
+    with a value, sorted by category, product and Date.
+    """
+    table = matrix.stack(["category", "product"], future_stack=True).dropna()
+    table = table.rename("value").reset_index()
+    table = table[["Date", "category", "product", "value"]]
+    return table.sort_values(["category", "product", "Date"], ignore_index=True)
+
+
+def main():
+    matrix = read_exports()
+    averages = category_averages(matrix)
+    for category in categories():
+        write_processed(
+            category_table(matrix, category, averages), category_path(category)
+        )
+        print(f"Saved {category_path(category).name}")
+    write_processed(average_table(averages), AVERAGE_SEARCH_PATH)
+    print(f"Saved {AVERAGE_SEARCH_PATH.name}")
+    write_processed(product_table(matrix), PRODUCTS_PATH)
+    print(f"Saved {PRODUCTS_PATH.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+// Clientside zoom for CLIENTSIDE_ZOOM in main.py: the "dataset" store holds the
+// whole table as base64 typed arrays (SnapshotStore.typed_payload), and a new
+// window re-slices it and recomputes the window-dependent series (monthly
+// averages, variation, correlations) of the figures the server drew. Traces
+// say what they show through their `meta`:
+//   {column, series: "actual" | "monthly_avg" | "variation"}
+//   {columns, series: "mean"}                     row mean of several columns
+//   {correlation: {x, y, seasonal_key}}           heatmap of x vs. y columns
+//   {lags: {pairs, max_lag}}                      search/sales lag heatmap
+// WebGL traces (WEBGL in main.py) also carry {downsample: {method, points}} and
+// are downsampled again to the pixel width of their graph, like downsample.py,
+// and layout.meta = {title, title_window: "months" | "dates"} says how to title
+// a window.
+
+const MONTH_NAMES = [
+    "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+    "Jul", "Aug", "Sep", "Oct", "Nov", "Dec",
+];
+
+function decode(base64, ArrayType) {
+    const bytes = Uint8Array.from(atob(base64), (c) => c.charCodeAt(0));
+    return new ArrayType(bytes.buffer);
+}
+
+// The decoded dataset of the last payload, so zooming does not decode again
+let decoded = null;
+
+function loadDataset(payload) {
+    if (decoded === null || decoded.version !== payload.version) {
+        const columns = {};
+        for (const [name, values] of Object.entries(payload.columns)) {
+            columns[name] = decode(values, Float32Array);
+        }
+        decoded = {
+            version: payload.version,
+            months: decode(payload.months, Int32Array),
+            columns,
+        };
+    }
+    return decoded;
+}
+
+// year * 12 + month - 1 of a "YYYY-MM-DD" date
+function monthKey(date) {
+    const [year, month] = date.split("-").map(Number);
+    return year * 12 + month - 1;
+}
+
+// Rows of the window, as the dates, the month keys and a column getter
+function sliceWindow(data, range) {
+    const keys = data.months;
+    let lo = 0;
+    let hi = keys.length;
+    if (range.start !== null) {
+        const start = monthKey(range.start);
+        while (lo < hi && keys[lo] < start) {
+            lo += 1;
+        }
+    }
+    if (range.end !== null) {
+        const end = monthKey(range.end);
+        while (hi > lo && keys[hi - 1] > end) {
+            hi -= 1;
+        }
+    }
+    const months = Array.from(keys.subarray(lo, hi));
+    return {
+        months,
+        dates: months.map(
+            (key) =>
+                `${Math.floor(key / 12)}-${String((key % 12) + 1).padStart(2, "0")}-01`
+        ),
+        column: (name) => Array.from(data.columns[name].subarray(lo, hi)),
+    };
+}
+
+// Mean of the values per calendar month (NaN skipped), per row
+function monthlyMeans(values, months) {
+    const sums = new Array(12).fill(0);
+    const counts = new Array(12).fill(0);
+    values.forEach((value, i) => {
+        if (!Number.isNaN(value)) {
+            sums[months[i] % 12] += value;
+            counts[months[i] % 12] += 1;
+        }
+    });
+    return months.map((key) =>
+        counts[key % 12] ? sums[key % 12] / counts[key % 12] : NaN
+    );
+}
+
+function deseasonalize(values, months) {
+    const means = monthlyMeans(values, months);
+    return values.map((value, i) => value - means[i]);
+}
+
+// Pearson r over the rows where both are present, like DataFrame.corr()
+function pearson(x, y, minCount) {
+    let n = 0;
+    let sx = 0;
+    let sy = 0;
+    for (let i = 0; i < x.length; i++) {
+        if (!Number.isNaN(x[i]) && !Number.isNaN(y[i])) {
+            n += 1;
+            sx += x[i];
+            sy += y[i];
+        }
+    }
+    if (n < minCount) {
+        return NaN;
+    }
+    const mx = sx / n;
+    const my = sy / n;
+    let sxx = 0;
+    let syy = 0;
+    let sxy = 0;
+    for (let i = 0; i < x.length; i++) {
+        if (!Number.isNaN(x[i]) && !Number.isNaN(y[i])) {
+            sxx += (x[i] - mx) * (x[i] - mx);
+            syy += (y[i] - my) * (y[i] - my);
+            sxy += (x[i] - mx) * (y[i] - my);
+        }
+    }
+    // Variances that are only float noise mean a constant series
+    if (sxx <= 1e-12 * n * mx * mx || syy <= 1e-12 * n * my * my) {
+        return NaN;
+    }
+    return Math.max(-1, Math.min(1, sxy / Math.sqrt(sxx * syy)));
+}
+
+// Indices of `points` rows by Largest-Triangle-Three-Buckets (downsample.lttb)
+function lttb(x, y, points) {
+    const n = y.length;
+    if (points >= n || points < 3) {
+        return y.map((_, i) => i);
+    }
+    const edges = [];
+    for (let i = 0; i < points - 1; i++) {
+        edges.push(Math.floor(1 + (i * (n - 2)) / (points - 2)));
+    }
+    const picked = [0];
+    let a = 0;
+    for (let i = 0; i < points - 2; i++) {
+        const lo = edges[i];
+        const hi = edges[i + 1];
+        const nextHi = i + 2 < edges.length ? edges[i + 2] : n;
+        let meanX = 0;
+        let meanY = 0;
+        for (let j = hi; j < nextHi; j++) {
+            meanX += x[j];
+            meanY += y[j];
+        }
+        meanX /= nextHi - hi;
+        meanY /= nextHi - hi;
+        let best = lo;
+        let bestArea = -1;
+        for (let j = lo; j < hi; j++) {
+            const area = Math.abs(
+                (x[a] - meanX) * (y[j] - y[a]) - (x[a] - x[j]) * (meanY - y[a])
+            );
+            if (area > bestArea) {
+                best = j;
+                bestArea = area;
+            }
+        }
+        a = best;
+        picked.push(a);
+    }
+    picked.push(n - 1);
+    return picked;
+}
+
+// Indices of the lowest and highest row per bucket (downsample.minmax)
+function minmax(x, y, points) {
+    const n = y.length;
+    const buckets = Math.floor(points / 2);
+    if (points >= n || buckets < 1) {
+        return y.map((_, i) => i);
+    }
+    const picked = new Set();
+    for (let b = 0; b < buckets; b++) {
+        const lo = Math.floor((b * n) / buckets);
+        const hi = Math.floor(((b + 1) * n) / buckets);
+        let low = lo;
+        let high = lo;
+        for (let j = lo; j < hi; j++) {
+            if (y[j] < y[low]) {
+                low = j;
+            }
+            if (y[j] > y[high]) {
+                high = j;
+            }
+        }
+        picked.add(low).add(high);
+    }
+    return Array.from(picked).sort((p, q) => p - q);
+}
+
+const DOWNSAMPLE = {lttb, minmax};
+
+// Rows to draw of a series with gaps (downsample.downsample): every row if
+// there are no more than `points`, and the first row of every gap
+function downsampleRows(x, y, points, method) {
+    if (y.length <= points) {
+        return y.map((_, i) => i);
+    }
+    const present = [];
+    const gaps = [];
+    y.forEach((value, i) => {
+        if (!Number.isNaN(value)) {
+            present.push(i);
+        } else if (i === 0 || !Number.isNaN(y[i - 1])) {
+            gaps.push(i);
+        }
+    });
+    const kept = DOWNSAMPLE[method](
+        present.map((i) => x[i]),
+        present.map((i) => y[i]),
+        Math.max(points - gaps.length, 3)
+    ).map((k) => present[k]);
+    return kept.concat(gaps).sort((p, q) => p - q);
+}
+
+// Plotly draws null as a gap; JSON has no NaN
+function plotValues(values, decimals) {
+    const scale = 10 ** decimals;
+    return values.map((value) => {
+        if (Number.isNaN(value)) {
+            return null;
+        }
+        return decimals === undefined ? value : Math.round(value * scale) / scale;
+    });
+}
+
+function seriesValues(meta, rows) {
+    if (meta.series === "mean") {
+        const columns = meta.columns.map((name) => rows.column(name));
+        return rows.months.map((_, i) => {
+            const present = columns
+                .map((values) => values[i])
+                .filter((value) => !Number.isNaN(value));
+            return present.length
+                ? present.reduce((a, b) => a + b, 0) / present.length
+                : NaN;
+        });
+    }
+    const values = rows.column(meta.column);
+    if (meta.series === "actual") {
+        return values;
+    }
+    const means = monthlyMeans(values, rows.months);
+    if (meta.series === "monthly_avg") {
+        return means;
+    }
+    return values.map((value, i) => value - means[i]);
+}
+
+function correlationMatrix(meta, rows) {
+    const prepare = (name) =>
+        meta.seasonal_key
+            ? deseasonalize(rows.column(name), rows.months)
+            : rows.column(name);
+    const x = meta.x.map(prepare);
+    // Rows of the heatmap are the y columns
+    return meta.y.map(prepare).map((y) =>
+        plotValues(x.map((values) => pearson(values, y, 2)), 3)
+    );
+}
+
+function lagMatrix(meta, rows, seasonal) {
+    const prepare = (name) =>
+        seasonal
+            ? deseasonalize(rows.column(name), rows.months)
+            : rows.column(name);
+    return meta.pairs.map(([xName, yName]) => {
+        const x = prepare(xName);
+        const y = prepare(yName);
+        const row = [];
+        // Lag k pairs x[t] with y[t + k]: positive lags mean search leads
+        for (let lag = -meta.max_lag; lag <= meta.max_lag; lag++) {
+            const from = Math.max(0, -lag);
+            const to = Math.min(x.length, y.length - lag);
+            row.push(
+                from < to
+                    ? pearson(x.slice(from, to), y.slice(from + lag, to + lag), 3)
+                    : NaN
+            );
+        }
+        return plotValues(row, 3);
+    });
+}
+
+function formatMonth(date) {
+    const [year, month] = date.split("-").map(Number);
+    return `${MONTH_NAMES[month - 1]} ${year}`;
+}
+
+function windowTitle(meta, range) {
+    if (meta.title_window === "months") {
+        return range.start === null
+            ? `${meta.title} for all dates`
+            : `${meta.title} for ${formatMonth(range.start)} to ${formatMonth(range.end)}`;
+    }
+    return range.start === null
+        ? meta.title
+        : `${meta.title} (${range.start} to ${range.end})`;
+}
+
+// A copy of the figure with the series of the window and fresh autoranges;
+// WebGL traces are downsampled to `width` rows when it is known
+function resliceFigure(figure, rows, range, seasonal, width) {
+    const data = figure.data.map((trace) => {
+        const meta = trace.meta || {};
+        if (meta.correlation) {
+            return {...trace, z: correlationMatrix(meta.correlation, rows)};
+        }
+        if (meta.lags) {
+            return {...trace, z: lagMatrix(meta.lags, rows, seasonal)};
+        }
+        if (meta.series && meta.downsample) {
+            const values = seriesValues(meta, rows);
+            const keep = downsampleRows(
+                rows.months,
+                values,
+                width || meta.downsample.points,
+                meta.downsample.method
+            );
+            return {
+                ...trace,
+                x: keep.map((i) => rows.dates[i]),
+                y: plotValues(keep.map((i) => values[i])),
+            };
+        }
+        if (meta.series) {
+            return {
+                ...trace,
+                x: rows.dates,
+                y: plotValues(seriesValues(meta, rows)),
+            };
+        }
+        return trace;
+    });
+    const layout = {...figure.layout};
+    const isHeatmap = figure.data.some(
+        (trace) => trace.meta && (trace.meta.correlation || trace.meta.lags)
+    );
+    for (const key of Object.keys(layout)) {
+        // Heatmap axes are categories, not dates
+        if (!isHeatmap && /^[xy]axis\d*$/.test(key)) {
+            const axis = {...layout[key], autorange: true};
+            delete axis.range;
+            if (axis.nticks !== undefined && key.startsWith("x")) {
+                axis.nticks = rows.dates.length;
+            }
+            layout[key] = axis;
+        }
+    }
+    if (layout.meta && layout.meta.title) {
+        let text = windowTitle(layout.meta, range);
+        if (seasonal && figure.data.some((trace) => trace.meta && trace.meta.lags)) {
+            text += ", Seasonality Removed";
+        }
+        layout.title = {...layout.title, text};
+    }
+    return {...figure, data, layout};
+}
+
+function isDownsampled(figure) {
+    return figure.data.some((trace) => trace.meta && trace.meta.downsample);
+}
+
+// Plot area width in pixels of a graph, or undefined before it is drawn
+function plotWidth(graph) {
+    const element = document.getElementById(graph);
+    const plot = element && element.querySelector(".nsewdrag");
+    return plot ? Math.round(plot.getBoundingClientRect().width) : undefined;
+}
+
+// Every figure of a group for the window, except the graph that was zoomed;
+// that one is redrawn too when it is downsampled, to show the window's rows
+function resliceGroup(range, payload, figures, graphs, seasonal, only) {
+    const noUpdate = window.dash_clientside.no_update;
+    if (!payload || !range) {
+        return figures.map(() => noUpdate);
+    }
+    const rows = sliceWindow(loadDataset(payload), range);
+    return figures.map((figure, i) => {
+        if (!figure || (only !== undefined && i !== only)) {
+            return noUpdate;
+        }
+        if (
+            range.start !== null &&
+            i === range.sourceIndex &&
+            !isDownsampled(figure)
+        ) {
+            return noUpdate;
+        }
+        return resliceFigure(figure, rows, range, seasonal, plotWidth(graphs[i]));
+    });
+}
+
+// Graph ids in the order of the figures, as WEATHER_GRAPHS / SEARCH_GRAPHS
+const WEATHER_GRAPHS = [
+    "line-graph",
+    "heatmap",
+    "heatmap-seasonality-removed",
+    "online-sales-variation",
+];
+const SEARCH_GRAPHS = [
+    "search-vs-online-sales",
+    "search-vs-sales-categories",
+    "search-sales-lag",
+];
+
+function withSource(range, graphs) {
+    return range && {...range, sourceIndex: graphs.indexOf(range.source)};
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    reslice: {
+        weather_graphs: function (range, payload, ...figures) {
+            return resliceGroup(
+                withSource(range, WEATHER_GRAPHS),
+                payload,
+                figures,
+                WEATHER_GRAPHS
+            );
+        },
+        search_graphs: function (range, seasonality, payload, ...figures) {
+            const seasonal = Boolean(seasonality && seasonality.length);
+            const trigger = window.dash_clientside.callback_context.triggered[0];
+            // The checklist only changes the lag heatmap
+            const only =
+                trigger && trigger.prop_id.startsWith("search-sales-lag-seasonality")
+                    ? SEARCH_GRAPHS.indexOf("search-sales-lag")
+                    : undefined;
+            return resliceGroup(
+                withSource(range, SEARCH_GRAPHS),
+                payload,
+                figures,
+                SEARCH_GRAPHS,
+                seasonal,
+                only
+            );
+        },
+    },
+});
@@ -0,0 +1,75 @@
+// Clientside half of the shared date windows in main.py: a zoom/pan on any
+// graph of a group becomes one update of the group's window store, without a
+// server round trip. Events that do not change the window update nothing.
+
+function pad(value) {
+    return String(value).padStart(2, "0");
+}
+
+// Rows are dated on the 1st of the month: round the start up and the end down
+// to a month start, like figure_cache.relayout_window
+function snapToMonths(start, end) {
+    const [startYear, startMonth, startDay] = String(start)
+        .slice(0, 10)
+        .split("-")
+        .map(Number);
+    const [endYear, endMonth] = String(end).slice(0, 10).split("-").map(Number);
+    let year = startYear;
+    let month = startMonth;
+    if (startDay !== 1) {
+        month += 1;
+        if (month > 12) {
+            year += 1;
+            month = 1;
+        }
+    }
+    return [`${year}-${pad(month)}-01`, `${endYear}-${pad(endMonth)}-01`];
+}
+
+// [start, end] of an x-axis zoom, null for a reset, undefined for any other
+// event (initial autosize, y-axis zoom, ...)
+function relayoutWindow(event) {
+    if (!event) {
+        return undefined;
+    }
+    for (const key of Object.keys(event)) {
+        const match = key.match(/^(xaxis\d*)\.(autorange|range|range\[0\])$/);
+        if (!match) {
+            continue;
+        }
+        if (match[2] === "autorange") {
+            return null;
+        }
+        const range =
+            match[2] === "range"
+                ? event[key]
+                : [event[key], event[`${match[1]}.range[1]`]];
+        if (range[1] !== undefined) {
+            return snapToMonths(range[0], range[1]);
+        }
+    }
+    return undefined;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    window_state: {
+        // Inputs: the relayoutData of every graph of the group; State: the store
+        from_relayout: function () {
+            const noUpdate = window.dash_clientside.no_update;
+            const current = arguments[arguments.length - 1];
+            const trigger = window.dash_clientside.callback_context.triggered[0];
+            if (!trigger || !trigger.prop_id.endsWith(".relayoutData")) {
+                return noUpdate;
+            }
+            const range = relayoutWindow(trigger.value);
+            if (range === undefined) {
+                return noUpdate;
+            }
+            const [start, end] = range || [null, null];
+            if (current && current.start === start && current.end === end) {
+                return noUpdate;
+            }
+            return {start, end, source: trigger.prop_id.split(".")[0]};
+        },
+    },
+});
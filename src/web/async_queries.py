@@ -0,0 +1,143 @@
+"""
+Async Neo4j access path with in-flight query coalescing.
+
+AsyncQueryExecutor runs an AsyncDriver on an event loop in a background thread.
+Identical queries (same Cypher and parameters) that are in flight at the same
+time share one round trip: the first caller starts it and every later caller
+awaits the same task. Dash callbacks run on worker threads, so the executor
+also offers a blocking execute_query with the same signature and return value
+as Driver.execute_query; every function in queries.py accepts it as its
+`driver`.
+"""
+
+import asyncio
+import json
+import threading
+from typing import Callable
+
+from neo4j import AsyncDriver, RoutingControl
+
+# Connection pool settings for many concurrent dashboard reads
+POOL_CONFIG = {
+    "max_connection_pool_size": 50,
+    "connection_acquisition_timeout": 10.0,
+    "connection_timeout": 5.0,
+    "max_connection_lifetime": 3600,
+    "liveness_check_timeout": 60.0,
+}
+
+
+class QueryCoalescer:
+    """Share one running task between concurrent awaits of the same key."""
+
+    def __init__(self):
+        self._in_flight: dict[object, asyncio.Task] = {}
+        self.started = 0
+        self.shared = 0
+
+    async def run(self, key, factory: Callable):
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            self.started += 1
+        else:
+            self.shared += 1
+        # A cancelled caller must not cancel the request of the others
+        return await asyncio.shield(task)
+
+
+def _query_key(query: str, parameters: dict) -> tuple[str, str]:
+    return query, json.dumps(parameters, sort_keys=True, default=str)
+
+
+class AsyncQueryExecutor:
+    """
+    Coalescing async query layer with a blocking bridge for threaded callers.
+
+    Parameters:
+        driver_factory (Callable): Returns a new AsyncDriver, called once on the
+            executor's loop (e.g. database.get_async_driver).
+        pool_config (dict): Settings passed to driver_factory.
+    """
+
+    def __init__(
+        self,
+        driver_factory: Callable[..., AsyncDriver],
+        pool_config: dict | None = None,
+    ):
+        self.driver_factory = driver_factory
+        self.pool_config = POOL_CONFIG if pool_config is None else pool_config
+        self.coalescer = QueryCoalescer()
+        self._driver = None
+        self._driver_lock = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=loop.run_forever, name="neo4j-async", daemon=True
+                )
+                self._thread.start()
+                self._loop = loop
+            return self._loop
+
+    async def _get_driver(self) -> AsyncDriver:
+        # Only touched from the loop thread; the asyncio lock keeps concurrent
+        # first queries from opening two drivers
+        if self._driver_lock is None:
+            self._driver_lock = asyncio.Lock()
+        async with self._driver_lock:
+            if self._driver is None:
+                driver = self.driver_factory(**self.pool_config)
+                try:
+                    await driver.verify_connectivity()
+                except Exception:
+                    await driver.close()
+                    raise
+                self._driver = driver
+        return self._driver
+
+    async def _execute(self, query: str, parameters: dict):
+        driver = await self._get_driver()
+        return await driver.execute_query(
+            query, parameters, routing_=RoutingControl.READ
+        )
+
+    async def execute_query_async(self, query: str, **parameters):
+        """
+        Run a read query, sharing the round trip with identical in-flight calls.
+
+        Must be awaited on the executor's loop (see submit).
+
+        Returns:
+            EagerResult: records, summary and keys, as Driver.execute_query.
+        """
+        return await self.coalescer.run(
+            _query_key(query, parameters), lambda: self._execute(query, parameters)
+        )
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the executor's loop and return its future."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+
+    def execute_query(self, query: str, **parameters):
+        """Blocking execute_query for worker threads; drop-in for Driver's."""
+        return self.submit(self.execute_query_async(query, **parameters)).result()
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._driver is not None:
+            asyncio.run_coroutine_threadsafe(self._driver.close(), loop).result()
+            self._driver = None
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
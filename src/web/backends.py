@@ -0,0 +1,229 @@
+"""
+Data backends behind the dashboard's table reads.
+
+The dashboard reads one flat table: the weather, sales and search columns per
+month (queries.SALES_DATA_COLUMNS) for a date window. A Backend answers that
+read, get_graph_version and the get_sales_weather_data* /
+get_sales_google_trends_data* family:
+
+    Neo4jBackend   the queries.py functions on a Neo4j driver (or the async
+                   query executor), as before
+    DuckDBBackend  an embedded DuckDB reading a Parquet export of the combined
+                   table; no server, and a window is a columnar range scan
+
+database.get_backend picks one with DATA_BACKEND=neo4j|duckdb (default neo4j);
+DUCKDB_PARQUET overrides the Parquet file, which this module writes from the
+combined table (rerun it after the table changes). DuckDB is optional and only
+needed for the duckdb backend.
+
+Usage: python -m src.web.backends [--csv PATH] [--parquet PATH]
+"""
+
+import argparse
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+from neo4j import Driver
+
+from .loader import CSV_PATH, OBSERVATION_PROPERTIES, read_rows
+from .metrics import observe_query
+from .queries import (
+    GOOGLE_TRENDS_COLUMNS,
+    SALES_DATA_COLUMNS,
+    WEATHER_COLUMNS,
+    get_graph_version,
+    get_sales_data,
+)
+
+PATH = Path(__file__).parent.parent.parent
+PARQUET_PATH = PATH / "processed_data" / "combined_data.parquet"
+
+BACKENDS = ("neo4j", "duckdb")
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("duckdb is required for the duckdb backend.") from e
+    return duckdb
+
+
+class Backend:
+    """
+    Source of the monthly table. Subclasses implement get_graph_version and
+    get_sales_data; the older per-query functions are answered from the latter.
+    """
+
+    def get_graph_version(self) -> tuple:
+        """(version marker, number of months, last month), see queries.py."""
+        raise NotImplementedError
+
+    def get_sales_data(
+        self,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """year, month, date and `columns` per month, as queries.get_sales_data."""
+        raise NotImplementedError
+
+    def get_sales_weather_data(self) -> pd.DataFrame:
+        return self.get_sales_data(columns=WEATHER_COLUMNS)
+
+    def get_sales_weather_data_by_date(self, date: str) -> pd.DataFrame:
+        return self.get_sales_data(date, date, WEATHER_COLUMNS)
+
+    def get_sales_weather_data_by_date_range(
+        self, start_date: str, end_date: str
+    ) -> pd.DataFrame:
+        return self.get_sales_data(start_date, end_date, WEATHER_COLUMNS)
+
+    def get_sales_google_trends_data(self) -> pd.DataFrame:
+        return self.get_sales_data(columns=GOOGLE_TRENDS_COLUMNS)
+
+    def get_sales_google_trends_data_by_date(self, date: str) -> pd.DataFrame:
+        return self.get_sales_data(date, date, GOOGLE_TRENDS_COLUMNS)
+
+    def get_sales_google_trends_data_by_date_range(
+        self, start_date: str, end_date: str
+    ) -> pd.DataFrame:
+        return self.get_sales_data(start_date, end_date, GOOGLE_TRENDS_COLUMNS)
+
+
+class Neo4jBackend(Backend):
+    """
+    The queries.py functions on a driver, or anything with its execute_query.
+
+    `driver` may also be a function returning the driver (e.g.
+    database.get_query_executor); it is then only called on the first read.
+    """
+
+    def __init__(self, driver: Driver | Callable[[], Driver]):
+        self._driver = driver
+
+    @property
+    def driver(self) -> Driver:
+        return self._driver() if callable(self._driver) else self._driver
+
+    def get_graph_version(self) -> tuple:
+        return get_graph_version(self.driver)
+
+    def get_sales_data(self, start_date=None, end_date=None, columns=None):
+        return get_sales_data(self.driver, start_date, end_date, columns)
+
+
+class DuckDBBackend(Backend):
+    """
+    The monthly table from a Parquet file through an in-process DuckDB.
+
+    The file is read on every query, so a rewritten export is picked up at
+    once; its modification time is the version marker. Queries are timed into
+    the same metrics as the Neo4j ones, under "duckdb_<name>".
+    """
+
+    def __init__(self, path: Path = PARQUET_PATH):
+        self.path = Path(path)
+        # Inlined as a literal: table function arguments cannot be parameters
+        self._table = "read_parquet('{}')".format(str(self.path).replace("'", "''"))
+        self._connection = _duckdb().connect()
+        self._lock = threading.Lock()
+
+    def _query(self, name: str, sql: str, parameters: list) -> pd.DataFrame:
+        start = time.perf_counter()
+        # A connection must not be shared between threads; cursors may be
+        with self._lock:
+            cursor = self._connection.cursor()
+        try:
+            data = cursor.execute(sql, parameters).df()
+        finally:
+            cursor.close()
+        observe_query(f"duckdb_{name}", time.perf_counter() - start)
+        return data
+
+    def get_graph_version(self) -> tuple:
+        data = self._query(
+            "get_graph_version",
+            f"SELECT count(*) AS dates, max(date) AS last_date FROM {self._table}",
+            [],
+        )
+        last_date = data["last_date"].iloc[0]
+        return (
+            self.path.stat().st_mtime_ns,
+            int(data["dates"].iloc[0]),
+            None if pd.isna(last_date) else pd.Timestamp(last_date).date(),
+        )
+
+    def get_sales_data(self, start_date=None, end_date=None, columns=None):
+        if columns is None:
+            columns = list(SALES_DATA_COLUMNS)
+        unknown = [col for col in columns if col not in SALES_DATA_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown sales data columns: {unknown}")
+        columns = list(dict.fromkeys(columns))
+
+        conditions, parameters = [], []
+        if start_date is not None:
+            conditions.append("date >= CAST(? AS DATE)")
+            parameters.append(start_date)
+        if end_date is not None:
+            conditions.append("date <= CAST(? AS DATE)")
+            parameters.append(end_date)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        selected = "".join(f", {col}" for col in columns)
+        data = self._query(
+            "get_sales_data",
+            f"SELECT year, month, date{selected} FROM {self._table} "
+            f"{where} ORDER BY date",
+            parameters,
+        )
+        # Dates as datetime.date, like the Date values of the Neo4j driver
+        data["date"] = pd.to_datetime(data["date"]).dt.date
+        return data
+
+
+def observation_table(rows: list[dict]) -> pd.DataFrame:
+    """
+    Loader rows (see loader.rows_from_frame) as the Parquet table: a date
+    column and the properties of the compact graph layout, which are named
+    after the queries.py columns.
+    """
+    table = pd.DataFrame(
+        {
+            prop: [row[key] for row in rows]
+            for prop, key in OBSERVATION_PROPERTIES.items()
+        }
+    )
+    table.insert(0, "date", pd.to_datetime([row["date"] for row in rows]).date)
+    for col in SALES_DATA_COLUMNS:
+        if col not in table:
+            # Columns the graph leaves empty (google_trends) are all missing
+            table[col] = float("nan")
+        else:
+            table[col] = table[col].astype("float64")
+    return table.sort_values("date", ignore_index=True)
+
+
+def write_parquet(rows: list[dict], path: Path = PARQUET_PATH):
+    """Write the DuckDB backend's Parquet file (needs pyarrow)."""
+    observation_table(rows).to_parquet(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write the Parquet export read by the duckdb backend."
+    )
+    parser.add_argument("--csv", type=Path, default=CSV_PATH)
+    parser.add_argument("--parquet", type=Path, default=PARQUET_PATH)
+    args = parser.parse_args()
+
+    rows = read_rows(args.csv)
+    write_parquet(rows, args.parquet)
+    print(f"Saved {len(rows)} months to: {args.parquet}")
+
+
+if __name__ == "__main__":
+    main()
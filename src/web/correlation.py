@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+
+class CorrelationCube:
+    """
+    Pearson correlations of every x/y column pair for any date window in O(1).
+
+    For every pair the cube keeps prefix sums over the time axis of the
+    pairwise-complete count, Σx, Σy, Σxy, Σx² and Σy², plus per-column counts
+    and sums. The correlation of a [start, end] window is then a difference of
+    two prefix rows instead of a pass over the raw rows, and matches
+    DataFrame.corr() (pairwise complete observations).
+
+    With `seasonal_key`, the prefix sums are kept per season (e.g. per calendar
+    month) and the correlation is the one of the series minus their seasonal
+    mean *within the window*, as `x - df.groupby(key)[x].transform("mean")`
+    followed by corr() would give. A window then costs O(number of seasons) per
+    pair.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        x_cols: list[str],
+        y_cols: list[str],
+        seasonal_key: str | None = None,
+    ):
+        """
+        Parameters:
+            data (pd.DataFrame): Rows sorted by a DatetimeIndex.
+            x_cols (list[str]): Columns of the first axis (e.g. weather).
+            y_cols (list[str]): Columns of the second axis (e.g. sales).
+            seasonal_key (str): Column to remove the seasonal mean per value of.
+        """
+        self.x_cols = list(x_cols)
+        self.y_cols = list(y_cols)
+        self.index = data.index
+        self.deseasonalize = seasonal_key is not None
+
+        # Correlations are shift-invariant; centering keeps the sums small
+        x = data[self.x_cols].astype(np.float64)
+        y = data[self.y_cols].astype(np.float64)
+        x = (x - x.mean().fillna(0)).to_numpy()
+        y = (y - y.mean().fillna(0)).to_numpy()
+
+        if seasonal_key is None:
+            codes = np.zeros(len(data), dtype=np.intp)
+            n_groups = 1
+        else:
+            codes, uniques = pd.factorize(data[seasonal_key], sort=True)
+            n_groups = max(len(uniques), 1)
+        self.n_groups = n_groups
+
+        # Rows of each group, in time order, laid out one group after the other
+        order = np.argsort(codes, kind="stable")
+        sizes = np.bincount(codes, minlength=n_groups)
+        # Position of every group's leading zero row in the prefix arrays
+        self._offsets = np.concatenate(([0], np.cumsum(sizes + 1)[:-1]))
+        # _counts[t, g]: rows of group g before row t
+        one_hot = np.zeros((len(data) + 1, n_groups), dtype=np.intp)
+        one_hot[np.arange(1, len(data) + 1), codes] = 1
+        self._counts = np.cumsum(one_hot, axis=0)
+
+        vx, vy = ~np.isnan(x), ~np.isnan(y)
+        x0, y0 = np.where(vx, x, 0.0), np.where(vy, y, 0.0)
+        pair = vx[:, :, None] & vy[:, None, :]
+        x_pair = np.where(pair, x0[:, :, None], 0.0)
+        y_pair = np.where(pair, y0[:, None, :], 0.0)
+
+        def prefix(values):
+            return self._group_prefix(values[order], sizes)
+
+        self._x_count = prefix(vx.astype(np.float64))
+        self._x_sum = prefix(x0)
+        self._y_count = prefix(vy.astype(np.float64))
+        self._y_sum = prefix(y0)
+        self._n = prefix(pair.astype(np.float64))
+        self._sx = prefix(x_pair)
+        self._sy = prefix(y_pair)
+        self._sxx = prefix(x_pair * x_pair)
+        self._syy = prefix(y_pair * y_pair)
+        self._sxy = prefix(x_pair * y_pair)
+
+    @staticmethod
+    def _group_prefix(values: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        """Cumulative sums that restart (with a leading zero row) at every group."""
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        padded = np.insert(values, starts, 0.0, axis=0)
+        totals = np.cumsum(padded, axis=0)
+        zero_rows = starts + np.arange(len(sizes))
+        return totals - np.repeat(totals[zero_rows], sizes + 1, axis=0)
+
+    def _bounds(self, start_date=None, end_date=None) -> tuple[int, int]:
+        lo = (
+            0
+            if start_date is None
+            else self.index.searchsorted(pd.Timestamp(start_date))
+        )
+        hi = (
+            len(self.index)
+            if end_date is None
+            else self.index.searchsorted(pd.Timestamp(end_date), side="right")
+        )
+        return lo, max(lo, hi)
+
+    def window(self, start_date=None, end_date=None) -> pd.DataFrame:
+        """
+        Correlation matrix of the rows between start_date and end_date (inclusive).
+
+        Returns:
+            pd.DataFrame: x_cols x y_cols Pearson r, NaN where a pair has fewer
+            than two rows or no variance.
+        """
+        lo, hi = self._bounds(start_date, end_date)
+        first = self._offsets + self._counts[lo]
+        last = self._offsets + self._counts[hi]
+
+        def window_sum(prefix):
+            return prefix[last] - prefix[first]
+
+        n, sx, sy = window_sum(self._n), window_sum(self._sx), window_sum(self._sy)
+        sxx, syy, sxy = (
+            window_sum(self._sxx),
+            window_sum(self._syy),
+            window_sum(self._sxy),
+        )
+        # Scale of the raw values, to tell float noise from real variance below
+        scale_x, scale_y = sxx.sum(axis=0), syy.sum(axis=0)
+        if self.deseasonalize:
+            x_count = window_sum(self._x_count)
+            y_count = window_sum(self._y_count)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mx = np.where(x_count > 0, window_sum(self._x_sum) / x_count, 0.0)
+                my = np.where(y_count > 0, window_sum(self._y_sum) / y_count, 0.0)
+            mx, my = mx[:, :, None], my[:, None, :]
+            # Sums of (x - mx) and (y - my) over the pairwise complete rows
+            sxy = sxy - my * sx - mx * sy + n * mx * my
+            sxx = sxx - 2 * mx * sx + n * mx * mx
+            syy = syy - 2 * my * sy + n * my * my
+            sx = sx - n * mx
+            sy = sy - n * my
+
+        n, sx, sy = n.sum(axis=0), sx.sum(axis=0), sy.sum(axis=0)
+        sxx, syy, sxy = sxx.sum(axis=0), syy.sum(axis=0), sxy.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = sxy - sx * sy / n
+            var_x = sxx - sx * sx / n
+            var_y = syy - sy * sy / n
+            r = cov / np.sqrt(var_x * var_y)
+        # Variances that are only float noise mean a constant series
+        flat = (var_x <= 1e-12 * scale_x) | (var_y <= 1e-12 * scale_y)
+        r = np.where((n < 2) | flat, np.nan, np.clip(r, -1.0, 1.0))
+        return pd.DataFrame(r, index=self.x_cols, columns=self.y_cols)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# Google Trends search column -> sales category it should lead
+SEARCH_SALES_PAIRS = {
+    "fashion_search": "retail_sale_of_clothes_and_fashion_items",
+    "electronics_search": "retail_sale_of_consumer_electronics",
+    "food_search": "retail_sale_of_food_and_drugstore_items",
+    "non_food_search": "retail_sale_of_other_non_food",
+}
+
+MAX_LAG = 12
+
+
+def _cross_sums(a: np.ndarray, b: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    Σ_t a[t] * b[t + k] for k = -max_lag..max_lag, for every column at once.
+
+    Parameters:
+        a (np.ndarray): (T, P) array.
+        b (np.ndarray): (T, P) array.
+
+    Returns:
+        np.ndarray: (2 * max_lag + 1, P) sums, lag -max_lag first.
+    """
+    length = len(a)
+    # Circular index k also holds lag k - size; a size of at least
+    # length + max_lag keeps those empty for every lag read back
+    size = 1 << max(1, int(length + max_lag - 1).bit_length())
+    spectrum = np.conj(np.fft.rfft(a, size, axis=0)) * np.fft.rfft(b, size, axis=0)
+    sums = np.fft.irfft(spectrum, size, axis=0)
+    # Lag k sits at index k, negative lags wrap around to the end
+    lags = np.arange(-max_lag, max_lag + 1)
+    return sums[lags % size]
+
+
+def lagged_correlation(
+    data: pd.DataFrame,
+    pairs: dict[str, str] = SEARCH_SALES_PAIRS,
+    max_lag: int = MAX_LAG,
+    seasonal_key: str | None = None,
+) -> pd.DataFrame:
+    """
+    Pearson correlation of x[t] and y[t + lag] for every x -> y pair and lag.
+
+    A positive lag means the x column (search interest) leads the y column
+    (sales) by that many rows. Each lag uses the pairwise complete overlap of the
+    two series, like Series.corr(y.shift(-lag)), but all lags and pairs come out
+    of a handful of FFTs instead of one correlation per shift.
+
+    Parameters:
+        data (pd.DataFrame): Consecutive rows (e.g. months) of the window.
+        pairs (dict): {x column: y column}.
+        max_lag (int): Largest lead and lag to compute.
+        seasonal_key (str): Subtract each column's mean per value of this column
+            (e.g. "month") within the window first.
+
+    Returns:
+        pd.DataFrame: One row per x column and one column per lag
+        (-max_lag..max_lag); NaN where fewer than three rows overlap or a side
+        has no variance.
+    """
+    x_cols, y_cols = list(pairs), list(pairs.values())
+    values = data[x_cols + y_cols].astype(np.float64)
+    if seasonal_key is not None:
+        values = values - values.groupby(data[seasonal_key]).transform("mean")
+    # Correlations are shift-invariant; centering keeps the sums small
+    values = values - values.mean().fillna(0)
+    x = values[x_cols].to_numpy()
+    y = values[y_cols].to_numpy()
+    lags = np.arange(-max_lag, max_lag + 1)
+    if len(values) == 0:
+        return pd.DataFrame(np.nan, index=x_cols, columns=lags)
+
+    mx, my = ~np.isnan(x), ~np.isnan(y)
+    x0, y0 = np.where(mx, x, 0.0), np.where(my, y, 0.0)
+    mx, my = mx.astype(np.float64), my.astype(np.float64)
+
+    n = np.rint(_cross_sums(mx, my, max_lag))
+    sx = _cross_sums(x0, my, max_lag)
+    sy = _cross_sums(mx, y0, max_lag)
+    sxx = _cross_sums(x0 * x0, my, max_lag)
+    syy = _cross_sums(mx, y0 * y0, max_lag)
+    sxy = _cross_sums(x0, y0, max_lag)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        r = cov / np.sqrt(var_x * var_y)
+    # FFT round-off leaves tiny variances where a series is constant
+    flat = (var_x <= 1e-9 * np.abs(sxx)) | (var_y <= 1e-9 * np.abs(syy))
+    r = np.where((n < 3) | flat, np.nan, np.clip(r, -1.0, 1.0))
+    return pd.DataFrame(r.T, index=x_cols, columns=lags)
+
@@ -1,25 +1,112 @@
 import os
+import threading
 from pathlib import Path
 
 import dotenv
-from neo4j import GraphDatabase
+from neo4j import AsyncDriver, AsyncGraphDatabase, Driver, GraphDatabase
 
 PATH = Path(__file__).parent.parent.parent
 
 load_status = dotenv.load_dotenv(PATH / "Neo4j-6fcd424a-Created-2025-05-28.txt")
 
 URI = os.getenv("NEO4J_URI")
-if not URI:
-    raise RuntimeError("NEO4J_URI environment variable not set.")
-
 NEO4J_USERNAME, NEO4J_PASSWORD = (
     os.getenv("NEO4J_USERNAME"),
     os.getenv("NEO4J_PASSWORD"),
 )
-if not NEO4J_USERNAME or not NEO4J_PASSWORD:
-    raise RuntimeError("NEO4J_USERNAME or NEO4J_PASSWORD environment variable not set.")
+# Source of the dashboard's data (see backends.py): "neo4j" or "duckdb", which
+# needs no server and reads DUCKDB_PARQUET (default backends.PARQUET_PATH)
+DATA_BACKEND = os.getenv("DATA_BACKEND", "neo4j")
+DUCKDB_PARQUET = os.getenv("DUCKDB_PARQUET")
 
-driver = GraphDatabase.driver(
-    URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD), database="neo4j"
-)
-driver.verify_connectivity()
+_driver = None
+_executor = None
+_backend = None
+_lock = threading.Lock()
+
+
+def _credentials() -> tuple[str, tuple[str, str]]:
+    if not URI:
+        raise RuntimeError("NEO4J_URI environment variable not set.")
+    if not NEO4J_USERNAME or not NEO4J_PASSWORD:
+        raise RuntimeError(
+            "NEO4J_USERNAME or NEO4J_PASSWORD environment variable not set."
+        )
+    return URI, (NEO4J_USERNAME, NEO4J_PASSWORD)
+
+
+def get_async_driver(**config) -> AsyncDriver:
+    """
+    A new async Neo4j driver; create it inside the event loop that will use it.
+
+    Parameters:
+        config: Driver settings such as max_connection_pool_size.
+    """
+    uri, auth = _credentials()
+    return AsyncGraphDatabase.driver(uri, auth=auth, database="neo4j", **config)
+
+
+def get_driver() -> Driver:
+    """
+    The shared Neo4j driver, opened and checked on first use.
+
+    Importing this module does not touch the database, so processes start
+    without waiting for Neo4j.
+    """
+    global _driver
+    with _lock:
+        if _driver is None:
+            uri, auth = _credentials()
+            driver = GraphDatabase.driver(uri, auth=auth, database="neo4j")
+            try:
+                driver.verify_connectivity()
+            except Exception:
+                driver.close()
+                raise
+            _driver = driver
+    return _driver
+
+
+def get_query_executor():
+    """
+    The shared AsyncQueryExecutor (see async_queries.py), created on first use.
+
+    It can be passed wherever queries.py expects a driver.
+    """
+    global _executor
+    from .async_queries import AsyncQueryExecutor
+
+    with _lock:
+        if _executor is None:
+            _executor = AsyncQueryExecutor(get_async_driver)
+    return _executor
+
+
+def get_backend():
+    """
+    The shared Backend selected by DATA_BACKEND, created on first use.
+
+    The Neo4j backend reads through get_query_executor and only needs NEO4J_URI
+    once it queries; the DuckDB backend never does.
+    """
+    global _backend
+    from .backends import BACKENDS, PARQUET_PATH, DuckDBBackend, Neo4jBackend
+
+    if DATA_BACKEND not in BACKENDS:
+        raise RuntimeError(
+            f"Unknown DATA_BACKEND {DATA_BACKEND!r}, expected one of {list(BACKENDS)}"
+        )
+    with _lock:
+        if _backend is None:
+            if DATA_BACKEND == "duckdb":
+                _backend = DuckDBBackend(DUCKDB_PARQUET or PARQUET_PATH)
+            else:
+                _backend = Neo4jBackend(get_query_executor)
+    return _backend
+
+
+def __getattr__(name):
+    # `from .database import driver` keeps working and connects at that point
+    if name == "driver":
+        return get_driver()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,157 @@
+"""
+Downsampling of line series for the WebGL rendering mode of the dashboard.
+
+With WEBGL=1 (see main.py) the line figures draw their series with Scattergl
+instead of SVG Scatter traces, y values travel as binary float32 arrays
+(plotly encodes NumPy arrays as base64 "bdata") and a series longer than the
+plot is reduced to about one point per pixel before it is sent:
+
+    lttb    Largest-Triangle-Three-Buckets: per bucket the point spanning the
+            largest triangle with the previous pick and the next bucket's mean,
+            which keeps the visual shape of the line
+    minmax  the lowest and highest point per bucket, which keeps every peak
+
+Missing values are not downsampled away: the first row of every gap stays, so
+the line still breaks there. A window with no more rows than points is drawn
+at full resolution, so zooming in brings back every row; assets/reslice.js
+does the same in the browser, to the pixel width of each graph.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices of `points` rows picked by Largest-Triangle-Three-Buckets.
+
+    Parameters:
+        x (np.ndarray): Increasing float positions.
+        y (np.ndarray): Finite float values.
+        points (int): Rows to keep, the first and last included.
+
+    Returns:
+        np.ndarray: Increasing row indices.
+    """
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+    # points - 2 buckets between the first and the last row; each has a row
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    # Mean of every bucket and of the last row, the next bucket of bucket i
+    sizes = np.diff(np.append(edges, n))
+    mean_x = np.add.reduceat(x, edges) / sizes
+    mean_y = np.add.reduceat(y, edges) / sizes
+    picked = np.empty(points, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        xa, ya = x[a], y[a]
+        # Twice the triangle area, up to sign
+        area = (xa - mean_x[i + 1]) * (y[lo:hi] - ya) - (xa - x[lo:hi]) * (
+            mean_y[i + 1] - ya
+        )
+        a = lo + int(np.abs(area).argmax())
+        picked[i + 1] = a
+    return picked
+
+
+def minmax(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices of the lowest and highest row of points // 2 buckets, in row order.
+
+    Parameters:
+        x (np.ndarray): Unused; the buckets hold equal numbers of rows.
+        y (np.ndarray): Finite float values.
+        points (int): Rows to keep at most.
+
+    Returns:
+        np.ndarray: Increasing row indices.
+    """
+    n = len(y)
+    buckets = points // 2
+    if points >= n or buckets < 1:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    picked = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        picked += [lo + int(np.argmin(y[lo:hi])), lo + int(np.argmax(y[lo:hi]))]
+    return np.unique(picked)
+
+
+METHODS = {"lttb": lttb, "minmax": minmax}
+
+
+def downsample(x, y, points: int, method: str = "lttb") -> np.ndarray:
+    """
+    Indices of the rows to draw of a series with gaps.
+
+    Parameters:
+        x (array-like): Increasing float positions.
+        y (array-like): Values, NaN where missing.
+        points (int): Rows to keep, about the pixel width of the plot.
+        method (str): One of DOWNSAMPLE_METHODS.
+
+    Returns:
+        np.ndarray: Increasing row indices; every row if there are no more
+        than `points`.
+    """
+    if method not in METHODS:
+        raise ValueError(
+            f"Unknown downsampling method {method!r}, "
+            f"expected one of {list(DOWNSAMPLE_METHODS)}"
+        )
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) <= points:
+        return np.arange(len(y))
+    present = np.isfinite(y)
+    # The first row of every run of missing values keeps the line broken there
+    gaps = np.flatnonzero(~present & np.concatenate(([True], present[:-1])))
+    rows = np.flatnonzero(present)
+    kept = rows[METHODS[method](x[rows], y[rows], max(points - len(gaps), 3))]
+    return np.union1d(kept, gaps)
+
+
+def line_trace(
+    x,
+    y,
+    webgl: bool = False,
+    points: int = 1600,
+    method: str = "lttb",
+    **kwargs,
+):
+    """
+    A line trace of a date series.
+
+    Parameters:
+        x (array-like): Dates.
+        y (array-like): Values, NaN or None where missing.
+        webgl (bool): Draw with Scattergl, downsampled to `points` rows with
+            `method` and with float32 y values; otherwise a plain go.Scatter.
+        points (int): Rows a WebGL trace keeps at most.
+        method (str): One of DOWNSAMPLE_METHODS.
+        kwargs: Further trace properties (mode, name, line, meta, ...).
+
+    Returns:
+        go.Scatter | go.Scattergl: The trace. The meta of a WebGL trace gets
+        {"downsample": {"method", "points", "rows"}}, which assets/reslice.js
+        uses to downsample the re-sliced windows again.
+    """
+    if not webgl:
+        return go.Scatter(x=x, y=y, **kwargs)
+    dates = pd.to_datetime(pd.Series(x)).to_numpy(dtype="datetime64[ms]")
+    values = pd.to_numeric(pd.Series(y), errors="coerce").to_numpy(np.float64)
+    keep = downsample(dates.astype(np.int64), values, points, method)
+    meta = dict(kwargs.pop("meta", None) or {})
+    meta["downsample"] = {"method": method, "points": points, "rows": len(values)}
+    return go.Scattergl(
+        x=np.datetime_as_string(dates[keep], unit="D"),
+        y=values[keep].astype(np.float32),
+        meta=meta,
+        **kwargs,
+    )
@@ -0,0 +1,152 @@
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+import pandas as pd
+from plotly.utils import PlotlyJSONEncoder
+
+from .metrics import stage
+
+RANGE_KEYS = ("xaxis.range[0]", "xaxis.range[1]")
+
+
+def relayout_window(relayoutData: dict | None) -> tuple[str, str] | None:
+    """
+    Date window of a zoom/pan relayout event, snapped to month boundaries.
+
+    The data has one row per month (dated on the 1st), so the start is rounded
+    up and the end down to the first of a month; every range that selects the
+    same rows maps to the same window.
+
+    Parameters:
+        relayoutData (dict): relayoutData of a dcc.Graph.
+
+    Returns:
+        tuple: ("YYYY-MM-DD", "YYYY-MM-DD"), or None when the event is not an
+        x-axis range (initial render, autoscale, resize).
+    """
+    if not relayoutData or not all(key in relayoutData for key in RANGE_KEYS):
+        return None
+    start, end = (
+        pd.Timestamp(str(relayoutData[key]).split(" ")[0]) for key in RANGE_KEYS
+    )
+    start = start if start.day == 1 else start + pd.offsets.MonthBegin(1)
+    end = end.replace(day=1)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+def _normalize(arg):
+    """Cache key part of a callback argument; relayout events become windows."""
+    if isinstance(arg, dict):
+        return relayout_window(arg)
+    if isinstance(arg, list):
+        return tuple(_normalize(a) for a in arg)
+    return arg
+
+
+def _as_relayout(arg):
+    """Replace a relayout event by the month-snapped window it selects."""
+    if not isinstance(arg, dict):
+        return arg
+    window = relayout_window(arg)
+    return dict(zip(RANGE_KEYS, window)) if window else None
+
+
+class FigureCache:
+    """
+    Bounded LRU cache of serialized figures with a time to live.
+
+    Figures are stored as Plotly JSON under (callback, normalized arguments,
+    data version), so a window that was rendered before, by any user, is served
+    without rebuilding the figure. Entries expire `ttl` seconds after they were
+    stored and the least recently used entry is evicted beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        version: Callable[[], object] = lambda: None,
+        max_entries: int = 256,
+        ttl: float = 600.0,
+    ):
+        """
+        Parameters:
+            version (Callable): Returns the current data version; part of every key.
+            max_entries (int): Number of figures to keep.
+            ttl (float): Seconds a figure stays valid.
+        """
+        self.version = version
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(entry[1])
+
+    def put(self, key, figure):
+        # A figure, a figure dict, or a list of them for multi-output callbacks
+        with stage("serialize"):
+            serialized = json.dumps(figure, cls=PlotlyJSONEncoder)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, serialized)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / requests if requests else 0.0,
+            }
+
+    def cached(self, func: Callable) -> Callable:
+        """
+        Decorate a figure callback.
+
+        relayoutData arguments are replaced by the month-snapped window before
+        the callback runs, so the figure only depends on the cache key.
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = (
+                func.__name__,
+                tuple(_normalize(arg) for arg in args),
+                self.version(),
+            )
+            figure = self.get(key)
+            if figure is None:
+                # Fetch and transform stages inside func are timed on their own
+                with stage("figure"):
+                    figure = func(*(_as_relayout(arg) for arg in args))
+                self.put(key, figure)
+            return figure
+
+        return wrapper
@@ -0,0 +1,721 @@
+"""
+Batched, idempotent loader for the knowledge graph.
+
+Replaces the row-by-row LOAD CSV in queries/create_graph/create_graph.cypher.
+Reads processed_data/combined_data_without_index.csv from disk, creates the
+uniqueness constraints (and their backing indexes) the MERGEs anchor on, and
+writes the rows in UNWIND batches through a single session. Every measure node
+is merged relative to its own Date, so loading the same file twice leaves the
+graph unchanged and months with identical values no longer share nodes.
+
+With --daily it loads the daily national weather of src.preprocessing.daily
+instead: a Day node per date, linked to the Week and CalendarMonth nodes that
+hold the pre-rolled weekly and monthly values. With --stations it loads the
+KNMI stations and weather regions of src.preprocessing.stations, each linked
+to the CalendarMonth nodes by relationships holding that month's weather.
+With --products it loads a Product node per Google Trends export, in its
+Category, with its monthly search interest on relationships to CalendarMonth.
+
+--schema compact (or GRAPH_SCHEMA=compact, see queries.GRAPH_SCHEMAS) writes
+the combined rows as one Observation node per month holding every measure as a
+property instead of a node per measure; migrate.py converts an existing graph.
+
+Usage: python -m src.web.loader [--csv PATH] [--batch-size N] [--reset]
+    [--schema nodes|compact] [--daily | --stations | --products]
+"""
+
+import argparse
+import math
+import time
+from pathlib import Path
+
+import pandas as pd
+from neo4j import Driver, ManagedTransaction, Session
+
+from .queries import GRAPH_SCHEMAS, graph_schema
+
+PATH = Path(__file__).parent.parent.parent
+CSV_PATH = PATH / "processed_data" / "combined_data_without_index.csv"
+DAILY_PATH = PATH / "processed_data" / "daily_national_weather.csv"
+WEEKLY_PATH = PATH / "processed_data" / "daily_national_weather_weekly.csv"
+MONTHLY_PATH = PATH / "processed_data" / "daily_national_weather_monthly.csv"
+STATIONS_PATH = PATH / "processed_data" / "knmi_stations.csv"
+STATION_MONTHLY_PATH = PATH / "processed_data" / "station_monthly_weather.csv"
+REGIONS_PATH = PATH / "processed_data" / "weather_regions.csv"
+REGIONAL_MONTHLY_PATH = PATH / "processed_data" / "regional_monthly_weather.csv"
+PRODUCTS_PATH = PATH / "processed_data" / "search_interest_per_product.csv"
+
+SCHEMA = [
+    "CREATE CONSTRAINT date_value IF NOT EXISTS FOR (d:Date) REQUIRE d.value IS UNIQUE",
+    "CREATE CONSTRAINT year_value IF NOT EXISTS FOR (y:Year) REQUIRE y.value IS UNIQUE",
+    "CREATE CONSTRAINT month_value IF NOT EXISTS FOR (m:Month) REQUIRE m.value IS UNIQUE",
+    "CREATE CONSTRAINT season_name IF NOT EXISTS FOR (s:Season) REQUIRE s.name IS UNIQUE",
+]
+
+COMPACT_SCHEMA = [
+    "CREATE CONSTRAINT observation_value IF NOT EXISTS "
+    "FOR (o:Observation) REQUIRE o.value IS UNIQUE",
+]
+
+# Day, Week and CalendarMonth are keyed by a date; the constraints' range
+# indexes serve the date window filters of queries.get_daily_weather
+DAILY_SCHEMA = [
+    "CREATE CONSTRAINT day_value IF NOT EXISTS FOR (d:Day) REQUIRE d.value IS UNIQUE",
+    "CREATE CONSTRAINT week_value IF NOT EXISTS FOR (w:Week) REQUIRE w.value IS UNIQUE",
+    "CREATE CONSTRAINT calendar_month_value IF NOT EXISTS "
+    "FOR (m:CalendarMonth) REQUIRE m.value IS UNIQUE",
+]
+
+STATION_SCHEMA = [
+    "CREATE CONSTRAINT station_id IF NOT EXISTS FOR (s:Station) REQUIRE s.id IS UNIQUE",
+    "CREATE CONSTRAINT region_id IF NOT EXISTS FOR (r:Region) REQUIRE r.id IS UNIQUE",
+    DAILY_SCHEMA[2],
+]
+
+# A keyword can be tracked in several categories, so a Product is keyed by its
+# category and name; product_name is the name-only key of older graphs
+PRODUCT_SCHEMA = [
+    "DROP CONSTRAINT product_name IF EXISTS",
+    "CREATE CONSTRAINT product_key IF NOT EXISTS "
+    "FOR (p:Product) REQUIRE (p.category, p.name) IS UNIQUE",
+    "CREATE CONSTRAINT category_name IF NOT EXISTS "
+    "FOR (c:Category) REQUIRE c.name IS UNIQUE",
+    DAILY_SCHEMA[2],
+]
+
+SEASONS = {
+    "03": "Spring", "04": "Spring", "05": "Spring",
+    "06": "Summer", "07": "Summer", "08": "Summer",
+    "09": "Autumn", "10": "Autumn", "11": "Autumn",
+    "12": "Winter", "01": "Winter", "02": "Winter",
+}  # fmt: skip
+
+SALES_INFO = "All sales data is the percentage increase in relation to the 2015 value"
+
+LOAD_BATCH = """
+UNWIND $rows AS row
+MERGE (d:Date {value: date(row.date)})
+SET d.id = row.id
+MERGE (y:Year {value: row.year})
+MERGE (m:Month {value: row.month})
+MERGE (se:Season {name: row.season})
+MERGE (d)-[:year]->(y)
+MERGE (d)-[:month]->(m)
+MERGE (d)-[:season]->(se)
+
+MERGE (d)-[:weather]->(w:Weather)
+SET w.id = row.id, w.score = row.overall_weather_score
+MERGE (w)-[:wind]->(ws:WindSpeed)
+SET ws.value = row.wind_speed, ws.unit = "m/s"
+MERGE (w)-[:temperature]->(te:Temperature)
+SET te.value = row.temperature, te.unit = "°C"
+MERGE (w)-[:rain]->(rh:Rain)
+SET rh.value = row.rainfall, rh.unit = "mm"
+
+MERGE (d)-[:sales]->(s:Sales)
+SET s.id = row.id,
+    s.total_calc_channels = row.total_calc_channels,
+    s.total_calc_categories = row.total_calc_categories,
+    s.info = $sales_info
+MERGE (s)-[:total]->(rt:Trade)
+SET rt.value = row.retail_trade, rt.name = "Retail trade"
+MERGE (s)-[:online]->(vo:Internet)
+SET vo.value = row.retail_sale_via_internet, vo.name = "Retail sale via internet"
+MERGE (s)-[:multi_channel]->(mc:MultiChannel)
+SET mc.value = row.multi_channel, mc.name = "Multi-channel"
+MERGE (s)-[:fashion]->(rfa:Fashion)
+SET rfa.value = row.fashion, rfa.name = "Retail sale of clothes and fashion items"
+MERGE (s)-[:electronics]->(rel:Electronics)
+SET rel.value = row.electronics, rel.name = "Retail sale of consumer electronics"
+MERGE (s)-[:food]->(rfo:Food)
+SET rfo.value = row.food, rfo.name = "Retail sale of food and drugstore items"
+MERGE (s)-[:non_food]->(rnf:NonFood)
+SET rnf.value = row.non_food, rnf.name = "Retail sale of other non-food"
+
+MERGE (d)-[:google_trends]->(g:GoogleTrends)
+SET g.id = row.id, g.average = row.search_average, g.total = row.search_total
+MERGE (g)-[:fashion]->(fss:FashionSearch)
+SET fss.value = row.fashion_search, fss.name = "Search data clothes and fashion items"
+MERGE (g)-[:electronics]->(ess:ElectronicsSearch)
+SET ess.value = row.electronics_search, ess.name = "Search data consumer electronics"
+MERGE (g)-[:food]->(fos:FoodSearch)
+SET fos.value = row.food_search, fos.name = "Search data food and drugstore items"
+MERGE (g)-[:non_food]->(nss:NonFoodSearch)
+SET nss.value = row.non_food_search, nss.name = "Search data other non-food"
+"""
+
+# Observation property -> loader row key. The properties are named after the
+# columns of queries.SALES_DATA_COLUMNS, which the compact queries return as is
+OBSERVATION_PROPERTIES = {
+    "id": "id",
+    "year": "year",
+    "month": "month",
+    "season": "season",
+    "wind_speed": "wind_speed",
+    "rain": "rainfall",
+    "temp": "temperature",
+    "weather_score": "overall_weather_score",
+    "total_calc_channels": "total_calc_channels",
+    "total_calc_categories": "total_calc_categories",
+    "retail_trade": "retail_trade",
+    "retail_sale_via_internet": "retail_sale_via_internet",
+    "multi_channel": "multi_channel",
+    "retail_sale_of_clothes_and_fashion_items": "fashion",
+    "retail_sale_of_consumer_electronics": "electronics",
+    "retail_sale_of_food_and_drugstore_items": "food",
+    "retail_sale_of_other_non_food": "non_food",
+    "fashion_search": "fashion_search",
+    "electronics_search": "electronics_search",
+    "food_search": "food_search",
+    "non_food_search": "non_food_search",
+    "search_average": "search_average",
+    "search_total": "search_total",
+}
+
+# The compact layout: the rows of LOAD_BATCH as one node per month
+LOAD_OBSERVATIONS = """
+UNWIND $rows AS row
+MERGE (o:Observation {value: date(row.date)})
+SET """ + ",\n    ".join(
+    f"o.{prop} = row.{key}" for prop, key in OBSERVATION_PROPERTIES.items()
+)
+
+LOAD_DAYS = """
+UNWIND $rows AS row
+MERGE (d:Day {value: date(row.date)})
+SET d.rainfall = row.rainfall,
+    d.wind_speed = row.wind_speed,
+    d.temperature = row.temperature
+MERGE (w:Week {value: date(row.week)})
+MERGE (m:CalendarMonth {value: date(row.month)})
+MERGE (d)-[:week]->(w)
+MERGE (d)-[:calendar_month]->(m)
+"""
+
+# Formatted with the label of the rollup, Week or CalendarMonth
+LOAD_ROLLUP = """
+UNWIND $rows AS row
+MERGE (n:{label} {{value: date(row.date)}})
+SET n.days = row.days,
+    n.rainfall = row.rainfall,
+    n.rainfall_total = row.rainfall_total,
+    n.wind_speed = row.wind_speed,
+    n.temperature = row.temperature
+"""
+
+LOAD_STATIONS = """
+UNWIND $rows AS row
+MERGE (s:Station {id: row.station})
+SET s.name = row.name,
+    s.location = point({longitude: row.lon, latitude: row.lat}),
+    s.altitude = row.alt
+"""
+
+LOAD_REGIONS = """
+UNWIND $rows AS row
+MERGE (r:Region {id: row.region})
+SET r.scheme = row.scheme,
+    r.name = row.name,
+    r.location = point({longitude: row.lon, latitude: row.lat})
+"""
+
+# Monthly measures are relationship properties towards the CalendarMonth, so a
+# month of every station or region is one index lookup away
+LOAD_STATION_MONTHS = """
+UNWIND $rows AS row
+MATCH (s:Station {id: row.station})
+MERGE (m:CalendarMonth {value: date(row.month)})
+MERGE (s)-[o:observed]->(m)
+SET o.rainfall = row.rainfall,
+    o.wind_speed = row.wind_speed,
+    o.temperature = row.temperature
+"""
+
+LOAD_REGION_MONTHS = """
+UNWIND $rows AS row
+MATCH (r:Region {id: row.region})
+MERGE (m:CalendarMonth {value: date(row.month)})
+MERGE (r)-[w:weather]->(m)
+SET w.rainfall = row.rainfall,
+    w.wind_speed = row.wind_speed,
+    w.temperature = row.temperature
+"""
+
+# One row per product with its whole series, so a batch writes many months of
+# many products in one round trip
+LOAD_PRODUCTS = """
+UNWIND $rows AS row
+MERGE (c:Category {name: row.category})
+MERGE (p:Product {category: row.category, name: row.product})
+MERGE (p)-[:in_category]->(c)
+WITH p, row
+UNWIND row.series AS point
+MERGE (m:CalendarMonth {value: date(point.month)})
+MERGE (p)-[i:interest]->(m)
+SET i.value = point.value
+"""
+
+# Products of older graphs, keyed by name alone and possibly merged across
+# categories; they are reloaded under their (category, name) key
+DELETE_NAME_KEYED_PRODUCTS = """
+MATCH (p:Product) WHERE p.category IS NULL
+DETACH DELETE p
+"""
+
+
+def _value(x):
+    if x is None or (isinstance(x, float) and math.isnan(x)):
+        return None
+    return float(x)
+
+
+def rows_from_frame(df: pd.DataFrame) -> list[dict]:
+    """
+    Convert combined_data_without_index rows into loader parameter maps.
+
+    Parameters:
+        df (pd.DataFrame): Frame with the columns written by combine.py.
+
+    Returns:
+        list[dict]: One map per month, ready for the LOAD_BATCH query.
+    """
+    rows = []
+    for record in df.to_dict("records"):
+        year, month = str(record["Periods"]).split("-")
+        fashion = _value(record["Retail sale of clothes and fashion items"])
+        electronics = _value(record["Retail sale of consumer electronics"])
+        food = _value(record["Retail sale of food and drugstore items"])
+        non_food = _value(record["Retail sale of other non-food"])
+        internet = _value(record["Retail sale via internet"])
+        multi_channel = _value(record["Multi-channel"])
+        searches = [
+            _value(record["Search data clothes and fashion items"]),
+            _value(record["Search data consumer electronics"]),
+            _value(record["Search data food and drugstore items"]),
+            _value(record["Search data other non-food"]),
+        ]
+        known_searches = [s for s in searches if s is not None]
+        rows.append(
+            {
+                "id": str(record["id"]),
+                "date": f"{year}-{month}-01",
+                "year": year,
+                "month": month,
+                "season": SEASONS[month],
+                "wind_speed": _value(record["wind_speed"]),
+                "temperature": _value(record["temperature"]),
+                "rainfall": _value(record["rainfall"]),
+                "overall_weather_score": _value(record["overall_weather_score"]),
+                "retail_trade": _value(record["Retail trade"]),
+                "retail_sale_via_internet": internet,
+                "multi_channel": multi_channel,
+                "fashion": fashion,
+                "electronics": electronics,
+                "food": food,
+                "non_food": non_food,
+                "total_calc_channels": (
+                    (internet + multi_channel) / 2
+                    if None not in (internet, multi_channel)
+                    else None
+                ),
+                "total_calc_categories": (
+                    (fashion + electronics + food + non_food) / 4
+                    if None not in (fashion, electronics, food, non_food)
+                    else None
+                ),
+                "fashion_search": searches[0],
+                "electronics_search": searches[1],
+                "food_search": searches[2],
+                "non_food_search": searches[3],
+                "search_total": sum(known_searches) if known_searches else None,
+                "search_average": (
+                    sum(known_searches) / len(known_searches) if known_searches else None
+                ),
+            }
+        )
+    return rows
+
+
+def read_rows(path: Path = CSV_PATH) -> list[dict]:
+    """Read loader rows from the combined CSV or its .arrow copy."""
+    if Path(path).suffix == ".arrow":
+        from ..preprocessing.columnar import read_columnar
+
+        return rows_from_frame(read_columnar(path, month_format="str"))
+    return rows_from_frame(pd.read_csv(path))
+
+
+def daily_rows(df: pd.DataFrame) -> list[dict]:
+    """
+    Convert daily_national_weather rows into LOAD_DAYS parameter maps, with the
+    Monday of their week and the 1st of their month.
+    """
+    dates = pd.to_datetime(df["date"])
+    weeks = (dates - pd.to_timedelta(dates.dt.weekday, unit="D")).dt.strftime(
+        "%Y-%m-%d"
+    )
+    months = dates.dt.strftime("%Y-%m-01")
+    return [
+        {
+            "date": record["date"],
+            "week": week,
+            "month": month,
+            "rainfall": _value(record["rainfall"]),
+            "wind_speed": _value(record["wind_speed"]),
+            "temperature": _value(record["temperature"]),
+        }
+        for record, week, month in zip(df.to_dict("records"), weeks, months)
+    ]
+
+
+def rollup_rows(df: pd.DataFrame) -> list[dict]:
+    """Convert weekly or monthly rollup rows into LOAD_ROLLUP parameter maps."""
+    return [
+        {
+            "date": record["date"],
+            "days": int(record["days"]),
+            "rainfall": _value(record["rainfall"]),
+            "rainfall_total": _value(record["rainfall_total"]),
+            "wind_speed": _value(record["wind_speed"]),
+            "temperature": _value(record["temperature"]),
+        }
+        for record in df.to_dict("records")
+    ]
+
+
+def read_daily(
+    daily_path: Path = DAILY_PATH,
+    weekly_path: Path = WEEKLY_PATH,
+    monthly_path: Path = MONTHLY_PATH,
+) -> tuple[list[dict], list[dict], list[dict]]:
+    """Read day, week and month rows from the CSVs of preprocessing/daily.py."""
+    return (
+        daily_rows(pd.read_csv(daily_path)),
+        rollup_rows(pd.read_csv(weekly_path)),
+        rollup_rows(pd.read_csv(monthly_path)),
+    )
+
+
+def table_rows(df: pd.DataFrame, keys: list[str]) -> list[dict]:
+    """
+    Parameter maps of a processed table: `keys` as they are, other columns as
+    floats or None, and a YYYY-MM year_month as month, the 1st of that month.
+    """
+    rows = []
+    for record in df.to_dict("records"):
+        row = {key: record[key] for key in keys}
+        for col, value in record.items():
+            if col == "year_month":
+                row["month"] = f"{value}-01"
+            elif col not in keys:
+                row[col] = _value(value)
+        rows.append(row)
+    return rows
+
+
+def read_stations(
+    stations_path: Path = STATIONS_PATH,
+    station_monthly_path: Path = STATION_MONTHLY_PATH,
+    regions_path: Path = REGIONS_PATH,
+    regional_monthly_path: Path = REGIONAL_MONTHLY_PATH,
+) -> tuple[list[dict], list[dict], list[dict], list[dict]]:
+    """Read station, region and monthly rows written by preprocessing/stations.py."""
+    stations = pd.read_csv(stations_path)
+    stations["station"] = stations["station"].astype(int)
+    monthly = pd.read_csv(station_monthly_path)
+    return (
+        table_rows(stations, ["station", "name"]),
+        table_rows(monthly, ["station"]),
+        table_rows(pd.read_csv(regions_path), ["region", "scheme", "name"]),
+        table_rows(pd.read_csv(regional_monthly_path), ["region"]),
+    )
+
+
+def product_rows(df: pd.DataFrame) -> list[dict]:
+    """
+    Convert search_interest_per_product rows into LOAD_PRODUCTS parameter maps,
+    one per product with its monthly series.
+    """
+    rows = []
+    for (category, product), series in df.groupby(["category", "product"], sort=False):
+        rows.append(
+            {
+                "category": category,
+                "product": product,
+                "series": [
+                    {"month": f"{date}-01", "value": float(value)}
+                    for date, value in zip(series["Date"], series["value"])
+                ],
+            }
+        )
+    return rows
+
+
+def read_products(path: Path = PRODUCTS_PATH) -> list[dict]:
+    """Read product rows from the table written by preprocessing/trends.py."""
+    return product_rows(pd.read_csv(path))
+
+
+def create_schema(session: Session, schema: list[str] = SCHEMA):
+    for statement in schema:
+        session.run(statement).consume()
+
+
+def reset_graph(session: Session):
+    session.run(
+        "MATCH (n) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS"
+    ).consume()
+
+
+def set_graph_version(session: Session):
+    session.run("MERGE (v:GraphVersion) SET v.value = datetime()").consume()
+
+
+def _write_batch(tx: ManagedTransaction, rows: list[dict]):
+    tx.run(LOAD_BATCH, rows=rows, sales_info=SALES_INFO).consume()
+
+
+def _write_query(tx: ManagedTransaction, query: str, rows: list[dict]):
+    tx.run(query, rows=rows).consume()
+
+
+def load_rows(
+    driver: Driver,
+    rows: list[dict],
+    batch_size: int = 500,
+    reset: bool = False,
+    schema: str | None = None,
+) -> dict:
+    """
+    Write rows to the graph in UNWIND batches through a single session.
+
+    Parameters:
+        driver (Driver): Connected Neo4j driver.
+        rows (list[dict]): Output of rows_from_frame / read_rows.
+        batch_size (int): Number of rows per write transaction.
+        reset (bool): Delete every node before loading.
+        schema (str): "nodes" or "compact" (see queries.GRAPH_SCHEMAS),
+            queries.GRAPH_SCHEMA if None.
+
+    Returns:
+        dict: Number of rows and batches written, elapsed seconds and rows/s.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+    compact = graph_schema(schema) == "compact"
+
+    start = time.perf_counter()
+    with driver.session() as session:
+        if reset:
+            reset_graph(session)
+        create_schema(session, COMPACT_SCHEMA if compact else SCHEMA)
+        batches = 0
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i : i + batch_size]
+            if compact:
+                session.execute_write(_write_query, LOAD_OBSERVATIONS, batch)
+            else:
+                session.execute_write(_write_batch, batch)
+            batches += 1
+        set_graph_version(session)
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": len(rows),
+        "batches": batches,
+        "seconds": elapsed,
+        "rows_per_second": len(rows) / elapsed if elapsed else float("inf"),
+    }
+
+
+def load_daily(
+    driver: Driver,
+    days: list[dict],
+    weeks: list[dict],
+    months: list[dict],
+    batch_size: int = 2000,
+) -> dict:
+    """
+    Write daily weather and its rollups to the graph in UNWIND batches.
+
+    Rollups are written first, so every day batch only matches existing Week
+    and CalendarMonth nodes. Loading the same rows again changes nothing.
+
+    Parameters:
+        driver (Driver): Connected Neo4j driver.
+        days, weeks, months (list[dict]): Output of read_daily.
+        batch_size (int): Number of rows per write transaction.
+
+    Returns:
+        dict: Number of rows and batches written, elapsed seconds and rows/s.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+
+    start = time.perf_counter()
+    batches = 0
+    with driver.session() as session:
+        create_schema(session, DAILY_SCHEMA)
+        for query, rows in [
+            (LOAD_ROLLUP.format(label="Week"), weeks),
+            (LOAD_ROLLUP.format(label="CalendarMonth"), months),
+            (LOAD_DAYS, days),
+        ]:
+            for i in range(0, len(rows), batch_size):
+                session.execute_write(_write_query, query, rows[i : i + batch_size])
+                batches += 1
+    elapsed = time.perf_counter() - start
+    total = len(days) + len(weeks) + len(months)
+    return {
+        "rows": total,
+        "batches": batches,
+        "seconds": elapsed,
+        "rows_per_second": total / elapsed if elapsed else float("inf"),
+    }
+
+
+def load_stations(
+    driver: Driver,
+    stations: list[dict],
+    station_months: list[dict],
+    regions: list[dict],
+    region_months: list[dict],
+    batch_size: int = 2000,
+) -> dict:
+    """
+    Write stations, regions and their monthly weather to the graph.
+
+    Parameters:
+        driver (Driver): Connected Neo4j driver.
+        stations, station_months, regions, region_months (list[dict]): Output
+            of read_stations.
+        batch_size (int): Number of rows per write transaction.
+
+    Returns:
+        dict: Number of rows and batches written, elapsed seconds and rows/s.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+
+    start = time.perf_counter()
+    batches = 0
+    with driver.session() as session:
+        create_schema(session, STATION_SCHEMA)
+        for query, rows in [
+            (LOAD_STATIONS, stations),
+            (LOAD_REGIONS, regions),
+            (LOAD_STATION_MONTHS, station_months),
+            (LOAD_REGION_MONTHS, region_months),
+        ]:
+            for i in range(0, len(rows), batch_size):
+                session.execute_write(_write_query, query, rows[i : i + batch_size])
+                batches += 1
+    elapsed = time.perf_counter() - start
+    total = len(stations) + len(station_months) + len(regions) + len(region_months)
+    return {
+        "rows": total,
+        "batches": batches,
+        "seconds": elapsed,
+        "rows_per_second": total / elapsed if elapsed else float("inf"),
+    }
+
+
+def load_products(driver: Driver, rows: list[dict], batch_size: int = 100) -> dict:
+    """
+    Write Product and Category nodes and the products' monthly search interest.
+
+    Parameters:
+        driver (Driver): Connected Neo4j driver.
+        rows (list[dict]): Output of read_products.
+        batch_size (int): Number of products per write transaction.
+
+    Returns:
+        dict: Number of products and batches written, elapsed seconds and
+        products/s (as rows and rows_per_second).
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+
+    start = time.perf_counter()
+    batches = 0
+    with driver.session() as session:
+        create_schema(session, PRODUCT_SCHEMA)
+        session.run(DELETE_NAME_KEYED_PRODUCTS).consume()
+        for i in range(0, len(rows), batch_size):
+            session.execute_write(_write_query, LOAD_PRODUCTS, rows[i : i + batch_size])
+            batches += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": len(rows),
+        "batches": batches,
+        "seconds": elapsed,
+        "rows_per_second": len(rows) / elapsed if elapsed else float("inf"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--csv", type=Path, default=CSV_PATH)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="rows per write transaction (default: the loader's own, e.g. 500 "
+        "for the combined rows, 2000 for --daily and --stations, 100 products "
+        "for --products)",
+    )
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="delete the existing graph first (needed once when replacing a graph "
+        "built by create_graph.cypher, whose value nodes are shared between months)",
+    )
+    parser.add_argument(
+        "--schema",
+        choices=GRAPH_SCHEMAS,
+        default=None,
+        help="layout of the combined rows (default: GRAPH_SCHEMA or nodes)",
+    )
+    parser.add_argument(
+        "--daily",
+        action="store_true",
+        help="load the daily weather tables of src.preprocessing.daily instead",
+    )
+    parser.add_argument(
+        "--stations",
+        action="store_true",
+        help="load the station and regional tables of src.preprocessing.stations "
+        "instead",
+    )
+    parser.add_argument(
+        "--products",
+        action="store_true",
+        help="load the per-product Google Trends series instead",
+    )
+    args = parser.parse_args()
+
+    from .database import driver
+
+    # Only pass --batch-size on when given, so each loader keeps its default
+    batching = {} if args.batch_size is None else {"batch_size": args.batch_size}
+    if args.daily:
+        stats = load_daily(driver, *read_daily(), **batching)
+    elif args.stations:
+        stats = load_stations(driver, *read_stations(), **batching)
+    elif args.products:
+        stats = load_products(driver, read_products(), **batching)
+    else:
+        stats = load_rows(
+            driver,
+            read_rows(args.csv),
+            reset=args.reset,
+            schema=args.schema,
+            **batching,
+        )
+    print(
+        f"Loaded {stats['rows']} rows in {stats['batches']} batches "
+        f"in {stats['seconds']:.2f}s ({stats['rows_per_second']:.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
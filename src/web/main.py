@@ -1,21 +1,76 @@
+import functools
+import os
 from datetime import datetime
 
 import dash
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objs as go
-from dash import Input, Output, dcc, html
+from dash import ClientsideFunction, Input, Output, State, ctx, dcc, html
 from plotly.subplots import make_subplots
 
-from .database import driver
-from .queries import (
-    get_sales_google_trends_data,
-    get_sales_google_trends_data_by_date_range,
-    get_sales_weather_data,
-    get_sales_weather_data_by_date_range,
+from .cross_correlation import MAX_LAG, SEARCH_SALES_PAIRS
+from .database import DATA_BACKEND, get_backend, get_query_executor
+from .downsample import DOWNSAMPLE_METHODS, line_trace
+from .figure_cache import FigureCache
+from .metrics import (
+    add_metrics_route,
+    enable_trace_log,
+    registry,
+    stage,
+    timed_callback,
 )
+from .queries import GOOGLE_TRENDS_COLUMNS, WEATHER_COLUMNS
+from .snapshot import SnapshotStore
+from .startup import WarmUp, add_readiness_route
 
 app = dash.Dash(__name__)
+# Nothing here touches the data: the backend (DATA_BACKEND, see backends.py)
+# is created and connects on first use
+snapshot = SnapshotStore(get_backend)
+figures = FigureCache(version=lambda: snapshot.version)
+
+# Graphs that follow one shared date window, in the order of their figures
+WEATHER_GRAPHS = [
+    "line-graph",
+    "heatmap",
+    "heatmap-seasonality-removed",
+    "online-sales-variation",
+]
+SEARCH_GRAPHS = [
+    "search-vs-online-sales",
+    "search-vs-sales-categories",
+    "search-sales-lag",
+]
+# Window store value: month-snapped dates (None: all dates) and the zoomed graph
+ALL_DATES = {"start": None, "end": None, "source": None}
+SEARCH_COLUMNS = GOOGLE_TRENDS_COLUMNS + [
+    sales_col
+    for sales_col in SEARCH_SALES_PAIRS.values()
+    if sales_col not in GOOGLE_TRENDS_COLUMNS
+]
+DATASET_COLUMNS = WEATHER_COLUMNS + [
+    col for col in SEARCH_COLUMNS if col not in WEATHER_COLUMNS
+]
+
+# Ship the table to the browser once per data version and re-slice zoomed
+# windows there (assets/reslice.js); CLIENTSIDE_ZOOM=0 renders every window on
+# the server instead
+CLIENTSIDE_ZOOM = os.getenv("CLIENTSIDE_ZOOM", "1") != "0"
+# How often the browser asks whether the data version changed
+DATASET_POLL_SECONDS = 300
+
+# WEBGL=1 draws the line figures with Scattergl, downsampled to about
+# DOWNSAMPLE_POINTS rows per series (DOWNSAMPLE=lttb|minmax, see downsample.py);
+# a zoomed window with fewer rows is drawn at full resolution
+WEBGL = os.getenv("WEBGL", "0") != "0"
+DOWNSAMPLE = os.getenv("DOWNSAMPLE", "lttb")
+DOWNSAMPLE_POINTS = int(os.getenv("DOWNSAMPLE_POINTS", "1600"))
+if DOWNSAMPLE not in DOWNSAMPLE_METHODS:
+    raise ValueError(f"DOWNSAMPLE must be one of {list(DOWNSAMPLE_METHODS)}")
+series_trace = functools.partial(
+    line_trace, webgl=WEBGL, points=DOWNSAMPLE_POINTS, method=DOWNSAMPLE
+)
 
 
 def create_monthly_sales_boxplots():
@@ -24,7 +79,8 @@ def create_monthly_sales_boxplots():
         "retail_sale_of_consumer_electronics",
         "retail_sale_of_food_and_drugstore_items",
     ]
-    df = get_sales_weather_data(driver)
+    with stage("fetch"):
+        df = snapshot.get_sales_weather_data()
     from plotly.subplots import make_subplots
 
     fig = make_subplots(
@@ -69,7 +125,7 @@ def create_weather_monthly_avg_variation_plot2():
         "rain": "Precipitation",
         "wind_speed": "Wind Speed",
     }
-    df = get_sales_weather_data(driver)
+    df = snapshot.get_sales_weather_data()
     if "month" not in df.columns:
         df["month"] = pd.to_datetime(df["date"]).dt.month
 
@@ -145,6 +201,10 @@ def create_weather_monthly_avg_variation_plot2():
 
 app.layout = html.Div(
     children=[
+        dcc.Store(id="weather-window", data=ALL_DATES),
+        dcc.Store(id="search-window", data=ALL_DATES),
+        dcc.Store(id="dataset"),
+        dcc.Interval(id="dataset-poll", interval=DATASET_POLL_SECONDS * 1000),
         html.Div(
             # make the div split in two columns
             children=[
@@ -258,7 +318,6 @@ app.layout = html.Div(
                         ),
                         dcc.Graph(
                             id="monthly-sales-boxplots",
-                            figure=create_monthly_sales_boxplots(),
                             style={"width": "100%"},
                         ),
                         html.H3(
@@ -308,6 +367,18 @@ app.layout = html.Div(
                             id="search-vs-sales-categories",
                             style={"width": "100%"},
                         ),
+                        dcc.Checklist(
+                            id="search-sales-lag-seasonality",
+                            options=[
+                                {"label": " Remove seasonality", "value": "month"}
+                            ],
+                            value=[],
+                            style={"margin-left": "1.5cm", "font-family": "Arial"},
+                        ),
+                        dcc.Graph(
+                            id="search-sales-lag",
+                            style={"width": "100%"},
+                        ),
                         html.H3(
                             "Answer:",
                             style={"margin-left": "1.5cm", "font-family": "Arial"},
@@ -336,9 +407,16 @@ app.layout = html.Div(
 
 
 @app.callback(
-    Output("line-graph", "figure"), Input("online-sales-variation", "relayoutData")
+    Output("monthly-sales-boxplots", "figure"),
+    Input("monthly-sales-boxplots", "id"),
 )
-def create_weather_monthly_avg_variation_plot(relayoutData):
+@timed_callback
+@figures.cached
+def update_monthly_sales_boxplots(_):
+    return create_monthly_sales_boxplots()
+
+
+def create_weather_variation_figure(df):
     display_names = {
         "temp": "Temperature",
         "rain": "Precipitation",
@@ -349,19 +427,9 @@ def create_weather_monthly_avg_variation_plot(relayoutData):
         "wind_speed",
         "temp",
     ]
-    if (
-        relayoutData
-        and "xaxis.range[0]" in relayoutData
-        and "xaxis.range[1]" in relayoutData
-    ):
-        start_date = relayoutData["xaxis.range[0]"].split(" ")[0]
-        end_date = relayoutData["xaxis.range[1]"].split(" ")[0]
-        df = get_sales_weather_data_by_date_range(driver, start_date, end_date)
-    else:
-        df = get_sales_weather_data(driver)
-
-    monthly_weather_avg = df.groupby("month")[weather_cols].transform("mean")
-    weather_variation = df[weather_cols] - monthly_weather_avg
+    with stage("transform"):
+        monthly_weather_avg = df.groupby("month")[weather_cols].transform("mean")
+        weather_variation = df[weather_cols] - monthly_weather_avg
 
     fig = make_subplots(
         rows=len(weather_cols),
@@ -377,36 +445,39 @@ def create_weather_monthly_avg_variation_plot(relayoutData):
     for i, col in enumerate(weather_cols):
         # Actual values
         fig.add_trace(
-            go.Scatter(
+            series_trace(
                 x=df["date"],
                 y=df[col],
                 mode="lines+markers",
                 name=f"{display_names[col]} (actual)",
                 line=dict(),
+                meta=dict(column=col, series="actual"),
             ),
             row=i + 1,
             col=1,
         )
         # Monthly average
         fig.add_trace(
-            go.Scatter(
+            series_trace(
                 x=df["date"],
                 y=monthly_weather_avg[col],
                 mode="lines",
                 name="Monthly Avg",
                 line=dict(dash="dash"),
+                meta=dict(column=col, series="monthly_avg"),
             ),
             row=i + 1,
             col=1,
         )
         # Variation
         fig.add_trace(
-            go.Scatter(
+            series_trace(
                 x=df["date"],
                 y=weather_variation[col],
                 mode="lines",
                 name="Variation",
                 line=dict(dash="dot"),
+                meta=dict(column=col, series="variation"),
             ),
             row=i + 1,
             col=1,
@@ -438,9 +509,9 @@ def create_weather_monthly_avg_variation_plot(relayoutData):
 #     ):
 #         start_date = relayoutData["xaxis.range[0]"].split(" ")[0]
 #         end_date = relayoutData["xaxis.range[1]"].split(" ")[0]
-#         df = get_sales_weather_data_by_date_range(driver, start_date, end_date)
+#         df = snapshot.get_sales_weather_data_by_date_range(start_date, end_date)
 #     else:
-#         df = get_sales_weather_data(driver)
+#         df = snapshot.get_sales_weather_data()
 #
 #     monthly_weather_avg = df.groupby("month")[weather_cols].transform("mean")
 #     weather_variation = df[weather_cols] - monthly_weather_avg
@@ -478,12 +549,7 @@ def create_weather_monthly_avg_variation_plot(relayoutData):
 #     return fig
 
 
-@app.callback(
-    Output("heatmap", "figure"),
-    Input("line-graph", "relayoutData"),
-    Input("online-sales-variation", "relayoutData"),
-)
-def update_heatmap(relayoutData, relayoutData2):
+def create_correlation_heatmap(start_date=None, end_date=None, seasonal_key=None):
     weather_cols = [
         "rain",
         "wind_speed",
@@ -498,37 +564,20 @@ def update_heatmap(relayoutData, relayoutData2):
         "retail_sale_via_internet",
         "retail_trade",
     ]
-    title = "Correlation: Weather vs. Sales Categories"
-    if (
-        relayoutData
-        and "xaxis.range[0]" in relayoutData
-        and "xaxis.range[1]" in relayoutData
-    ):
-        start_date = relayoutData["xaxis.range[0]"].split(" ")[0]
-        end_date = relayoutData["xaxis.range[1]"].split(" ")[0]
-        df = get_sales_weather_data_by_date_range(driver, start_date, end_date)
-
-        start_fmt = datetime.strptime(start_date, "%Y-%m-%d").strftime("%b %Y")
-        end_fmt = datetime.strptime(end_date, "%Y-%m-%d").strftime("%b %Y")
-        title = f"Heatmap for {start_fmt} to {end_fmt}"
-    elif (
-        relayoutData2
-        and "xaxis.range[0]" in relayoutData2
-        and "xaxis.range[1]" in relayoutData2
-    ):
-        start_date = relayoutData2["xaxis.range[0]"].split(" ")[0]
-        end_date = relayoutData2["xaxis.range[1]"].split(" ")[0]
-        df = get_sales_weather_data_by_date_range(driver, start_date, end_date)
-
+    base_title = "Heatmap (Seasonality Removed)" if seasonal_key else "Heatmap"
+    if start_date and end_date:
         start_fmt = datetime.strptime(start_date, "%Y-%m-%d").strftime("%b %Y")
         end_fmt = datetime.strptime(end_date, "%Y-%m-%d").strftime("%b %Y")
-        title = f"Heatmap for {start_fmt} to {end_fmt}"
+        title = f"{base_title} for {start_fmt} to {end_fmt}"
     else:
-        df = get_sales_weather_data(driver)
-        title = "Heatmap for all dates"
+        title = f"{base_title} for all dates"
 
-    sub_corr = df[weather_cols + sales_cols].corr().loc[weather_cols, sales_cols]
-    sub_corr = sub_corr.round(3)
+    # With seasonal_key, each column's mean per calendar month is removed first
+    with stage("transform"):
+        sub_corr = snapshot.correlation(
+            weather_cols, sales_cols, start_date, end_date, seasonal_key=seasonal_key
+        )
+        sub_corr = sub_corr.round(3)
     sub_corr = sub_corr.rename(
         columns={
             "multi_channel": "Multi-Channel Sales",
@@ -556,127 +605,34 @@ def update_heatmap(relayoutData, relayoutData2):
         zmin=-1,
         zmax=1,
     )
-    fig.update_layout(xaxis_title="Weather", yaxis_title="Sales Category")
-    return fig
-
-
-@app.callback(
-    Output("heatmap-seasonality-removed", "figure"),
-    Input("line-graph", "relayoutData"),
-    Input("online-sales-variation", "relayoutData"),
-)
-def update_heatmap_seasonality_removed(relayoutData, relayoutData2):
-    weather_cols = [
-        "rain",
-        "wind_speed",
-        "temp",
-    ]
-    sales_cols = [
-        "multi_channel",
-        "retail_sale_of_clothes_and_fashion_items",
-        "retail_sale_of_consumer_electronics",
-        "retail_sale_of_food_and_drugstore_items",
-        "retail_sale_of_other_non_food",
-        "retail_sale_via_internet",
-        "retail_trade",
-    ]
-    title = "Correlation: Weather vs. Sales Categories"
-    if (
-        relayoutData
-        and "xaxis.range[0]" in relayoutData
-        and "xaxis.range[1]" in relayoutData
-    ):
-        start_date = relayoutData["xaxis.range[0]"].split(" ")[0]
-        end_date = relayoutData["xaxis.range[1]"].split(" ")[0]
-        df = get_sales_weather_data_by_date_range(driver, start_date, end_date)
-
-        start_fmt = datetime.strptime(start_date, "%Y-%m-%d").strftime("%b %Y")
-        end_fmt = datetime.strptime(end_date, "%Y-%m-%d").strftime("%b %Y")
-        title = f"Heatmap for {start_fmt} to {end_fmt}"
-    elif (
-        relayoutData2
-        and "xaxis.range[0]" in relayoutData2
-        and "xaxis.range[1]" in relayoutData2
-    ):
-        start_date = relayoutData2["xaxis.range[0]"].split(" ")[0]
-        end_date = relayoutData2["xaxis.range[1]"].split(" ")[0]
-        df = get_sales_weather_data_by_date_range(driver, start_date, end_date)
-
-        start_fmt = datetime.strptime(start_date, "%Y-%m-%d").strftime("%b %Y")
-        end_fmt = datetime.strptime(end_date, "%Y-%m-%d").strftime("%b %Y")
-        title = f"Heatmap (Seasonality Removed) for {start_fmt} to {end_fmt}"
-    else:
-        df = get_sales_weather_data(driver)
-        title = "Heatmap (Seasonality Removed) for all dates"
-
-    df_adj = df.copy()
-    seasonal_col = "month"
-
-    for col in weather_cols + sales_cols:
-        monthly_mean = df.groupby(seasonal_col)[col].transform("mean")
-        df_adj[col] = df[col] - monthly_mean
-
-    sub_corr = df_adj[weather_cols + sales_cols].corr().loc[weather_cols, sales_cols]
-    sub_corr = sub_corr.round(3)
-    sub_corr = sub_corr.rename(
-        columns={
-            "multi_channel": "Multi-Channel Sales",
-            "retail_sale_of_clothes_and_fashion_items": "Fashion Sales",
-            "retail_sale_of_consumer_electronics": "Electronics Sales",
-            "retail_sale_of_food_and_drugstore_items": "Food Sales",
-            "retail_sale_of_other_non_food": "Other Non-Food Sales",
-            "retail_sale_via_internet": "Online Sales",
-            "retail_trade": "Retail Trade",
-        },
-        index={
-            "rain": "Rain",
-            "wind_speed": "Wind Speed",
-            "temp": "Temperature",
-        },
+    fig.update_traces(
+        meta=dict(
+            correlation=dict(x=weather_cols, y=sales_cols, seasonal_key=seasonal_key)
+        )
     )
-
-    fig = px.imshow(
-        sub_corr.T,  # Transpose so sales categories are y, weather is x
-        x=sub_corr.T.columns,
-        y=sub_corr.T.index,
-        text_auto=True,
-        color_continuous_scale="RdBu",
-        labels=dict(x="Weather", y="Sales Category", color="Correlation"),
-        title=title,
-        zmin=-1,
-        zmax=1,
+    fig.update_layout(
+        xaxis_title="Weather",
+        yaxis_title="Sales Category",
+        meta=dict(title=base_title, title_window="months"),
     )
-    fig.update_layout(xaxis_title="Weather", yaxis_title="Sales Category")
     return fig
 
 
-@app.callback(
-    Output("online-sales-variation", "figure"), Input("line-graph", "relayoutData")
-)
-def update_online_sales_variation(relayoutData):
-    if (
-        relayoutData
-        and "xaxis.range[0]" in relayoutData
-        and "xaxis.range[1]" in relayoutData
-    ):
-        start_date = relayoutData["xaxis.range[0]"].split(" ")[0]
-        end_date = relayoutData["xaxis.range[1]"].split(" ")[0]
-        df = get_sales_weather_data_by_date_range(driver, start_date, end_date)
-    else:
-        df = get_sales_weather_data(driver)
-
+def create_online_sales_variation_figure(df):
     sales_col = "retail_sale_via_internet"
-    monthly_sales_avg = df.groupby("month")[sales_col].transform("mean")
-    sales_variation = df[sales_col] - monthly_sales_avg
+    with stage("transform"):
+        monthly_sales_avg = df.groupby("month")[sales_col].transform("mean")
+        sales_variation = df[sales_col] - monthly_sales_avg
 
     fig = go.Figure()
     fig.add_trace(
-        go.Scatter(
+        series_trace(
             x=df["date"],
             y=sales_variation,
             mode="lines+markers",
             name="Online Sales",
             line=dict(color="purple"),
+            meta=dict(column=sales_col, series="variation"),
         )
     )
     fig.update_layout(
@@ -688,28 +644,20 @@ def update_online_sales_variation(relayoutData):
         margin=dict(l=40, r=40, t=60, b=40),
     )
 
-    fig.update_xaxes(tickangle=45, nticks=len(df["date"].unique()))
+    fig.update_xaxes(tickangle=45)
+    if not WEBGL:
+        # A tick per month; long WebGL series leave the ticks to plotly
+        fig.update_xaxes(nticks=len(df["date"].unique()))
     fig.update_yaxes(gridcolor="lightgray")
     return fig
 
 
-@app.callback(
-    Output("search-vs-online-sales", "figure"),
-    Input("search-vs-sales-categories", "relayoutData"),
-)
-def update_search_vs_online_sales(relayoutData):
-    if (
-        relayoutData
-        and "xaxis.range[0]" in relayoutData
-        and "xaxis.range[1]" in relayoutData
-    ):
-        start_date = relayoutData["xaxis.range[0]"].split(" ")[0]
-        end_date = relayoutData["xaxis.range[1]"].split(" ")[0]
-        df = get_sales_google_trends_data_by_date_range(driver, start_date, end_date)
-        title = f"Average Search Interest vs. Online Sales ({start_date} to {end_date})"
+def create_search_vs_online_sales_figure(df, start_date=None, end_date=None):
+    base_title = "Average Search Interest vs. Online Sales"
+    if start_date and end_date:
+        title = f"{base_title} ({start_date} to {end_date})"
     else:
-        df = get_sales_google_trends_data(driver)
-        title = "Average Search Interest vs. Online Sales"
+        title = base_title
 
     search_cols = [
         "fashion_search",
@@ -717,23 +665,25 @@ def update_search_vs_online_sales(relayoutData):
         "food_search",
         "non_food_search",
     ]
-    df["Avg Search Interest"] = df[search_cols].mean(axis=1)
+    with stage("transform"):
+        avg_search = df[search_cols].mean(axis=1)
 
     fig = go.Figure()
 
     fig.add_trace(
-        go.Scatter(
+        series_trace(
             x=df["date"],
-            y=df["Avg Search Interest"],
+            y=avg_search,
             mode="lines+markers",
             name="Avg Search Interest",
             marker=dict(symbol="circle"),
             line=dict(color="#1f77b4"),
             yaxis="y",
+            meta=dict(columns=search_cols, series="mean"),
         )
     )
     fig.add_trace(
-        go.Scatter(
+        series_trace(
             x=df["date"],
             y=df["retail_sale_via_internet"],
             mode="lines+markers",
@@ -741,6 +691,7 @@ def update_search_vs_online_sales(relayoutData):
             marker=dict(symbol="circle"),
             line=dict(color="#ff7f0e"),
             yaxis="y2",
+            meta=dict(column="retail_sale_via_internet", series="actual"),
         )
     )
 
@@ -760,22 +711,14 @@ def update_search_vs_online_sales(relayoutData):
         legend=dict(x=0, y=1),
         height=400,
         margin=dict(l=40, r=40, t=60, b=40),
+        meta=dict(title=base_title, title_window="dates"),
     )
     fig.update_xaxes(tickangle=45)
     return fig
 
 
-@app.callback(
-    Output("search-vs-sales-categories", "figure"),
-    Input("search-vs-online-sales", "relayoutData"),
-)
-def update_search_vs_sales_categories(relayoutData):
-    category_map = {
-        "fashion_search": "retail_sale_of_clothes_and_fashion_items",
-        "electronics_search": "retail_sale_of_consumer_electronics",
-        "food_search": "retail_sale_of_food_and_drugstore_items",
-        "non_food_search": "retail_sale_of_other_non_food",
-    }
+def create_search_vs_sales_categories_figure(df_combined):
+    category_map = SEARCH_SALES_PAIRS
     n = len(category_map)
 
     # Color palette (extend or change as needed)
@@ -790,25 +733,6 @@ def update_search_vs_sales_categories(relayoutData):
         "#7f7f7f",
     ]
 
-    # Get data
-    if (
-        relayoutData
-        and "xaxis.range[0]" in relayoutData
-        and "xaxis.range[1]" in relayoutData
-    ):
-        start_date = relayoutData["xaxis.range[0]"].split(" ")[0]
-        end_date = relayoutData["xaxis.range[1]"].split(" ")[0]
-        df_sales = get_sales_weather_data_by_date_range(driver, start_date, end_date)
-        df_search = get_sales_google_trends_data_by_date_range(
-            driver, start_date, end_date
-        )
-    else:
-        df_sales = get_sales_weather_data(driver)
-        df_search = get_sales_google_trends_data(driver)
-
-    # Merge on date
-    df_combined = df_search.merge(df_sales, on="date", how="inner")
-
     fig = make_subplots(
         rows=n,
         cols=1,
@@ -826,13 +750,14 @@ def update_search_vs_sales_categories(relayoutData):
         sales_color = colors[(i + n) % len(colors)]
         # Search interest (left y-axis)
         fig.add_trace(
-            go.Scatter(
+            series_trace(
                 x=df_combined["date"],
                 y=df_combined[search_col],
                 mode="lines+markers",
                 name=search_col.replace("_", " ").title(),
                 marker=dict(color=search_color),
                 line=dict(color=search_color),
+                meta=dict(column=search_col, series="actual"),
             ),
             row=i + 1,
             col=1,
@@ -840,13 +765,14 @@ def update_search_vs_sales_categories(relayoutData):
         )
         # Sales (right y-axis)
         fig.add_trace(
-            go.Scatter(
+            series_trace(
                 x=df_combined["date"],
                 y=df_combined[sales_col],
                 mode="lines+markers",
                 name=sales_col.replace("_", " ").title(),
                 marker=dict(color=sales_color),
                 line=dict(color=sales_color),
+                meta=dict(column=sales_col, series="actual"),
             ),
             row=i + 1,
             col=1,
@@ -874,5 +800,277 @@ def update_search_vs_sales_categories(relayoutData):
     return fig
 
 
+@figures.cached
+def search_sales_lag_figure(start_date=None, end_date=None, seasonal_key=None):
+    labels = {
+        "fashion_search": "Fashion",
+        "electronics_search": "Electronics",
+        "food_search": "Food",
+        "non_food_search": "Other Non-Food",
+    }
+    base_title = "Search vs. Sales by Lag"
+    if start_date and end_date:
+        title = f"{base_title} ({start_date} to {end_date})"
+    else:
+        title = base_title
+    if seasonal_key:
+        title += ", Seasonality Removed"
+
+    with stage("transform"):
+        lags = snapshot.lagged_correlation(start_date, end_date, seasonal_key)
+        lags = lags.rename(index=labels).round(3)
+    fig = px.imshow(
+        lags,
+        x=lags.columns,
+        y=lags.index,
+        color_continuous_scale="RdBu",
+        labels=dict(x="Lag (months)", y="Category", color="Correlation"),
+        title=title,
+        zmin=-1,
+        zmax=1,
+        aspect="auto",
+    )
+    fig.update_traces(
+        meta=dict(lags=dict(pairs=list(SEARCH_SALES_PAIRS.items()), max_lag=MAX_LAG))
+    )
+    fig.update_layout(
+        xaxis_title="Lag in months (positive: search leads sales)",
+        yaxis_title="Category",
+        meta=dict(title=base_title, title_window="dates"),
+    )
+    return fig
+
+
+@figures.cached
+def weather_figures(start_date=None, end_date=None):
+    """
+    Figures of the Research Question 1 graphs for one window, in WEATHER_GRAPHS
+    order, built from a single fetch.
+    """
+    with stage("fetch"):
+        df = snapshot.get_sales_weather_data_by_date_range(start_date, end_date)
+    return [
+        create_weather_variation_figure(df),
+        create_correlation_heatmap(start_date, end_date),
+        create_correlation_heatmap(start_date, end_date, seasonal_key="month"),
+        create_online_sales_variation_figure(df),
+    ]
+
+
+@figures.cached
+def search_figures(start_date=None, end_date=None):
+    """
+    Search-vs-sales line figures for one window, built from a single fetch.
+    """
+    with stage("fetch"):
+        df = snapshot.get_sales_data(start_date, end_date, SEARCH_COLUMNS)
+    return [
+        create_search_vs_online_sales_figure(df, start_date, end_date),
+        create_search_vs_sales_categories_figure(df),
+    ]
+
+
+def except_source(figs: list, graphs: list[str], window: dict) -> list:
+    """
+    Leave the graph that was zoomed alone: it already shows the window, and
+    replacing its figure would only cost a render. A reset (no window) redraws
+    every graph, since the zoomed one only holds the rows of its old window;
+    so does WEBGL, where the zoomed graph may only hold a downsampled series.
+    """
+    if window["start"] is None or WEBGL:
+        return figs
+    return [
+        dash.no_update if graph == window["source"] else fig
+        for graph, fig in zip(graphs, figs)
+    ]
+
+
+# Zoom/pan on any graph of a group updates the group's window store in the
+# browser (assets/window_state.js); the store is the only server-side input
+for store, graphs in [
+    ("weather-window", ["line-graph", "online-sales-variation"]),
+    ("search-window", ["search-vs-online-sales", "search-vs-sales-categories"]),
+]:
+    app.clientside_callback(
+        ClientsideFunction(namespace="window_state", function_name="from_relayout"),
+        Output(store, "data"),
+        [Input(graph, "relayoutData") for graph in graphs],
+        State(store, "data"),
+    )
+
+
+@timed_callback
+def update_weather_graphs(window):
+    figs = weather_figures(window["start"], window["end"])
+    return except_source(figs, WEATHER_GRAPHS, window)
+
+
+@timed_callback
+def update_search_graphs(window, seasonality):
+    seasonal_key = "month" if seasonality else None
+    lag = search_sales_lag_figure(window["start"], window["end"], seasonal_key)
+    if ctx.triggered_id == "search-sales-lag-seasonality":
+        return [dash.no_update, dash.no_update, lag]
+    figs = search_figures(window["start"], window["end"]) + [lag]
+    return except_source(figs, SEARCH_GRAPHS, window)
+
+
+@timed_callback
+def update_dataset(_, current):
+    """Send the typed table when the browser has none or an outdated version."""
+    with stage("fetch"):
+        payload = snapshot.typed_payload(DATASET_COLUMNS)
+    if current and current["version"] == payload["version"]:
+        return dash.no_update
+    return payload
+
+
+@timed_callback
+def redraw_weather_graphs(_, window):
+    return weather_figures(window["start"], window["end"])
+
+
+@timed_callback
+def redraw_search_graphs(_, window, seasonality):
+    seasonal_key = "month" if seasonality else None
+    lag = search_sales_lag_figure(window["start"], window["end"], seasonal_key)
+    return search_figures(window["start"], window["end"]) + [lag]
+
+
+if CLIENTSIDE_ZOOM:
+    # The server draws the graphs when a dataset version arrives; every zoom
+    # after that is re-sliced in the browser
+    app.callback(
+        Output("dataset", "data"),
+        Input("dataset-poll", "n_intervals"),
+        State("dataset", "data"),
+    )(update_dataset)
+    app.callback(
+        [Output(graph, "figure") for graph in WEATHER_GRAPHS],
+        Input("dataset", "data"),
+        State("weather-window", "data"),
+        prevent_initial_call=True,
+    )(redraw_weather_graphs)
+    app.callback(
+        [Output(graph, "figure") for graph in SEARCH_GRAPHS],
+        Input("dataset", "data"),
+        State("search-window", "data"),
+        State("search-sales-lag-seasonality", "value"),
+        prevent_initial_call=True,
+    )(redraw_search_graphs)
+    app.clientside_callback(
+        ClientsideFunction(namespace="reslice", function_name="weather_graphs"),
+        [Output(graph, "figure", allow_duplicate=True) for graph in WEATHER_GRAPHS],
+        Input("weather-window", "data"),
+        State("dataset", "data"),
+        [State(graph, "figure") for graph in WEATHER_GRAPHS],
+        prevent_initial_call=True,
+    )
+    app.clientside_callback(
+        ClientsideFunction(namespace="reslice", function_name="search_graphs"),
+        [Output(graph, "figure", allow_duplicate=True) for graph in SEARCH_GRAPHS],
+        Input("search-window", "data"),
+        Input("search-sales-lag-seasonality", "value"),
+        State("dataset", "data"),
+        [State(graph, "figure") for graph in SEARCH_GRAPHS],
+        prevent_initial_call=True,
+    )
+else:
+    app.callback(
+        [Output(graph, "figure") for graph in WEATHER_GRAPHS],
+        Input("weather-window", "data"),
+    )(update_weather_graphs)
+    app.callback(
+        [Output(graph, "figure") for graph in SEARCH_GRAPHS],
+        Input("search-window", "data"),
+        Input("search-sales-lag-seasonality", "value"),
+    )(update_search_graphs)
+
+
+# The figures the page needs on first load, with their arguments
+INITIAL_FIGURES = [
+    (update_monthly_sales_boxplots, ("monthly-sales-boxplots",)),
+    (weather_figures, (None, None)),
+    (search_figures, (None, None)),
+    (search_sales_lag_figure, (None, None, None)),
+]
+
+# Connect, load the snapshot and fill the figure cache in the background
+warm_up = WarmUp(
+    [lambda: snapshot.version]
+    + [functools.partial(callback, *args) for callback, args in INITIAL_FIGURES]
+    + ([lambda: snapshot.typed_payload(DATASET_COLUMNS)] if CLIENTSIDE_ZOOM else [])
+)
+add_readiness_route(app.server, warm_up)
+
+
+def dashboard_stats() -> dict:
+    """Figure cache, query coalescing and warm-up state for /metrics."""
+    cache = figures.stats()
+    status = warm_up.status()
+    stats = {
+        "dashboard_figure_cache_entries": (
+            "gauge",
+            "Figures held by the figure cache",
+            cache["entries"],
+        ),
+        "dashboard_figure_cache_hits_total": (
+            "counter",
+            "Figures served from the figure cache",
+            cache["hits"],
+        ),
+        "dashboard_figure_cache_misses_total": (
+            "counter",
+            "Figures built because the cache had none",
+            cache["misses"],
+        ),
+        "dashboard_figure_cache_evictions_total": (
+            "counter",
+            "Figures dropped from the figure cache",
+            cache["evictions"],
+        ),
+        "dashboard_ready": ("gauge", "1 once the warm-up has finished", status["ready"]),
+        "dashboard_warm_up_seconds": (
+            "gauge",
+            "Duration of the last warm-up",
+            status["seconds"] or 0,
+        ),
+    }
+    # Only the Neo4j backend queries through the async layer; the DuckDB one
+    # must not create its executor just to report zeros
+    if DATA_BACKEND == "neo4j":
+        coalescer = get_query_executor().coalescer
+        stats["neo4j_queries_started_total"] = (
+            "counter",
+            "Queries sent to Neo4j by the async query layer",
+            coalescer.started,
+        )
+        stats["neo4j_queries_shared_total"] = (
+            "counter",
+            "Queries answered by an identical query already in flight",
+            coalescer.shared,
+        )
+    return stats
+
+
+# Prometheus metrics at /metrics; TRACE_LOG=path also writes one JSON line with
+# the callback, stage and query timings per request
+add_metrics_route(app.server)
+registry.add_collector(dashboard_stats)
+if os.getenv("TRACE_LOG"):
+    enable_trace_log(os.environ["TRACE_LOG"])
+
+
+def create_app() -> dash.Dash:
+    """Return the Dash app and start warming it up in the background."""
+    warm_up.start()
+    return app
+
+
+def create_server():
+    """WSGI entry point, e.g. gunicorn "src.web.main:create_server()"."""
+    return create_app().server
+
+
 if __name__ == "__main__":
-    app.run(debug=False, host="0.0.0.0", port=8050)
+    create_app().run(debug=False, host="0.0.0.0", port=8050)
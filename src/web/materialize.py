@@ -0,0 +1,208 @@
+"""
+Typed materialization of query results.
+
+pd.DataFrame(records, columns=keys) keeps what the driver returns: a list of
+Record objects first, then object columns holding neo4j.time.Date values,
+year and month strings and measures that become object dtype as soon as one is
+null. TypedFrameBuilder writes the records chunk by chunk into preallocated NumPy
+columns instead, converting each chunk a column at a time:
+
+    float64 / float32       measures, NaN where null
+    int8 / int16 / int32    counts and the year and month keys ("2019", "01");
+                            pandas' nullable Int8 / Int16 / Int32 if one is null
+    datetime64[M]           month dates, NaT where null
+    datetime64[D]           day dates, NaT where null
+    object                  anything else (names, ids)
+
+With the Neo4j driver the records are consumed from the result stream in
+chunks of CHUNK_SIZE (see result_transformer), so the whole result never exists
+as Record objects. pandas has no month resolution, so month and day dates end up as
+datetime64[s] columns; downcast stores float64 columns as float32.
+"""
+
+import datetime
+import itertools
+
+import numpy as np
+import pandas as pd
+
+INITIAL_CAPACITY = 1024
+CHUNK_SIZE = 1024
+DATE_DTYPES = ("datetime64[M]", "datetime64[D]")
+FLOAT_DTYPES = ("float64", "float32")
+INT_DTYPES = ("int8", "int16", "int32", "int64")
+# datetime.date.toordinal() of 1970-01-01, the epoch of datetime64
+EPOCH_ORDINAL = 719163
+# The int64 value that views as NaT
+NAT = np.iinfo(np.int64).min
+
+
+def _as_date(value):
+    """neo4j.time.Date and datetime.date pass; "YYYY-MM-DD..." strings are parsed."""
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value[:10])
+    return value
+
+
+def _month(value) -> int:
+    if value is None:
+        return NAT
+    value = _as_date(value)
+    return (value.year - 1970) * 12 + value.month - 1
+
+
+def _day(value) -> int:
+    if value is None:
+        return NAT
+    value = _as_date(value)
+    if hasattr(value, "to_ordinal"):  # neo4j.time.Date
+        return value.to_ordinal() - EPOCH_ORDINAL
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def _ordinals(convert):
+    def column(values: list):
+        return np.fromiter(map(convert, values), np.int64, len(values))
+
+    return column
+
+
+def _numbers(values: list) -> np.ndarray:
+    """Floats of numbers or numeric strings ("2019", "01"), NaN for None."""
+    array = np.asarray(values)
+    if array.dtype == object and any(isinstance(value, str) for value in values):
+        # Strings with None: NaN as a string parses like the numbers
+        array = np.array(["nan" if value is None else value for value in values])
+    return array.astype(np.float64)
+
+
+def _column(dtype: str):
+    """(storage dtype, function turning a list of result values into an array)"""
+    if dtype == "datetime64[M]":
+        return np.int64, _ordinals(_month)
+    if dtype == "datetime64[D]":
+        return np.int64, _ordinals(_day)
+    if dtype in FLOAT_DTYPES:
+        return dtype, lambda values: _numbers(values).astype(dtype)
+    if dtype in INT_DTYPES:
+        # Built as floats so a null can be NaN; frame() casts back to integers
+        return np.float64, _numbers
+    if dtype == "object":
+        return object, None
+    raise ValueError(f"Unsupported result dtype {dtype!r}")
+
+
+class TypedFrameBuilder:
+    """
+    Appends chunks of result rows to typed NumPy columns, doubling their
+    capacity when full, and hands them to pandas without another conversion.
+
+    Parameters:
+        keys (list[str]): Result columns, in record order.
+        dtypes (dict): {column: dtype} (see the module docstring); columns not
+            listed stay objects.
+        downcast (bool): Store float64 columns as float32.
+        capacity (int): Rows allocated up front.
+    """
+
+    def __init__(
+        self,
+        keys: list[str],
+        dtypes: dict,
+        downcast: bool = False,
+        capacity: int = INITIAL_CAPACITY,
+    ):
+        self.keys = list(keys)
+        self.dtypes = [dtypes.get(key, "object") for key in self.keys]
+        if downcast:
+            self.dtypes = [
+                "float32" if dtype == "float64" else dtype for dtype in self.dtypes
+            ]
+        columns = [_column(dtype) for dtype in self.dtypes]
+        self._converters = [convert for _, convert in columns]
+        self._columns = [
+            np.empty(max(capacity, 1), dtype=storage) for storage, _ in columns
+        ]
+        self.rows = 0
+
+    def _grow(self, rows: int):
+        capacity = len(self._columns[0])
+        while capacity < rows:
+            capacity *= 2
+        for i, column in enumerate(self._columns):
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[: self.rows] = column[: self.rows]
+            self._columns[i] = grown
+
+    def extend(self, rows: list):
+        """
+        Add rows, tuples of values in the order of `keys` (a Record is such a
+        tuple).
+        """
+        if not rows or not self._columns:
+            self.rows += len(rows)
+            return
+        start, stop = self.rows, self.rows + len(rows)
+        if stop > len(self._columns[0]):
+            self._grow(stop)
+        # tuple.__iter__ skips Record.__iter__, which is written in Python
+        values_by_key = zip(*map(tuple.__iter__, rows))
+        for column, convert, values in zip(
+            self._columns, self._converters, values_by_key
+        ):
+            values = list(values)
+            column[start:stop] = values if convert is None else convert(values)
+        self.rows = stop
+
+    def frame(self) -> pd.DataFrame:
+        data = {}
+        for key, dtype, column in zip(self.keys, self.dtypes, self._columns):
+            column = column[: self.rows]
+            if dtype in DATE_DTYPES:
+                column = column.view(dtype).astype("datetime64[s]")
+            elif dtype in INT_DTYPES:
+                missing = np.isnan(column)
+                if missing.any():
+                    column = pd.arrays.IntegerArray(
+                        np.where(missing, 0, column).astype(dtype), missing
+                    )
+                else:
+                    column = column.astype(dtype)
+            data[key] = column
+        return pd.DataFrame(data, columns=self.keys, copy=False)
+
+
+def result_transformer(dtypes: dict, downcast: bool = False):
+    """
+    A result_transformer_ for Driver.execute_query that streams the records
+    into a TypedFrameBuilder.
+
+    Returns:
+        Callable: Result -> (pd.DataFrame, ResultSummary).
+    """
+
+    def transform(result):
+        builder = TypedFrameBuilder(result.keys(), dtypes, downcast)
+        records = iter(result)
+        while chunk := list(itertools.islice(records, CHUNK_SIZE)):
+            builder.extend(chunk)
+        return builder.frame(), result.consume()
+
+    return transform
+
+
+def records_frame(
+    records, keys: list[str], dtypes: dict, downcast: bool = False
+) -> pd.DataFrame:
+    """
+    Typed frame of records that were already fetched: Records, or mappings
+    such as the rows of stand-in drivers.
+    """
+    builder = TypedFrameBuilder(keys, dtypes, downcast, capacity=len(records))
+    builder.extend(
+        [
+            record if isinstance(record, tuple) else tuple(record[k] for k in keys)
+            for record in records
+        ]
+    )
+    return builder.frame()
@@ -0,0 +1,248 @@
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+from flask import Flask, Response, request
+
+# Upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+trace_log = logging.getLogger(__name__ + ".trace")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple, extra: str = "") -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Registry:
+    """
+    Latency histograms and collected values in the Prometheus text format.
+
+    Histograms are created on first observation. Collectors are functions that
+    return {metric name: (type, help, value)} and are called on every render, for
+    values that live elsewhere (cache statistics, warm-up state, ...).
+    """
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._collectors = []
+
+    def observe(self, name: str, help: str, seconds: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, (help, {}))[1]
+            counts = series.setdefault(key, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+            counts[-2] += seconds
+            counts[-1] += 1
+
+    def add_collector(self, collector: Callable[[], dict]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            histograms = {
+                name: (help, {key: list(counts) for key, counts in series.items()})
+                for name, (help, series) in self._histograms.items()
+            }
+        for name, (help, series) in sorted(histograms.items()):
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+            bounds = [f'le="{bound}"' for bound in self.buckets] + ['le="+Inf"']
+            for key, counts in sorted(series.items()):
+                cumulative = counts[: len(self.buckets)] + [counts[-1]]
+                for bound, count in zip(bounds, cumulative):
+                    lines.append(f"{name}_bucket{_labels(key, bound)} {count}")
+                lines.append(f"{name}_sum{_labels(key)} {counts[-2]}")
+                lines.append(f"{name}_count{_labels(key)} {counts[-1]}")
+        for collector in self._collectors:
+            for name, (kind, help, value) in collector().items():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                lines.append(f"{name} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class Trace:
+    """Timings of one request: the callback, its stages and its queries."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.callback = None
+        self.stages = {}
+        self.queries = []
+        # Running stages, innermost last, as [name, seconds spent in children]
+        self.stack = []
+
+    def as_dict(self, seconds: float) -> dict:
+        return {
+            "path": self.path,
+            "callback": self.callback,
+            "seconds": round(seconds, 6),
+            "stages": {name: round(s, 6) for name, s in self.stages.items()},
+            "queries": self.queries,
+        }
+
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+@contextmanager
+def _tracing():
+    """The current trace, or one that lasts for the block outside a request."""
+    trace = _trace.get()
+    if trace is not None:
+        yield trace
+        return
+    token = _trace.set(Trace())
+    try:
+        yield _trace.get()
+    finally:
+        _trace.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a stage of the current callback (e.g. "fetch", "transform", "figure").
+
+    Stages nest; a stage is only charged for the time not spent in the stages
+    inside it, so no time is counted twice.
+    """
+    with _tracing() as trace, _stage(trace, name):
+        yield
+
+
+@contextmanager
+def _stage(trace: Trace, name: str):
+    frame = [name, 0.0]
+    trace.stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        trace.stack.pop()
+        if trace.stack:
+            trace.stack[-1][1] += elapsed
+        own = elapsed - frame[1]
+        trace.stages[name] = trace.stages.get(name, 0.0) + own
+        registry.observe(
+            "dashboard_stage_seconds",
+            "Time spent per callback stage, excluding nested stages",
+            own,
+            callback=trace.callback or "none",
+            stage=name,
+        )
+
+
+def timed_callback(func: Callable) -> Callable:
+    """Decorate a Dash callback to record its run time and name its stages."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with _tracing() as trace:
+                trace.callback = func.__name__
+                return func(*args, **kwargs)
+        finally:
+            registry.observe(
+                "dashboard_callback_seconds",
+                "Run time of dashboard callbacks",
+                time.perf_counter() - start,
+                callback=func.__name__,
+            )
+
+    return wrapper
+
+
+def observe_query(name: str, seconds: float, summary=None):
+    """
+    Record a Neo4j query: the client-side round trip and, from the
+    ResultSummary, the time until the first record was available and until
+    the result was consumed.
+    """
+    registry.observe(
+        "neo4j_query_seconds", "Client-side Neo4j round trip time", seconds, query=name
+    )
+    timing = {"query": name, "seconds": round(seconds, 6)}
+    for field in ("result_available_after", "result_consumed_after"):
+        ms = getattr(summary, field, None)
+        if ms is not None:
+            registry.observe(
+                f"neo4j_{field}_seconds",
+                f"Neo4j {field.replace('_', ' ')} from the result summary",
+                ms / 1000,
+                query=name,
+            )
+            timing[f"{field}_ms"] = ms
+    trace = _trace.get()
+    if trace is not None:
+        trace.queries.append(timing)
+
+
+def add_metrics_route(server: Flask, path: str = "/metrics"):
+    """
+    Serve the registry at `path` and time every request of `server`.
+
+    Each request gets its own trace; with the trace logger enabled (see
+    enable_trace_log) it is written as one JSON line once the response is ready,
+    so the gap between "seconds" and the callback's stages is Dash's own
+    response serialization.
+    """
+
+    @server.before_request
+    def start_trace():
+        _trace.set(Trace(request.path))
+        request.environ["metrics.start"] = time.perf_counter()
+
+    @server.after_request
+    def finish_trace(response):
+        start = request.environ.get("metrics.start")
+        if start is None:
+            return response
+        seconds = time.perf_counter() - start
+        registry.observe(
+            "dashboard_request_seconds",
+            "Time to answer HTTP requests",
+            seconds,
+            endpoint=request.endpoint or "none",
+        )
+        trace = _trace.get()
+        if trace is not None and trace_log.isEnabledFor(logging.INFO):
+            if trace.callback or trace.queries:
+                trace_log.info(json.dumps(trace.as_dict(seconds)))
+        return response
+
+    def metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+    server.add_url_rule(path, "metrics", metrics)
+
+
+def enable_trace_log(path: str):
+    """Append one JSON line per traced request to the file at `path`."""
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    trace_log.addHandler(handler)
+    trace_log.setLevel(logging.INFO)
+    trace_log.propagate = False
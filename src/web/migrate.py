@@ -0,0 +1,157 @@
+"""
+Migrate the monthly data from the nodes layout to the compact layout.
+
+The nodes layout (loader.LOAD_BATCH, create_graph.cypher) keeps every measure
+of a month in its own node, so reading one month's row walks some 15
+relationships from its Date node. The compact layout keeps the month in one
+Observation node with every measure as a property (see queries.GRAPH_SCHEMAS).
+
+The migration runs inside Neo4j in batches of --batch-size Date nodes, reading
+the measures with the same expressions queries.get_sales_data uses. It then
+checks that get_sales_data returns the same frame from both layouts, and only
+with --drop (and only if they match) deletes the nodes layout. Afterwards run
+the dashboard with GRAPH_SCHEMA=compact.
+
+Usage: python -m src.web.migrate [--batch-size N] [--drop]
+"""
+
+import argparse
+import time
+
+from neo4j import Driver, Session
+
+from .loader import COMPACT_SCHEMA, create_schema, set_graph_version
+from .queries import SALES_DATA_COLUMNS, SALES_DATA_PARENTS, get_sales_data
+
+# Labels of the nodes layout, deleted by --drop
+NODE_LAYOUT_LABELS = [
+    "Date",
+    "Year",
+    "Month",
+    "Season",
+    "Weather",
+    "WindSpeed",
+    "Rain",
+    "Temperature",
+    "Sales",
+    "Trade",
+    "Internet",
+    "MultiChannel",
+    "Fashion",
+    "Electronics",
+    "Food",
+    "NonFood",
+    "GoogleTrends",
+    "FashionSearch",
+    "ElectronicsSearch",
+    "FoodSearch",
+    "NonFoodSearch",
+]
+
+_SETS = ",\n        ".join(
+    [
+        "o.id = d.id",
+        "o.year = y.value",
+        "o.month = m.value",
+        "o.season = se.name",
+        "o.weather_score = w.score",
+        "o.search_average = gt.average",
+        "o.search_total = gt.total",
+    ]
+    + [
+        f"o.{col} = {expression}"
+        for col, (_, expression) in SALES_DATA_COLUMNS.items()
+    ]
+)
+
+MIGRATE = f"""
+MATCH (d:Date)
+CALL {{
+    WITH d
+    OPTIONAL MATCH (d)-[:year]->(y:Year)
+    OPTIONAL MATCH (d)-[:month]->(m:Month)
+    OPTIONAL MATCH (d)-[:season]->(se:Season)
+    {SALES_DATA_PARENTS["w"]}
+    {SALES_DATA_PARENTS["s"]}
+    {SALES_DATA_PARENTS["gt"]}
+    MERGE (o:Observation {{value: d.value}})
+    SET {_SETS}
+}} IN TRANSACTIONS OF $batch_size ROWS
+"""
+
+DROP_NODE_LAYOUT = """
+MATCH (n) WHERE any(label IN labels(n) WHERE label IN $labels)
+CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+
+def migrate(driver: Driver, batch_size: int = 1000) -> dict:
+    """
+    Write an Observation node for every Date node of the nodes layout.
+
+    Returns:
+        dict: Number of Observation nodes and elapsed seconds.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+
+    start = time.perf_counter()
+    with driver.session() as session:
+        create_schema(session, COMPACT_SCHEMA)
+        session.run(MIGRATE, batch_size=batch_size).consume()
+        set_graph_version(session)
+        observations = session.run(
+            "MATCH (o:Observation) RETURN count(o) AS n"
+        ).single()["n"]
+    return {"rows": observations, "seconds": time.perf_counter() - start}
+
+
+def compare_layouts(driver: Driver) -> list[str]:
+    """
+    Columns in which get_sales_data differs between the two layouts.
+
+    Returns:
+        list[str]: Empty if both layouts return the same frame; "rows" if they
+        do not even have the same months.
+    """
+    nodes = get_sales_data(driver, schema="nodes")
+    compact = get_sales_data(driver, schema="compact")
+    if len(nodes) != len(compact) or not nodes["date"].equals(compact["date"]):
+        return ["rows"]
+    return [col for col in nodes.columns if not nodes[col].equals(compact[col])]
+
+
+def drop_node_layout(session: Session):
+    session.run(DROP_NODE_LAYOUT, labels=NODE_LAYOUT_LABELS).consume()
+    set_graph_version(session)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="delete the nodes layout once both layouts return the same data",
+    )
+    args = parser.parse_args()
+
+    from .database import driver
+
+    stats = migrate(driver, args.batch_size)
+    print(f"Wrote {stats['rows']} Observation nodes in {stats['seconds']:.2f}s")
+    differences = compare_layouts(driver)
+    if differences:
+        print(f"The layouts differ in: {', '.join(differences)}")
+        if args.drop:
+            print("Keeping the nodes layout.")
+        raise SystemExit(1)
+    print("get_sales_data returns the same frame from both layouts")
+    if args.drop:
+        with driver.session() as session:
+            drop_node_layout(session)
+        print("Deleted the nodes layout; run with GRAPH_SCHEMA=compact")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compare database hits of the dashboard queries with PROFILE.
+
+Runs the get_sales_weather_data* / get_sales_google_trends_data* pair the
+dashboard used to issue per callback against the single get_sales_data query,
+for the full history and for a one-year window, and prints the db hits and
+server-side timings reported by Neo4j.
+
+Usage: python -m src.web.profile_queries
+"""
+
+from neo4j import Driver
+
+from .queries import (
+    get_sales_data,
+    get_sales_google_trends_data,
+    get_sales_google_trends_data_by_date_range,
+    get_sales_weather_data,
+    get_sales_weather_data_by_date_range,
+)
+
+
+class ProfilingDriver:
+    """Driver wrapper that prefixes every query with PROFILE and keeps the summaries."""
+
+    def __init__(self, driver: Driver):
+        self.driver = driver
+        self.summaries = []
+
+    def execute_query(self, query, *args, **kwargs):
+        records, summary, keys = self.driver.execute_query(
+            "PROFILE " + query, *args, **kwargs
+        )
+        self.summaries.append(summary)
+        return records, summary, keys
+
+
+def total_db_hits(plan: dict) -> int:
+    return plan.get("dbHits", 0) + sum(
+        total_db_hits(child) for child in plan.get("children", [])
+    )
+
+
+def expanded_rows(plan: dict) -> int:
+    """Rows produced by the Expand operators: the relationships walked."""
+    own = plan.get("rows", 0) if "Expand" in plan.get("operatorType", "") else 0
+    return own + sum(expanded_rows(child) for child in plan.get("children", []))
+
+
+def global_memory(plan: dict) -> int:
+    """Peak memory of the query in bytes, as reported on the root operator."""
+    return plan.get("args", {}).get("GlobalMemory", 0)
+
+
+def profile(driver: Driver, *calls) -> dict:
+    """Run each (function, args) pair through PROFILE and sum db hits and timings."""
+    profiling = ProfilingDriver(driver)
+    for func, args in calls:
+        func(profiling, *args)
+    return {
+        "queries": len(profiling.summaries),
+        "db_hits": sum(total_db_hits(s.profile) for s in profiling.summaries),
+        "hops": sum(expanded_rows(s.profile) for s in profiling.summaries),
+        "memory_bytes": sum(global_memory(s.profile) for s in profiling.summaries),
+        "available_after_ms": sum(
+            s.result_available_after or 0 for s in profiling.summaries
+        ),
+        "consumed_after_ms": sum(
+            s.result_consumed_after or 0 for s in profiling.summaries
+        ),
+    }
+
+
+def main():
+    from .database import driver
+
+    window = ("2022-01-01", "2022-12-01")
+    columns = [
+        "fashion_search",
+        "electronics_search",
+        "retail_sale_of_clothes_and_fashion_items",
+        "retail_sale_of_consumer_electronics",
+    ]
+    cases = {
+        "pair, all dates": [
+            (get_sales_weather_data, ()),
+            (get_sales_google_trends_data, ()),
+        ],
+        "get_sales_data, all dates": [(get_sales_data, ())],
+        "pair, 2022": [
+            (get_sales_weather_data_by_date_range, window),
+            (get_sales_google_trends_data_by_date_range, window),
+        ],
+        "get_sales_data, 2022": [(get_sales_data, window)],
+        "get_sales_data, 2022, 4 columns": [(get_sales_data, (*window, columns))],
+    }
+
+    print(f"{'case':<36}{'queries':>8}{'db hits':>10}{'avail ms':>10}{'cons ms':>10}")
+    for name, calls in cases.items():
+        result = profile(driver, *calls)
+        print(
+            f"{name:<36}{result['queries']:>8}{result['db_hits']:>10}"
+            f"{result['available_after_ms']:>10}{result['consumed_after_ms']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
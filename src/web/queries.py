@@ -1,8 +1,83 @@
+import os
+import time
+
 import pandas as pd
 from neo4j import Driver
 
+from .materialize import records_frame, result_transformer
+from .metrics import observe_query
+
+# Layouts of the monthly sales, weather and search data (see loader.py):
+#   nodes    a Date node per month with a node per measure (LOAD_BATCH)
+#   compact  an Observation node per month with every measure as a property
+#            (LOAD_OBSERVATIONS, or migrate.py from the nodes layout)
+GRAPH_SCHEMAS = ("nodes", "compact")
+GRAPH_SCHEMA = os.getenv("GRAPH_SCHEMA", "nodes")
+
+
+def graph_schema(schema: str | None = None) -> str:
+    """`schema`, or GRAPH_SCHEMA if None, checked against GRAPH_SCHEMAS."""
+    schema = schema or GRAPH_SCHEMA
+    if schema not in GRAPH_SCHEMAS:
+        raise ValueError(
+            f"Unknown graph schema {schema!r}, expected one of {list(GRAPH_SCHEMAS)}"
+        )
+    return schema
+
+
+def execute(driver: Driver, name: str, query: str, **parameters):
+    """
+    driver.execute_query, with its timings recorded under `name` (see metrics.py).
+
+    Returns:
+        tuple: records, summary and keys, as Driver.execute_query.
+    """
+    start = time.perf_counter()
+    records, summary, keys = driver.execute_query(query, **parameters)
+    observe_query(name, time.perf_counter() - start, summary)
+    return records, summary, keys
+
+
+def execute_frame(
+    driver: Driver,
+    name: str,
+    query: str,
+    dtypes: dict | None = None,
+    downcast: bool = False,
+    **parameters,
+) -> pd.DataFrame:
+    """
+    execute(), materialized as a DataFrame.
+
+    Parameters:
+        dtypes (dict): {column: dtype} of the typed result path (see
+            materialize.py), or None for the values as the driver returns them.
+        downcast (bool): Store float64 columns of the typed path as float32.
 
-def get_sales_weather_data(driver: Driver) -> pd.DataFrame:
+    Returns:
+        pd.DataFrame: One row per record, columns in result order.
+    """
+    if dtypes is None:
+        records, summary, keys = execute(driver, name, query, **parameters)
+        return pd.DataFrame(records, columns=keys)
+    start = time.perf_counter()
+    if isinstance(driver, Driver):
+        # Stream the records into the typed columns as they arrive
+        data, summary = driver.execute_query(
+            query, parameters, result_transformer_=result_transformer(dtypes, downcast)
+        )
+    else:
+        records, summary, keys = driver.execute_query(query, **parameters)
+        data = records_frame(records, keys, dtypes, downcast)
+    observe_query(name, time.perf_counter() - start, summary)
+    return data
+
+
+def get_sales_weather_data(
+    driver: Driver, schema: str | None = None
+) -> pd.DataFrame:
+    if graph_schema(schema) == "compact":
+        return _get_observations(driver, "get_sales_weather_data", WEATHER_COLUMNS)
     query = """
     MATCH (d:Date)-[year]->(y:Year)
     MATCH (d)-[month]->(m:Month)
@@ -37,12 +112,18 @@ def get_sales_weather_data(driver: Driver) -> pd.DataFrame:
            rfo.value AS retail_sale_of_food_and_drugstore_items,
            rnf.value AS retail_sale_of_other_non_food
     """
-    records, summary, keys = driver.execute_query(query)
+    records, summary, keys = execute(driver, "get_sales_weather_data", query)
     data = pd.DataFrame(records, columns=keys)
     return data
 
 
-def get_sales_weather_data_by_date(driver: Driver, date: str) -> pd.DataFrame:
+def get_sales_weather_data_by_date(
+    driver: Driver, date: str, schema: str | None = None
+) -> pd.DataFrame:
+    if graph_schema(schema) == "compact":
+        return _get_observations(
+            driver, "get_sales_weather_data_by_date", WEATHER_COLUMNS, date, date
+        )
     query = """
     MATCH (d:Date {value: date($date)})-[year]->(y:Year)
     MATCH (d)-[month]->(m:Month)
@@ -78,14 +159,27 @@ def get_sales_weather_data_by_date(driver: Driver, date: str) -> pd.DataFrame:
            rfo.value AS retail_sale_of_food_and_drugstore_items,
            rnf.value AS retail_sale_of_other_non_food
     """
-    records, summary, keys = driver.execute_query(query, date=date)
+    records, summary, keys = execute(
+        driver,
+        "get_sales_weather_data_by_date",
+        query,
+        date=date,
+    )
     data = pd.DataFrame(records, columns=keys)
     return data
 
 
 def get_sales_weather_data_by_date_range(
-    driver: Driver, start_date: str, end_date: str
+    driver: Driver, start_date: str, end_date: str, schema: str | None = None
 ) -> pd.DataFrame:
+    if graph_schema(schema) == "compact":
+        return _get_observations(
+            driver,
+            "get_sales_weather_data_by_date_range",
+            WEATHER_COLUMNS,
+            start_date,
+            end_date,
+        )
     query = """
     MATCH (d:Date)-[year]->(y:Year)
     WHERE d.value >= date($start_date) AND d.value <= date($end_date)
@@ -122,11 +216,23 @@ def get_sales_weather_data_by_date_range(
            rfo.value AS retail_sale_of_food_and_drugstore_items,
            rnf.value AS retail_sale_of_other_non_food
     """
-    records, summary, keys = driver.execute_query(query, start_date=start_date, end_date=end_date)
+    records, summary, keys = execute(
+        driver,
+        "get_sales_weather_data_by_date_range",
+        query,
+        start_date=start_date,
+        end_date=end_date,
+    )
     data = pd.DataFrame(records, columns=keys)
     return data
 
-def get_sales_google_trends_data(driver: Driver) -> pd.DataFrame:
+def get_sales_google_trends_data(
+    driver: Driver, schema: str | None = None
+) -> pd.DataFrame:
+    if graph_schema(schema) == "compact":
+        return _get_observations(
+            driver, "get_sales_google_trends_data", GOOGLE_TRENDS_COLUMNS
+        )
     query = """
     MATCH (d:Date)-[year]->(y:Year)
     MATCH (d)-[month]->(m:Month)
@@ -150,11 +256,21 @@ def get_sales_google_trends_data(driver: Driver) -> pd.DataFrame:
            o.value AS non_food_search,
            vo.value AS retail_sale_via_internet
     """
-    records, summary, keys = driver.execute_query(query)
+    records, summary, keys = execute(driver, "get_sales_google_trends_data", query)
     data = pd.DataFrame(records, columns=keys)
     return data
 
-def get_sales_google_trends_data_by_date(driver: Driver, date: str) -> pd.DataFrame:
+def get_sales_google_trends_data_by_date(
+    driver: Driver, date: str, schema: str | None = None
+) -> pd.DataFrame:
+    if graph_schema(schema) == "compact":
+        return _get_observations(
+            driver,
+            "get_sales_google_trends_data_by_date",
+            GOOGLE_TRENDS_COLUMNS,
+            date,
+            date,
+        )
     query = """
     MATCH (d:Date {value: date($date)})-[year]->(y:Year)
     MATCH (d)-[month]->(m:Month)
@@ -178,13 +294,26 @@ def get_sales_google_trends_data_by_date(driver: Driver, date: str) -> pd.DataFr
            o.value AS non_food_search,
            vo.value AS retail_sale_via_internet
     """
-    records, summary, keys = driver.execute_query(query, date=date)
+    records, summary, keys = execute(
+        driver,
+        "get_sales_google_trends_data_by_date",
+        query,
+        date=date,
+    )
     data = pd.DataFrame(records, columns=keys)
     return data
 
 def get_sales_google_trends_data_by_date_range(
-    driver: Driver, start_date: str, end_date: str
+    driver: Driver, start_date: str, end_date: str, schema: str | None = None
 ) -> pd.DataFrame:
+    if graph_schema(schema) == "compact":
+        return _get_observations(
+            driver,
+            "get_sales_google_trends_data_by_date_range",
+            GOOGLE_TRENDS_COLUMNS,
+            start_date,
+            end_date,
+        )
     query = """
     MATCH (d:Date)-[year]->(y:Year)
     WHERE d.value >= date($start_date) AND d.value <= date($end_date)
@@ -209,6 +338,527 @@ def get_sales_google_trends_data_by_date_range(
            o.value AS non_food_search,
            vo.value AS retail_sale_via_internet
     """
-    records, summary, keys = driver.execute_query(query, start_date=start_date, end_date=end_date)
+    records, summary, keys = execute(
+        driver,
+        "get_sales_google_trends_data_by_date_range",
+        query,
+        start_date=start_date,
+        end_date=end_date,
+    )
     data = pd.DataFrame(records, columns=keys)
     return data
+
+
+def get_graph_version(driver: Driver, schema: str | None = None) -> tuple:
+    label = "Observation" if graph_schema(schema) == "compact" else "Date"
+    query = f"""
+    MATCH (d:{label})
+    WITH count(d) AS dates, max(d.value) AS last_date
+    OPTIONAL MATCH (v:GraphVersion)
+    RETURN v.value AS version, dates, last_date
+    """
+    records, summary, keys = execute(driver, "get_graph_version", query)
+    if not records:
+        return (None, 0, None)
+    record = records[0]
+    return (record["version"], record["dates"], record["last_date"])
+
+
+WEATHER_COLUMNS = [
+    "wind_speed",
+    "rain",
+    "temp",
+    "total_calc_channels",
+    "total_calc_categories",
+    "retail_trade",
+    "retail_sale_via_internet",
+    "multi_channel",
+    "retail_sale_of_clothes_and_fashion_items",
+    "retail_sale_of_consumer_electronics",
+    "retail_sale_of_food_and_drugstore_items",
+    "retail_sale_of_other_non_food",
+]
+
+GOOGLE_TRENDS_COLUMNS = [
+    "google_trends",
+    "fashion_search",
+    "electronics_search",
+    "food_search",
+    "non_food_search",
+    "retail_sale_via_internet",
+]
+
+# column -> (node it hangs off, expression evaluated per date row)
+SALES_DATA_COLUMNS = {
+    "wind_speed": ("w", "[(w)-[:wind]->(n:WindSpeed) | n.value][0]"),
+    "rain": ("w", "[(w)-[:rain]->(n:Rain) | n.value][0]"),
+    "temp": ("w", "[(w)-[:temperature]->(n:Temperature) | n.value][0]"),
+    "total_calc_channels": ("s", "s.total_calc_channels"),
+    "total_calc_categories": ("s", "s.total_calc_categories"),
+    "retail_trade": ("s", "[(s)-[:total]->(n:Trade) | n.value][0]"),
+    "retail_sale_via_internet": ("s", "[(s)-[:online]->(n:Internet) | n.value][0]"),
+    "multi_channel": ("s", "[(s)-[:multi_channel]->(n:MultiChannel) | n.value][0]"),
+    "retail_sale_of_clothes_and_fashion_items": (
+        "s",
+        "[(s)-[:fashion]->(n:Fashion) | n.value][0]",
+    ),
+    "retail_sale_of_consumer_electronics": (
+        "s",
+        "[(s)-[:electronics]->(n:Electronics) | n.value][0]",
+    ),
+    "retail_sale_of_food_and_drugstore_items": (
+        "s",
+        "[(s)-[:food]->(n:Food) | n.value][0]",
+    ),
+    "retail_sale_of_other_non_food": (
+        "s",
+        "[(s)-[:non_food]->(n:NonFood) | n.value][0]",
+    ),
+    "google_trends": ("gt", "gt.value"),
+    "fashion_search": ("gt", "[(gt)-[:fashion]->(n:FashionSearch) | n.value][0]"),
+    "electronics_search": (
+        "gt",
+        "[(gt)-[:electronics]->(n:ElectronicsSearch) | n.value][0]",
+    ),
+    "food_search": ("gt", "[(gt)-[:food]->(n:FoodSearch) | n.value][0]"),
+    "non_food_search": ("gt", "[(gt)-[:non_food]->(n:NonFoodSearch) | n.value][0]"),
+}
+
+SALES_DATA_PARENTS = {
+    "w": "OPTIONAL MATCH (d)-[:weather]->(w:Weather)",
+    "s": "OPTIONAL MATCH (d)-[:sales]->(s:Sales)",
+    "gt": "OPTIONAL MATCH (d)-[:google_trends]->(gt:GoogleTrends)",
+}
+
+# Column dtypes of the typed result path (see materialize.py)
+SALES_DATA_DTYPES = {
+    "year": "int16",
+    "month": "int8",
+    "date": "datetime64[M]",
+    **{col: "float64" for col in SALES_DATA_COLUMNS},
+}
+
+
+def _window_conditions(variable: str, start_date, end_date) -> str:
+    conditions = []
+    if start_date is not None:
+        conditions.append(f"{variable}.value >= date($start_date)")
+    if end_date is not None:
+        conditions.append(f"{variable}.value <= date($end_date)")
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def get_sales_data(
+    driver: Driver,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    columns: list[str] | None = None,
+    schema: str | None = None,
+    typed: bool = False,
+    downcast: bool = False,
+) -> pd.DataFrame:
+    """
+    Fetch weather, sales and search columns for a date window in one round trip.
+
+    Parameters:
+        start_date (str): First date (YYYY-MM-DD) to include, unbounded if None.
+        end_date (str): Last date (YYYY-MM-DD) to include, unbounded if None.
+        columns (list[str]): Keys of SALES_DATA_COLUMNS to return, all if None.
+        schema (str): Graph layout to read (see GRAPH_SCHEMAS), GRAPH_SCHEMA if
+            None. Both return the same frame.
+        typed (bool): Materialize into the dtypes of SALES_DATA_DTYPES (int
+            year and month, datetime64 dates, float measures) instead of the
+            driver's Python values.
+        downcast (bool): With typed, return the measures as float32.
+
+    Returns:
+        pd.DataFrame: year, month and date followed by the requested columns,
+        one row per month ordered by date.
+    """
+    if columns is None:
+        columns = list(SALES_DATA_COLUMNS)
+    unknown = [col for col in columns if col not in SALES_DATA_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown sales data columns: {unknown}")
+    columns = list(dict.fromkeys(columns))
+    dtypes = SALES_DATA_DTYPES if typed else None
+    if graph_schema(schema) == "compact":
+        return _get_observations(
+            driver, "get_sales_data", columns, start_date, end_date, dtypes, downcast
+        )
+
+    where = _window_conditions("d", start_date, end_date)
+    parents = dict.fromkeys(SALES_DATA_COLUMNS[col][0] for col in columns)
+    optional_matches = "\n    ".join(SALES_DATA_PARENTS[p] for p in parents)
+    returns = ",\n           ".join(
+        f"{SALES_DATA_COLUMNS[col][1]} AS {col}" for col in columns
+    )
+    query = f"""
+    MATCH (d:Date)
+    {where}
+    MATCH (d)-[:year]->(y:Year)
+    MATCH (d)-[:month]->(m:Month)
+    {optional_matches}
+
+    RETURN y.value AS year,
+           m.value AS month,
+           d.value AS date{"," if returns else ""}
+           {returns}
+    ORDER BY date
+    """
+    return execute_frame(
+        driver,
+        "get_sales_data",
+        query,
+        dtypes,
+        downcast,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+def _get_observations(
+    driver: Driver,
+    name: str,
+    columns: list[str],
+    start_date: str | None = None,
+    end_date: str | None = None,
+    dtypes: dict | None = None,
+    downcast: bool = False,
+) -> pd.DataFrame:
+    """
+    get_sales_data on the compact layout, where every column is a property of
+    the month's Observation node: one index range scan, no relationships.
+    """
+    returns = "".join(f",\n           o.{col} AS {col}" for col in columns)
+    query = f"""
+    MATCH (o:Observation)
+    {_window_conditions("o", start_date, end_date)}
+    RETURN o.year AS year,
+           o.month AS month,
+           o.value AS date{returns}
+    ORDER BY date
+    """
+    return execute_frame(
+        driver, name, query, dtypes, downcast, start_date=start_date, end_date=end_date
+    )
+
+
+# resolution -> (node label, days per row, rainfall total per row)
+DAILY_WEATHER_LEVELS = {
+    "day": ("Day", "1", "n.rainfall"),
+    "week": ("Week", "n.days", "n.rainfall_total"),
+    "month": ("CalendarMonth", "n.days", "n.rainfall_total"),
+}
+
+DAILY_WEATHER_DTYPES = {
+    "date": "datetime64[D]",
+    "days": "int8",
+    "rainfall": "float64",
+    "rainfall_total": "float64",
+    "wind_speed": "float64",
+    "temperature": "float64",
+}
+
+
+def get_daily_weather(
+    driver: Driver,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    resolution: str = "day",
+    typed: bool = False,
+    downcast: bool = False,
+) -> pd.DataFrame:
+    """
+    Fetch national weather per day, week or month for a date window.
+
+    Weeks and months are read from the rollup nodes written by
+    loader.load_daily, so a window costs one indexed node per row at every
+    resolution. A week or month is included when its first day is in the window.
+
+    Parameters:
+        start_date (str): First date (YYYY-MM-DD) to include, unbounded if None.
+        end_date (str): Last date (YYYY-MM-DD) to include, unbounded if None.
+        resolution (str): "day", "week" or "month".
+        typed (bool): Materialize into the dtypes of DAILY_WEATHER_DTYPES.
+        downcast (bool): With typed, return the measures as float32.
+
+    Returns:
+        pd.DataFrame: date (first day of the period), days, the mean rainfall,
+        wind_speed and temperature per day and rainfall_total, ordered by date.
+    """
+    if resolution not in DAILY_WEATHER_LEVELS:
+        raise ValueError(
+            f"Unknown resolution {resolution!r}, expected one of "
+            f"{list(DAILY_WEATHER_LEVELS)}"
+        )
+    label, days, rainfall_total = DAILY_WEATHER_LEVELS[resolution]
+    conditions = _window_conditions("n", start_date, end_date)
+    if resolution != "day":
+        # Station and product loads create CalendarMonth nodes that hold no
+        # rollup; only the ones written by load_daily have days
+        rolled_up = "n.days IS NOT NULL"
+        conditions = (
+            f"{conditions} AND {rolled_up}" if conditions else f"WHERE {rolled_up}"
+        )
+    query = f"""
+    MATCH (n:{label})
+    {conditions}
+    RETURN n.value AS date,
+           {days} AS days,
+           n.rainfall AS rainfall,
+           {rainfall_total} AS rainfall_total,
+           n.wind_speed AS wind_speed,
+           n.temperature AS temperature
+    ORDER BY date
+    """
+    return execute_frame(
+        driver,
+        f"get_daily_weather_{resolution}",
+        query,
+        DAILY_WEATHER_DTYPES if typed else None,
+        downcast,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+def get_regional_weather(
+    driver: Driver,
+    scheme: str = "province",
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> pd.DataFrame:
+    """
+    Fetch the interpolated monthly weather of every region of a scheme.
+
+    Parameters:
+        scheme (str): "province" or "grid" (see preprocessing/stations.py).
+        start_date (str): First month (YYYY-MM-DD) to include, unbounded if None.
+        end_date (str): Last month (YYYY-MM-DD) to include, unbounded if None.
+
+    Returns:
+        pd.DataFrame: region, name, date, rain, wind_speed and temp, ordered by
+        region and date.
+    """
+    query = f"""
+    MATCH (r:Region {{scheme: $scheme}})-[w:weather]->(m:CalendarMonth)
+    {_window_conditions("m", start_date, end_date)}
+    RETURN r.id AS region,
+           r.name AS name,
+           m.value AS date,
+           w.rainfall AS rain,
+           w.wind_speed AS wind_speed,
+           w.temperature AS temp
+    ORDER BY region, date
+    """
+    records, summary, keys = execute(
+        driver,
+        "get_regional_weather",
+        query,
+        scheme=scheme,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    return pd.DataFrame(records, columns=keys)
+
+
+def get_regional_sales_weather(
+    driver: Driver,
+    region: str,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    schema: str | None = None,
+) -> pd.DataFrame:
+    """
+    Fetch a region's monthly weather next to the national sales of that month.
+
+    The weather comes from the precomputed Region relationships, so no station
+    data is read. Months without a Date node (no sales loaded) are left out.
+
+    Parameters:
+        region (str): Region id, e.g. "province:Utrecht".
+        start_date (str): First month (YYYY-MM-DD) to include, unbounded if None.
+        end_date (str): Last month (YYYY-MM-DD) to include, unbounded if None.
+        schema (str): Graph layout of the sales (see GRAPH_SCHEMAS).
+
+    Returns:
+        pd.DataFrame: date, rain, wind_speed, temp and the sales columns of
+        SALES_DATA_COLUMNS, ordered by date.
+    """
+    sales_columns = [
+        col for col, (parent, _) in SALES_DATA_COLUMNS.items() if parent == "s"
+    ]
+    if graph_schema(schema) == "compact":
+        month = "MATCH (o:Observation {value: m.value})"
+        expressions = [f"o.{col}" for col in sales_columns]
+    else:
+        month = f"MATCH (d:Date {{value: m.value}})\n    {SALES_DATA_PARENTS['s']}"
+        expressions = [SALES_DATA_COLUMNS[col][1] for col in sales_columns]
+    sales = ",\n           ".join(
+        f"{expression} AS {col}" for col, expression in zip(sales_columns, expressions)
+    )
+    query = f"""
+    MATCH (:Region {{id: $region}})-[w:weather]->(m:CalendarMonth)
+    {_window_conditions("m", start_date, end_date)}
+    {month}
+    RETURN m.value AS date,
+           w.rainfall AS rain,
+           w.wind_speed AS wind_speed,
+           w.temperature AS temp,
+           {sales}
+    ORDER BY date
+    """
+    records, summary, keys = execute(
+        driver,
+        "get_regional_sales_weather",
+        query,
+        region=region,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    return pd.DataFrame(records, columns=keys)
+
+
+def get_products(driver: Driver, category: str | None = None) -> pd.DataFrame:
+    """
+    List the products loaded by loader.load_products.
+
+    Parameters:
+        category (str): Only list the products of this category, all if None.
+
+    Returns:
+        pd.DataFrame: product and category, ordered by category and product.
+    """
+    query = """
+    MATCH (p:Product)-[:in_category]->(c:Category)
+    WHERE $category IS NULL OR c.name = $category
+    RETURN p.name AS product, c.name AS category
+    ORDER BY category, product
+    """
+    records, summary, keys = execute(driver, "get_products", query, category=category)
+    return pd.DataFrame(records, columns=keys)
+
+
+# aggregate -> Cypher aggregation function
+PRODUCT_AGGREGATES = {"mean": "avg", "sum": "sum", "min": "min", "max": "max"}
+
+INTEREST_DTYPES = {
+    "category": "object",
+    "date": "datetime64[M]",
+    "value": "float64",
+    "products": "int32",
+}
+
+
+def get_product_interest(
+    driver: Driver,
+    products: list[tuple[str, str]],
+    start_date: str | None = None,
+    end_date: str | None = None,
+    aggregate: str = "mean",
+    complete: bool = False,
+    typed: bool = False,
+    downcast: bool = False,
+) -> pd.DataFrame:
+    """
+    Aggregate the monthly search interest of any set of products.
+
+    The set is matched on the (category, name) key of the Product constraint
+    and aggregated per month in Cypher, so an ad-hoc category only costs a
+    query: nothing has to be preprocessed or loaded for it.
+
+    Parameters:
+        products (list[tuple]): (category, product) pairs, as the rows of
+            get_products; unknown products are ignored.
+        start_date (str): First month (YYYY-MM-DD) to include, unbounded if None.
+        end_date (str): Last month (YYYY-MM-DD) to include, unbounded if None.
+        aggregate (str): "mean", "sum", "min" or "max".
+        complete (bool): Only return months in which every matched product has
+            a value.
+        typed (bool): Materialize into the dtypes of INTEREST_DTYPES.
+        downcast (bool): With typed, return the values as float32.
+
+    Returns:
+        pd.DataFrame: date, value and products (how many products the value
+        covers), ordered by date.
+    """
+    if aggregate not in PRODUCT_AGGREGATES:
+        raise ValueError(
+            f"Unknown aggregate {aggregate!r}, expected one of "
+            f"{list(PRODUCT_AGGREGATES)}"
+        )
+    having = "WHERE products = matched" if complete else ""
+    query = f"""
+    UNWIND $products AS key
+    MATCH (p:Product {{category: key.category, name: key.name}})
+    WITH collect(DISTINCT p) AS matched_products
+    WITH matched_products, size(matched_products) AS matched
+    UNWIND matched_products AS p
+    MATCH (p)-[i:interest]->(m:CalendarMonth)
+    {_window_conditions("m", start_date, end_date)}
+    WITH m.value AS date, matched,
+         {PRODUCT_AGGREGATES[aggregate]}(i.value) AS value,
+         count(i) AS products
+    {having}
+    RETURN date, value, products
+    ORDER BY date
+    """
+    return execute_frame(
+        driver,
+        f"get_product_interest_{aggregate}",
+        query,
+        INTEREST_DTYPES if typed else None,
+        downcast,
+        products=[
+            {"category": category, "name": name} for category, name in products
+        ],
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+def get_category_interest(
+    driver: Driver,
+    categories: list[str] | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    typed: bool = False,
+    downcast: bool = False,
+) -> pd.DataFrame:
+    """
+    Mean monthly search interest of the products of each category.
+
+    Parameters:
+        categories (list[str]): Category names, every category if None.
+        start_date (str): First month (YYYY-MM-DD) to include, unbounded if None.
+        end_date (str): Last month (YYYY-MM-DD) to include, unbounded if None.
+        typed (bool): Materialize into the dtypes of INTEREST_DTYPES.
+        downcast (bool): With typed, return the values as float32.
+
+    Returns:
+        pd.DataFrame: category, date, value and products, ordered by category
+        and date.
+    """
+    conditions = _window_conditions("m", start_date, end_date)
+    query = f"""
+    MATCH (c:Category)
+    WHERE $categories IS NULL OR c.name IN $categories
+    MATCH (c)<-[:in_category]-(:Product)-[i:interest]->(m:CalendarMonth)
+    {conditions}
+    RETURN c.name AS category,
+           m.value AS date,
+           avg(i.value) AS value,
+           count(i) AS products
+    ORDER BY category, date
+    """
+    return execute_frame(
+        driver,
+        "get_category_interest",
+        query,
+        INTEREST_DTYPES if typed else None,
+        downcast,
+        categories=categories,
+        start_date=start_date,
+        end_date=end_date,
+    )
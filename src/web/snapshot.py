@@ -0,0 +1,256 @@
+import base64
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from neo4j import Driver
+
+from .backends import Backend, Neo4jBackend
+from .correlation import CorrelationCube
+from .cross_correlation import MAX_LAG, SEARCH_SALES_PAIRS, lagged_correlation
+
+KEY_COLS = ["year", "month"]
+
+# Lagged correlation tables kept per snapshot
+LAG_CACHE_SIZE = 256
+
+
+def _to_store(df: pd.DataFrame) -> pd.DataFrame:
+    """Turn a query result into a sorted, date-indexed frame with typed columns."""
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"].map(str))
+    for col in df.columns:
+        if col not in KEY_COLS and col != "date":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df.set_index("date").sort_index()
+
+
+def _encode(values, dtype: str) -> str:
+    """Base64 of the raw bytes of `values` as `dtype`."""
+    array = np.ascontiguousarray(values, dtype=dtype)
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+
+class SnapshotStore(Backend):
+    """
+    In-memory copy of the weather, sales and Google Trends table.
+
+    The table is fetched once with get_sales_data and every *_by_date /
+    *_by_date_range call is answered by slicing the cached frame. The graph
+    version marker (see queries/create_graph/set_graph_version.cypher) is polled
+    at most once every `check_interval` seconds; when it changes the snapshot is
+    reloaded. One thread polls and reloads at a time, outside the lock that
+    guards the cached state, and other readers keep being served the current
+    frame meanwhile; only the first load is waited for.
+
+    Correlation cubes (see correlation.py) are built once per snapshot and
+    column selection, so correlation windows do not touch the rows at all.
+    Lagged cross-correlations are cached per window, and typed_payload encodes
+    the table for the browser once per snapshot.
+
+    `source` is a Backend (see backends.py) or a driver for the Neo4j one, or a
+    function returning either (e.g. database.get_backend); it is then only
+    called when data is first needed.
+    """
+
+    def __init__(
+        self,
+        source: Backend | Driver | Callable[[], Backend | Driver],
+        check_interval: float = 30.0,
+    ):
+        self._source = source
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        # Held by the one thread polling the version and reloading the table
+        self._refresh_lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+        # Bumped by invalidate, so a reload running meanwhile is not trusted
+        self._generation = 0
+        self._data = None
+        self._cubes = {}
+        self._lags = OrderedDict()
+        self._payloads = {}
+
+    @property
+    def backend(self) -> Backend:
+        source = self._source() if callable(self._source) else self._source
+        return source if isinstance(source, Backend) else Neo4jBackend(source)
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = None
+            self._version = None
+            self._generation += 1
+
+    def _fresh(self) -> bool:
+        return (
+            self._checked_at is not None
+            and time.monotonic() - self._checked_at < self.check_interval
+        )
+
+    def _refresh(self) -> pd.DataFrame:
+        with self._lock:
+            if self._fresh():
+                return self._data
+            data = self._data
+        # Without a snapshot there is nothing to serve, so wait for the loader
+        if not self._refresh_lock.acquire(blocking=data is None):
+            return data
+        try:
+            with self._lock:
+                if self._fresh():
+                    return self._data
+                data, current = self._data, self._version
+                generation = self._generation
+            now = time.monotonic()
+            backend = self.backend
+            version = backend.get_graph_version()
+            if data is None or version != current:
+                data = _to_store(backend.get_sales_data())
+                with self._lock:
+                    self._data = data
+                    self._version = version if generation == self._generation else None
+                    self._cubes = {}
+                    self._lags.clear()
+                    self._payloads = {}
+            with self._lock:
+                if generation == self._generation:
+                    self._checked_at = now
+                return self._data
+        finally:
+            self._refresh_lock.release()
+
+    @property
+    def version(self):
+        self._refresh()
+        return self._version
+
+    def get_graph_version(self) -> tuple:
+        return self.version
+
+    @staticmethod
+    def _bounds(index: pd.Index, start_date=None, end_date=None) -> tuple[int, int]:
+        lo = 0 if start_date is None else index.searchsorted(pd.Timestamp(start_date))
+        hi = (
+            len(index)
+            if end_date is None
+            else index.searchsorted(pd.Timestamp(end_date), side="right")
+        )
+        return lo, max(lo, hi)
+
+    @classmethod
+    def _slice(
+        cls, store: pd.DataFrame, columns: list[str], start_date=None, end_date=None
+    ) -> pd.DataFrame:
+        lo, hi = cls._bounds(store.index, start_date, end_date)
+        data = store.iloc[lo:hi].reset_index()
+        return data[KEY_COLS + ["date"] + list(columns)]
+
+    def get_sales_data(
+        self,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        store = self._refresh()
+        if columns is None:
+            columns = store.columns.drop(KEY_COLS)
+        return self._slice(store, columns, start_date, end_date)
+
+    def correlation(
+        self,
+        x_cols: list[str],
+        y_cols: list[str],
+        start_date: str | None = None,
+        end_date: str | None = None,
+        seasonal_key: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        Pearson correlation of every x/y column pair between two dates.
+
+        Parameters:
+            x_cols (list[str]): Row columns of the result.
+            y_cols (list[str]): Column columns of the result.
+            seasonal_key (str): Remove the mean per value of this column (e.g.
+                "month") within the window first.
+
+        Returns:
+            pd.DataFrame: x_cols x y_cols correlations.
+        """
+        store = self._refresh()
+        key = (tuple(x_cols), tuple(y_cols), seasonal_key)
+        with self._lock:
+            cube = self._cubes.get(key)
+            if cube is None or cube.index is not store.index:
+                cube = CorrelationCube(store, x_cols, y_cols, seasonal_key)
+                self._cubes[key] = cube
+        return cube.window(start_date, end_date)
+
+    def lagged_correlation(
+        self,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        seasonal_key: str | None = None,
+        pairs: dict[str, str] = SEARCH_SALES_PAIRS,
+        max_lag: int = MAX_LAG,
+    ) -> pd.DataFrame:
+        """
+        Cross-correlation of search and sales columns per lag, between two dates.
+
+        Windows that select the same rows share one cache entry.
+
+        Returns:
+            pd.DataFrame: See cross_correlation.lagged_correlation.
+        """
+        store = self._refresh()
+        lo, hi = self._bounds(store.index, start_date, end_date)
+        key = (lo, hi, seasonal_key, tuple(pairs.items()), max_lag)
+        with self._lock:
+            if key in self._lags:
+                self._lags.move_to_end(key)
+                return self._lags[key]
+        table = lagged_correlation(store.iloc[lo:hi], pairs, max_lag, seasonal_key)
+        with self._lock:
+            if self._data is not store:
+                return table
+            self._lags[key] = table
+            while len(self._lags) > LAG_CACHE_SIZE:
+                self._lags.popitem(last=False)
+        return table
+
+    def typed_payload(self, columns: list[str]) -> dict:
+        """
+        The whole table as a compact, JSON-serializable payload for the browser.
+
+        Parameters:
+            columns (list[str]): Columns to include.
+
+        Returns:
+            dict: {"version": str, "months": base64 little-endian int32 of
+            year * 12 + month - 1 per row, "columns": {column: base64
+            little-endian float32, NaN where missing}}.
+        """
+        store = self._refresh()
+        key = tuple(columns)
+        with self._lock:
+            if self._data is store and key in self._payloads:
+                return self._payloads[key]
+            version = self._version
+        months = store.index.year * 12 + store.index.month - 1
+        payload = {
+            "version": str(version),
+            "months": _encode(months, "<i4"),
+            "columns": {col: _encode(store[col], "<f4") for col in columns},
+        }
+        with self._lock:
+            if self._data is store:
+                self._payloads[key] = payload
+        return payload
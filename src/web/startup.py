@@ -0,0 +1,72 @@
+import threading
+import time
+from typing import Callable
+
+from flask import Flask, jsonify
+
+
+class WarmUp:
+    """
+    Runs the expensive start-up work (connecting, loading the snapshot, rendering
+    the initial figures) in a background thread instead of at import time.
+
+    The server answers requests while the thread runs; until it has finished the
+    readiness endpoint reports 503, so a load balancer only routes traffic to
+    workers that are warm. A failed warm-up is retried on the next readiness
+    probe.
+    """
+
+    def __init__(self, tasks: list[Callable[[], object]]):
+        """
+        Parameters:
+            tasks (list[Callable]): Functions without arguments, run in order.
+        """
+        self.tasks = tasks
+        self._lock = threading.Lock()
+        self._thread = None
+        self.ready = False
+        self.error = None
+        self.seconds = None
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            for task in self.tasks:
+                task()
+        except Exception as e:
+            self.error = repr(e)
+        else:
+            self.error = None
+            self.ready = True
+        self.seconds = time.perf_counter() - start
+
+    def start(self) -> "WarmUp":
+        """Start the warm-up unless it is done or already running."""
+        with self._lock:
+            if self.ready or (self._thread is not None and self._thread.is_alive()):
+                return self
+            self._thread = threading.Thread(
+                target=self._run, name="warm-up", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def wait(self, timeout: float | None = None) -> bool:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.ready
+
+    def status(self) -> dict:
+        return {"ready": self.ready, "error": self.error, "seconds": self.seconds}
+
+
+def add_readiness_route(server: Flask, warm_up: WarmUp, path: str = "/ready"):
+    """Serve the warm-up status at `path`: 200 when ready, 503 otherwise."""
+
+    def ready():
+        if not warm_up.ready:
+            warm_up.start()
+        return jsonify(warm_up.status()), 200 if warm_up.ready else 503
+
+    server.add_url_rule(path, "ready", ready)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.web.correlation import CorrelationCube
+
+X_COLS = ["temperature", "rainfall"]
+Y_COLS = ["sales", "searches"]
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2015-01-01", periods=96, freq="MS")
+    frame = pd.DataFrame(
+        rng.normal(size=(len(index), 4)), index=index, columns=X_COLS + Y_COLS
+    )
+    frame["sales"] += 0.5 * frame["temperature"]
+    # Gaps on both axes, so the pairs have different complete rows
+    frame.iloc[[3, 17, 40], 0] = np.nan
+    frame.iloc[[5, 17, 60, 61], 2] = np.nan
+    frame["month"] = index.month
+    return frame
+
+
+def expected(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame[X_COLS + Y_COLS].corr().loc[X_COLS, Y_COLS]
+
+
+@pytest.mark.parametrize(
+    "start, end",
+    [
+        (None, None),
+        ("2016-03-01", "2019-11-01"),
+        ("2016-03-15", "2017-01-31"),
+        ("2015-01-01", "2015-01-01"),
+    ],
+)
+def test_window_matches_pairwise_corr(data, start, end):
+    cube = CorrelationCube(data, X_COLS, Y_COLS)
+    result = cube.window(start, end)
+    pd.testing.assert_frame_equal(result, expected(data.loc[start:end]), atol=1e-9)
+
+
+def test_seasonal_window_removes_the_mean_within_the_window(data):
+    cube = CorrelationCube(data, X_COLS, Y_COLS, seasonal_key="month")
+    window = data.loc["2016-01-01":"2020-12-01"]
+    columns = X_COLS + Y_COLS
+    anomalies = window[columns] - window.groupby("month")[columns].transform("mean")
+    result = cube.window("2016-01-01", "2020-12-01")
+    pd.testing.assert_frame_equal(result, expected(anomalies), atol=1e-9)
+
+
+def test_constant_column_has_no_correlation(data):
+    data["rainfall"] = 2.0
+    result = CorrelationCube(data, X_COLS, Y_COLS).window()
+    assert result.loc["rainfall"].isna().all()
+    assert result.loc["temperature"].notna().all()
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.web.cross_correlation import SEARCH_SALES_PAIRS, lagged_correlation
+
+
+def make_data(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2015-01-01", periods=rows, freq="MS")
+    columns = list(SEARCH_SALES_PAIRS) + list(SEARCH_SALES_PAIRS.values())
+    data = pd.DataFrame(
+        rng.normal(size=(rows, len(columns))), index=index, columns=columns
+    )
+    if rows:
+        data.iloc[rows // 3, 0] = np.nan
+        data.iloc[rows // 2, 5] = np.nan
+    data["month"] = index.month
+    return data
+
+
+def expected(data: pd.DataFrame, max_lag: int) -> pd.DataFrame:
+    """One Series.corr per pair and lag; NaN with fewer than three rows."""
+    result = pd.DataFrame(
+        np.nan, index=list(SEARCH_SALES_PAIRS), columns=range(-max_lag, max_lag + 1)
+    )
+    for x, y in SEARCH_SALES_PAIRS.items():
+        for lag in result.columns:
+            shifted = data[y].shift(-lag)
+            if (data[x].notna() & shifted.notna()).sum() >= 3:
+                result.loc[x, lag] = data[x].corr(shifted)
+    return result
+
+
+@pytest.mark.parametrize("rows", [3, 8, 13, 40])
+def test_matches_shifted_series_corr(rows):
+    data = make_data(rows)
+    result = lagged_correlation(data, max_lag=12)
+    pd.testing.assert_frame_equal(
+        result, expected(data, 12), check_dtype=False, atol=1e-9
+    )
+
+
+def test_short_window_is_nan_where_fewer_than_three_rows_overlap():
+    result = lagged_correlation(make_data(4), max_lag=3)
+    assert result[[-3, -2, 2, 3]].isna().all().all()
+    assert result[0].notna().any()
+
+
+def test_seasonal_key_subtracts_the_monthly_mean():
+    data = make_data(48, seed=1)
+    columns = list(SEARCH_SALES_PAIRS) + list(SEARCH_SALES_PAIRS.values())
+    anomalies = data[columns] - data.groupby("month")[columns].transform("mean")
+    result = lagged_correlation(data, max_lag=6, seasonal_key="month")
+    pd.testing.assert_frame_equal(
+        result, expected(anomalies, 6), check_dtype=False, atol=1e-9
+    )
+
+
+def test_empty_window():
+    result = lagged_correlation(make_data(0), max_lag=2)
+    assert result.shape == (len(SEARCH_SALES_PAIRS), 5)
+    assert result.isna().all().all()
@@ -0,0 +1,66 @@
+import numpy as np
+import plotly.graph_objs as go
+import pytest
+
+from src.web.downsample import downsample, line_trace, lttb, minmax
+
+
+@pytest.fixture
+def series():
+    x = np.arange(5000, dtype=np.float64)
+    y = np.sin(x / 50) + np.random.default_rng(0).normal(scale=0.1, size=len(x))
+    return x, y
+
+
+def test_lttb_keeps_the_endpoints_and_the_count(series):
+    x, y = series
+    picked = lttb(x, y, 300)
+    assert len(picked) == 300
+    assert picked[0] == 0 and picked[-1] == len(x) - 1
+    assert (np.diff(picked) > 0).all()
+
+
+def test_minmax_keeps_every_extreme(series):
+    x, y = series
+    picked = minmax(x, y, 200)
+    assert len(picked) <= 200
+    assert (np.diff(picked) > 0).all()
+    assert y.argmax() in picked and y.argmin() in picked
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_short_series_are_kept_whole(series, method):
+    x, y = series
+    np.testing.assert_array_equal(downsample(x[:100], y[:100], 100, method), range(100))
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_gaps_stay_broken(series, method):
+    x, y = series
+    y = y.copy()
+    y[1000:1010] = np.nan
+    y[3000] = np.nan
+    picked = downsample(x, y, 400, method)
+    # The first missing row of every gap is kept, so the line breaks there
+    assert 1000 in picked and 3000 in picked
+    assert np.isnan(y[picked]).sum() == 2
+    assert len(picked) <= 400
+
+
+def test_unknown_method(series):
+    with pytest.raises(ValueError, match="Unknown downsampling method"):
+        downsample(*series, 100, "every_other")
+
+
+def test_line_trace():
+    dates = [f"2020-01-{day:02d}" for day in range(1, 32)]
+    values = [float(day) for day in range(31)]
+    assert isinstance(line_trace(dates, values), go.Scatter)
+    trace = line_trace(dates, values, webgl=True, points=10, meta={"column": "x"})
+    assert isinstance(trace, go.Scattergl)
+    assert len(trace.y) == 10
+    assert trace.x[0] == "2020-01-01" and trace.x[-1] == "2020-01-31"
+    assert trace.meta == {
+        "column": "x",
+        "downsample": {"method": "lttb", "points": 10, "rows": 31},
+    }
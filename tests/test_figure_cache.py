@@ -0,0 +1,24 @@
+import pytest
+
+from src.web.figure_cache import relayout_window
+
+
+@pytest.mark.parametrize(
+    "start, end, window",
+    [
+        ("2019-01-01", "2020-06-01", ("2019-01-01", "2020-06-01")),
+        ("2019-01-01 00:00", "2020-06-01 12:00", ("2019-01-01", "2020-06-01")),
+        ("2018-12-14 07:12:30.5", "2020-06-28", ("2019-01-01", "2020-06-01")),
+    ],
+)
+def test_snaps_to_the_months_inside_the_range(start, end, window):
+    event = {"xaxis.range[0]": start, "xaxis.range[1]": end}
+    assert relayout_window(event) == window
+
+
+@pytest.mark.parametrize(
+    "event",
+    [None, {}, {"xaxis.autorange": True}, {"xaxis.range[0]": "2019-01-01"}],
+)
+def test_other_events_have_no_window(event):
+    assert relayout_window(event) is None
@@ -0,0 +1,87 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.web.materialize import CHUNK_SIZE, records_frame, result_transformer
+
+KEYS = ["date", "year", "month", "sales", "name"]
+DTYPES = {
+    "date": "datetime64[M]",
+    "year": "int16",
+    "month": "int8",
+    "sales": "float64",
+}
+
+
+def test_records_frame_types_the_columns():
+    records = [
+        (datetime.date(2020, 1, 1), "2020", "01", 1.5, "a"),
+        ("2020-02-01", "2020", "02", None, "b"),
+        (None, "2020", "03", 3, None),
+    ]
+    frame = records_frame(records, KEYS, DTYPES)
+    assert frame.dtypes.astype(str).to_dict() == {
+        "date": "datetime64[s]",
+        "year": "int16",
+        "month": "int8",
+        "sales": "float64",
+        "name": "object",
+    }
+    assert frame["date"].tolist()[:2] == [
+        pd.Timestamp("2020-01-01"),
+        pd.Timestamp("2020-02-01"),
+    ]
+    assert frame["date"].isna().tolist() == [False, False, True]
+    assert frame["month"].tolist() == [1, 2, 3]
+    np.testing.assert_array_equal(frame["sales"], [1.5, np.nan, 3.0])
+
+
+def test_null_integers_become_nullable():
+    records = [(None, "2020", "01", 1.0, "a"), (None, None, "02", 2.0, "b")]
+    frame = records_frame(records, KEYS, DTYPES)
+    assert str(frame["year"].dtype) == "Int16"
+    assert frame["year"].isna().tolist() == [False, True]
+    assert frame["year"].iloc[0] == 2020
+
+
+def test_mappings_and_downcast():
+    records = [dict(zip(KEYS, ("2021-05-01", 2021, 5, 0.25, "x")))]
+    frame = records_frame(records, KEYS, DTYPES, downcast=True)
+    assert frame["sales"].dtype == np.float32
+    assert frame.iloc[0].tolist() == [pd.Timestamp("2021-05-01"), 2021, 5, 0.25, "x"]
+
+
+class FakeResult:
+    """The parts of neo4j.Result a result_transformer uses."""
+
+    def __init__(self, keys, records):
+        self._keys, self._records = keys, records
+        self.consumed = False
+
+    def keys(self):
+        return self._keys
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def consume(self):
+        self.consumed = True
+        return "summary"
+
+
+def test_result_transformer_streams_in_chunks():
+    rows = 3 * CHUNK_SIZE + 5
+    records = [
+        (f"{2000 + i // 12}-{i % 12 + 1:02d}-01", 2000 + i // 12, i % 12 + 1, i, "p")
+        for i in range(rows)
+    ]
+    result = FakeResult(KEYS, records)
+    frame, summary = result_transformer(DTYPES)(result)
+    assert summary == "summary" and result.consumed
+    assert len(frame) == rows
+    assert frame["sales"].iloc[-1] == rows - 1
+    assert frame["date"].iloc[-1] == pd.Timestamp(records[-1][0])
+    pd.testing.assert_series_equal(
+        frame["year"], pd.Series([r[1] for r in records], dtype="int16", name="year")
+    )
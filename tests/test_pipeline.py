@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+
+from src.preprocessing.pipeline import Stage, dependencies, stages
+
+
+def run():
+    pass
+
+
+def test_dependencies_follow_the_files():
+    deps = dependencies(
+        [
+            Stage("raw", run, [Path("raw.csv")], [Path("a.csv")]),
+            Stage("left", run, [Path("a.csv")], [Path("b.csv")]),
+            Stage("right", run, [Path("a.csv")], [Path("c.csv")]),
+            Stage("join", run, [Path("b.csv"), Path("c.csv")]),
+        ]
+    )
+    assert deps == {
+        "raw": set(),
+        "left": {"raw"},
+        "right": {"raw"},
+        "join": {"left", "right"},
+    }
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(ValueError, match=r"Cycle between stages \['a', 'b'\]"):
+        dependencies(
+            [
+                Stage("a", run, [Path("b.csv")], [Path("a.csv")]),
+                Stage("b", run, [Path("a.csv")], [Path("b.csv")]),
+                Stage("c", run, [Path("raw.csv")], [Path("c.csv")]),
+            ]
+        )
+
+
+def test_two_writers_are_rejected():
+    with pytest.raises(ValueError, match="written by both a and b"):
+        dependencies(
+            [
+                Stage("a", run, [], [Path("out.csv")]),
+                Stage("b", run, [], [Path("out.csv")]),
+            ]
+        )
+
+
+def test_pipeline_stages_form_a_dag():
+    deps = dependencies(stages())
+    assert deps["combine"] == {
+        "cbs_pivot",
+        "comfort_score",
+        "knmi_rainfall",
+        "knmi_temperature",
+        "knmi_wind_speed",
+        "trends",
+    }
+    assert deps["product_graph_load"] == {"trends"}